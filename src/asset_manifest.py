@@ -0,0 +1,197 @@
+import json
+import posixpath
+import re
+from logging import getLogger
+from pathlib import Path, PurePosixPath
+
+from build_manifest import hash_bytes, hash_file
+from url_resolver import split_url
+
+ASSET_MANIFEST_NAME = "asset-manifest.json"
+
+ASSET_MANIFEST_FORMAT = 1
+
+# Files that are referenced from pages and safe to rename. Others, such as
+# favicon.ico or robots.txt, are fetched by fixed name and keep it.
+FINGERPRINT_SUFFIXES = frozenset(
+    {
+        ".avif",
+        ".css",
+        ".gif",
+        ".jpeg",
+        ".jpg",
+        ".js",
+        ".png",
+        ".svg",
+        ".webp",
+        ".woff",
+        ".woff2",
+    },
+)
+
+HASH_LENGTH = 10
+
+# The start of a url(...) or @import "..." reference in a stylesheet, and
+# the URL itself.
+CSS_REFERENCE_PATTERN = re.compile(r"""(url\(\s*['"]?|@import\s+['"])([^'"()\s]+)""")
+EXTERNAL_URL_PATTERN = re.compile(r"[a-zA-Z][a-zA-Z0-9+.-]*:|//|#")
+
+
+def fingerprint_path(relative_path, digest):
+    """Insert the digest before the suffix: ``images/a.png`` -> ``images/a.<digest>.png``."""
+    path = PurePosixPath(relative_path)
+    return str(path.with_name(f"{path.stem}.{digest[:HASH_LENGTH]}{path.suffix}"))
+
+
+def rewrite_css_urls(css, css_path, resolve):
+    """Point the url() and @import references of a stylesheet at published names.
+
+    css_path is the stylesheet's path relative to the static directory;
+    references relative to it or to the site root are looked up with
+    resolve, which takes and returns such paths. Only the file name of a
+    reference changes, so it stays relative or root-relative as written.
+    """
+    directory = posixpath.dirname(css_path)
+
+    def replace(match):
+        head, url = match.groups()
+        path, suffix = split_url(url)
+        if not path or EXTERNAL_URL_PATTERN.match(url):
+            return match.group()
+
+        if path.startswith("/"):
+            source = path[1:]
+        else:
+            source = posixpath.normpath(posixpath.join(directory, path))
+            if source.startswith("../"):
+                return match.group()
+
+        published = resolve(source)
+        if published == source:
+            return match.group()
+        path = posixpath.join(posixpath.dirname(path), posixpath.basename(published))
+        return head + path + suffix
+
+    return CSS_REFERENCE_PATTERN.sub(replace, css)
+
+
+class AssetManifest:
+    """Maps static file paths to their content-hashed published names.
+
+    Keys and names are relative to the static directory and use forward
+    slashes, e.g. ``index.css`` -> ``index.3f2a1b9c0d.css``. Stylesheets
+    whose references were rewritten to published names are published with
+    the text in ``contents`` instead of a copy of their source.
+    """
+
+    def __init__(self, entries=None, contents=None):
+        self.entries: dict = entries or {}
+        self.contents: dict = contents or {}
+        names = sorted((source, entry["path"]) for source, entry in self.entries.items())
+        self.published_paths = frozenset(path for _, path in names)
+        self.digest = hash_bytes(json.dumps(names).encode("utf-8"))
+
+    @classmethod
+    def build(cls, static_dir, previous=None):
+        """Hash every fingerprintable file, reusing digests from previous when
+        a file's size and mtime are unchanged.
+
+        Stylesheets are hashed last, after their references have been
+        rewritten, since their published text depends on the names of the
+        files they refer to. They are re-read on every build.
+        """
+        logger = getLogger(__name__)
+        static_dir = Path(static_dir)
+        previous_entries = previous.entries if previous is not None else {}
+        entries = {}
+        contents = {}
+        stylesheets = {}
+        for path in sorted(static_dir.rglob("*")):
+            if path.suffix.lower() not in FINGERPRINT_SUFFIXES or not path.is_file():
+                continue
+
+            relative = path.relative_to(static_dir).as_posix()
+            stat = path.stat()
+            if path.suffix.lower() == ".css":
+                stylesheets[relative] = stat
+                continue
+
+            entry = previous_entries.get(relative)
+            if (
+                entry is not None
+                and entry["size"] == stat.st_size
+                and entry["mtime_ns"] == stat.st_mtime_ns
+            ):
+                digest = entry["digest"]
+            else:
+                digest = hash_file(path)
+
+            entries[relative] = {
+                "path": fingerprint_path(relative, digest),
+                "digest": digest,
+                "size": stat.st_size,
+                "mtime_ns": stat.st_mtime_ns,
+            }
+
+        # Depth first, so a stylesheet's @imports are named before it is.
+        visiting = set()
+
+        def add_stylesheet(relative):
+            if relative in entries or relative in visiting:
+                return
+            visiting.add(relative)
+            data = (static_dir / relative).read_bytes()
+            try:
+                css = data.decode("utf-8")
+            except UnicodeDecodeError:
+                logger.warning("Not rewriting references in %s, which is not UTF-8", relative)
+            else:
+                rewritten = rewrite_css_urls(css, relative, resolve)
+                if rewritten != css:
+                    contents[relative] = rewritten
+                    data = rewritten.encode("utf-8")
+
+            stat = stylesheets[relative]
+            digest = hash_bytes(data)
+            entries[relative] = {
+                "path": fingerprint_path(relative, digest),
+                "digest": digest,
+                "size": stat.st_size,
+                "mtime_ns": stat.st_mtime_ns,
+            }
+
+        def resolve(source):
+            if source in stylesheets:
+                add_stylesheet(source)
+            entry = entries.get(source)
+            return source if entry is None else entry["path"]
+
+        for relative in stylesheets:
+            add_stylesheet(relative)
+        return cls(entries, contents)
+
+    @classmethod
+    def load(cls, path):
+        logger = getLogger(__name__)
+        manifest_file = Path(path)
+        if not manifest_file.exists():
+            return cls()
+
+        try:
+            data = json.loads(manifest_file.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            logger.warning("Ignoring unreadable asset manifest %s", manifest_file)
+            return cls()
+
+        if data.get("format") != ASSET_MANIFEST_FORMAT:
+            return cls()
+        return cls(data.get("assets", {}))
+
+    def save(self, path):
+        data = {"format": ASSET_MANIFEST_FORMAT, "assets": self.entries}
+        Path(path).write_text(json.dumps(data, indent=1, sort_keys=True), encoding="utf-8")
+
+    def resolve(self, relative_path):
+        """Return the published name of a static path, or the path unchanged."""
+        entry = self.entries.get(relative_path)
+        return relative_path if entry is None else entry["path"]
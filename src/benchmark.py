@@ -0,0 +1,228 @@
+"""Throughput benchmarks for the markdown pipeline on synthetic content.
+
+Run from the repository root::
+
+    python3 src/benchmark.py --pages 500 --save bench.json
+    python3 src/benchmark.py --pages 500 --baseline bench.json --threshold 10
+
+The second form exits with status 1 if any stage's MB/s dropped by more
+than the threshold percentage compared with the baseline run.
+"""
+
+import argparse
+import json
+import random
+import sys
+import tempfile
+import tracemalloc
+from logging import WARNING, getLogger
+from pathlib import Path
+from time import perf_counter
+
+from block_markdown import BlockType, iter_blocks, markdown_to_html_node
+from generate_website import generate_pages_recursive
+from inline_markdown import text_to_textnodes
+
+WORDS = (
+    "ring elves hobbit shire mountain river forest song light shadow road "
+    "king sword tower council journey dwarf wizard star gate stone"
+).split()
+
+
+def _sentence(rng, link_density):
+    words = []
+    for _ in range(rng.randint(6, 16)):
+        word = rng.choice(WORDS)
+        roll = rng.random()
+        if roll < link_density:
+            word = f"[{word}](/{rng.choice(WORDS)})"
+        elif roll < link_density * 1.2:
+            word = f"![{word}](/images/{rng.choice(WORDS)}.png)"
+        elif roll < 0.25:
+            word = rng.choice(("**{}**", "_{}_", "`{}`")).format(word)
+        words.append(word)
+    return " ".join(words).capitalize() + "."
+
+
+def synthetic_page(
+    rng,
+    size_bytes,
+    heading_density=0.1,
+    list_density=0.2,
+    code_density=0.05,
+    link_density=0.05,
+):
+    """Return a markdown page of roughly size_bytes mixing every block type."""
+    blocks = [f"# {rng.choice(WORDS).title()} {rng.choice(WORDS).title()}"]
+    size = len(blocks[0])
+    while size < size_bytes:
+        roll = rng.random()
+        if roll < heading_density:
+            block = f"{'#' * rng.randint(2, 6)} {_sentence(rng, link_density)}"
+        elif roll < heading_density + list_density:
+            items = [_sentence(rng, link_density) for _ in range(rng.randint(2, 6))]
+            if rng.random() < 0.5:
+                block = "\n".join(f"- {item}" for item in items)
+            else:
+                block = "\n".join(f"{n}. {item}" for n, item in enumerate(items, 1))
+        elif roll < heading_density + list_density + code_density:
+            code = "\n".join(f"    {rng.choice(WORDS)}_{rng.choice(WORDS)}()" for _ in range(4))
+            block = f"```\n{code}\n```"
+        elif roll < heading_density + list_density + code_density + 0.05:
+            block = f"> {_sentence(rng, link_density)}\n>\n> -- {rng.choice(WORDS)}"
+        else:
+            block = "\n".join(_sentence(rng, link_density) for _ in range(rng.randint(2, 5)))
+        blocks.append(block)
+        size += len(block) + 2
+    return "\n\n".join(blocks) + "\n"
+
+
+def generate_corpus(root, pages, page_bytes, depth=2, seed=0, **densities):
+    """Write `pages` synthetic pages under root, nested up to `depth` directories."""
+    rng = random.Random(seed)
+    root = Path(root)
+    for number in range(pages):
+        parts = [f"section{rng.randrange(4)}" for _ in range(rng.randint(0, depth))]
+        page_dir = root.joinpath(*parts, f"page{number}")
+        page_dir.mkdir(parents=True, exist_ok=True)
+        (page_dir / "index.md").write_text(
+            synthetic_page(rng, page_bytes, **densities),
+            encoding="utf-8",
+        )
+    return sorted(root.rglob("*.md"))
+
+
+def _measure(func, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = perf_counter()
+        func()
+        best = min(best, perf_counter() - start)
+
+    tracemalloc.start()
+    try:
+        func()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return best, peak
+
+
+def run_benchmarks(corpus_root, template_path, repeat=3):
+    """Time each pipeline stage over the corpus and return per-stage results."""
+    sources = sorted(Path(corpus_root).rglob("*.md"))
+    markdowns = [source.read_text(encoding="utf-8") for source in sources]
+    paragraphs = [
+        block.text
+        for markdown in markdowns
+        for block in iter_blocks(markdown.split("\n"))
+        if block.block_type != BlockType.CODE
+    ]
+    trees = [markdown_to_html_node(markdown) for markdown in markdowns]
+    total_bytes = sum(len(markdown.encode("utf-8")) for markdown in markdowns)
+
+    with tempfile.TemporaryDirectory() as out_dir:
+        stages = {
+            "inline": lambda: [text_to_textnodes(paragraph) for paragraph in paragraphs],
+            "parse": lambda: [markdown_to_html_node(markdown) for markdown in markdowns],
+            "to_html": lambda: [tree.to_html() for tree in trees],
+            "build": lambda: generate_pages_recursive(
+                corpus_root,
+                template_path,
+                Path(out_dir),
+                "/",
+            ),
+        }
+
+        results = {}
+        for name, func in stages.items():
+            seconds, peak = _measure(func, repeat)
+            results[name] = {
+                "seconds": seconds,
+                "pages_per_sec": len(sources) / seconds,
+                "mb_per_sec": total_bytes / 1_000_000 / seconds,
+                "peak_mb": peak / 1_000_000,
+            }
+    return results
+
+
+def compare_to_baseline(results, baseline, threshold):
+    """Return a message for every stage whose MB/s fell more than threshold %."""
+    regressions = []
+    for name, stats in results.items():
+        if name not in baseline:
+            continue
+        before = baseline[name]["mb_per_sec"]
+        change = (stats["mb_per_sec"] - before) / before * 100
+        if change < -threshold:
+            regressions.append(
+                f"{name}: {stats['mb_per_sec']:.2f} MB/s vs {before:.2f} MB/s ({change:+.1f}%)",
+            )
+    return regressions
+
+
+def format_results(results):
+    lines = [f"{'stage':<10}{'pages/s':>10}{'MB/s':>9}{'peak MB':>9}"]
+    lines.extend(
+        f"{name:<10}{stats['pages_per_sec']:>10.1f}{stats['mb_per_sec']:>9.2f}{stats['peak_mb']:>9.2f}"
+        for name, stats in results.items()
+    )
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pages", type=int, default=200)
+    parser.add_argument("--page-kb", type=float, default=8, help="approximate page size")
+    parser.add_argument("--depth", type=int, default=2, help="maximum directory nesting")
+    parser.add_argument("--heading-density", type=float, default=0.1)
+    parser.add_argument("--list-density", type=float, default=0.2)
+    parser.add_argument("--code-density", type=float, default=0.05)
+    parser.add_argument("--link-density", type=float, default=0.05)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=3, help="runs per stage; the best is kept")
+    parser.add_argument("--template", default="template.html")
+    parser.add_argument("--save", metavar="PATH", help="write results as JSON")
+    parser.add_argument("--baseline", metavar="PATH", help="compare against saved results")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=10,
+        help="allowed MB/s drop versus the baseline, in percent (default: 10)",
+    )
+    args = parser.parse_args(argv)
+
+    getLogger("generate_website").setLevel(WARNING)
+
+    with tempfile.TemporaryDirectory() as corpus_dir:
+        generate_corpus(
+            corpus_dir,
+            args.pages,
+            int(args.page_kb * 1024),
+            depth=args.depth,
+            seed=args.seed,
+            heading_density=args.heading_density,
+            list_density=args.list_density,
+            code_density=args.code_density,
+            link_density=args.link_density,
+        )
+        results = run_benchmarks(corpus_dir, args.template, args.repeat)
+
+    print(format_results(results))
+
+    if args.save:
+        Path(args.save).write_text(json.dumps(results, indent=2), encoding="utf-8")
+
+    if args.baseline:
+        baseline = json.loads(Path(args.baseline).read_text(encoding="utf-8"))
+        regressions = compare_to_baseline(results, baseline, args.threshold)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            return 1
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,11 +1,21 @@
 import re
 import textwrap
 from enum import Enum
+from typing import NamedTuple
 
-from htmlnode import LeafNode, ParentNode
+from build_profiler import profiled
+from htmlnode import FragmentNode, LeafNode, ParentNode, join_chunks
 from inline_markdown import text_to_textnodes
 from textnode import TextNode, TextType, text_node_to_html_node
 
+# Bump whenever parsing or rendering changes the HTML produced for the same
+# markdown, so cached results from older versions are not reused.
+PARSER_VERSION = "3"
+
+HEADING_PATTERN = re.compile(r"(#{1,6}) ")
+OLIST_MARKER_PATTERN = re.compile(r"[0-9]+\.[ \t]")
+ULIST_MARKER = "- "
+
 
 class BlockType(Enum):
     PARAGRAPH = "paragraph"
@@ -16,29 +26,93 @@ class BlockType(Enum):
     OLIST = "ordered_list"
 
 
-def markdown_to_html_node(markdown):
-    block_nodes_children = []
-    split_markdown = markdown_to_blocks(markdown)
-    for block in split_markdown:
-        block_type = block_to_block_type(block)
+class Block(NamedTuple):
+    text: str
+    block_type: BlockType
+    # Parsed while classifying: (level,) for headings, and for lists the
+    # length of the item marker on each line, 0 for continuation lines.
+    meta: tuple = ()
+
+
+def markdown_to_html_node(markdown, memo=None, page_text=None):
+    """Convert markdown, given as a string or an iterable of lines, to a div node.
+
+    With page_text, such as a site_outputs.PageText, the text of each
+    block is passed to ``page_text.add(block_type, text)`` as it is parsed.
+    """
+    return ParentNode("div", list(iter_block_nodes(markdown, memo, page_text)))
+
+
+def iter_block_nodes(markdown, memo=None, page_text=None):
+    """Yield the HTML node for each block as soon as it has been parsed.
+
+    With a FragmentMemo, each block is serialized once and repeats are
+    served from the memo as FragmentNodes, along with the block's text.
+    """
+    lines = markdown.split("\n") if isinstance(markdown, str) else markdown
+    for block in iter_blocks(lines):
+        if memo is None:
+            plain = None if page_text is None else []
+            node = block_to_html_node(block, plain)
+            if page_text is not None:
+                page_text.add(block.block_type, "".join(plain))
+            yield node
+            continue
+
+        entry = memo.get(block.text)
+        if entry is None:
+            plain = []
+            segments = join_chunks(block_to_html_node(block, plain).iter_chunks())
+            entry = (segments, "".join(plain))
+            memo.put(block.text, entry)
+        segments, text = entry
+        if page_text is not None:
+            page_text.add(block.block_type, text)
+        yield FragmentNode(segments)
+
+
+@profiled("block")
+def block_to_html_node(block, plain=None):
+    """Build a block's node; see text_to_children for plain."""
+    if block.block_type == BlockType.CODE:
+        text = block.text.removeprefix("```").removesuffix("```")
+        cleaned_text = textwrap.dedent(text.removeprefix("\n"))
+        child_node = text_node_to_html_node(TextNode(cleaned_text, TextType.CODE))
+        if plain is not None:
+            plain.append(cleaned_text)
+        return ParentNode("pre", [child_node])
 
-        if block_type == BlockType.CODE:
-            text = block.removeprefix("```").removesuffix("```")
-            cleaned_text = textwrap.dedent(text.removeprefix("\n"))
-            child_node = text_node_to_html_node(TextNode(cleaned_text, TextType.CODE))
-            block_nodes_children.append(ParentNode("pre", [child_node]))
+    return text_to_children(block.text, block.block_type, block.meta, plain)
+
+
+def _to_html_nodes(text_nodes, plain):
+    if plain is not None:
+        plain.extend(node.text for node in text_nodes)
+    return [text_node_to_html_node(node) for node in text_nodes]
+
+
+def _list_items(text, marker_lengths, plain):
+    items = []
+    for line, marker_length in zip(text.split("\n"), marker_lengths, strict=True):
+        html_nodes = _to_html_nodes(text_to_textnodes(line[marker_length:]), plain)
+        if plain is not None:
+            plain.append(" ")
+        if marker_length:
+            items.append(ParentNode("li", html_nodes))
         else:
-            child_node = text_to_children(block)
-            if isinstance(child_node, list):
-                block_nodes_children.extend(child_node)
-            else:
-                block_nodes_children.append(child_node)
+            items[-1].children.extend(html_nodes)
+    return items
 
-    return ParentNode("div", block_nodes_children)
 
+def text_to_children(text, block_type=None, meta=None, plain=None):
+    """Build the node of a block other than code.
 
-def text_to_children(text):
-    block_type = block_to_block_type(text)
+    plain, if given, is a list to which the text the block shows is
+    appended, taken from the same TextNodes as the HTML: markup is left
+    out, and of links and images only the text and alt text are kept.
+    """
+    if block_type is None or meta is None:
+        block_type, meta = classify_block(text)
 
     match block_type:
         case BlockType.QUOTE:
@@ -53,90 +127,143 @@ def text_to_children(text):
                 if modified_txt.strip():
                     cleaned_split_text.append(modified_txt.strip())
             list_leaf_nodes = [LeafNode(value=text) for text in cleaned_split_text]
+            if plain is not None:
+                plain.append(" ".join(line for line in cleaned_split_text if line != "<br>"))
             return ParentNode("blockquote", list_leaf_nodes)
 
         case BlockType.OLIST:
-            text_nodes = text_to_textnodes(text)
-            html_nodes = list(map(text_node_to_html_node, text_nodes))
-
-            list_html_nodes = []
-            for node in html_nodes:
-                if node.value is not None and re.search(r"^[0-9]+\.\s", node.value):
-                    list_html_nodes.append(
-                        ParentNode(
-                            "li",
-                            [LeafNode(value=re.sub(r"^[0-9]+\.\s", "", node.value))],
-                        ),
-                    )
-                else:
-                    list_html_nodes[-1].children.append(node)
-
-            return ParentNode("ol", list_html_nodes)
+            return ParentNode("ol", _list_items(text, meta, plain))
 
         case BlockType.ULIST:
-            text_nodes = text_to_textnodes(text)
-            html_nodes = list(map(text_node_to_html_node, text_nodes))
-
-            list_html_nodes = []
-            for node in html_nodes:
-                if node.value is not None and node.value.startswith("- "):
-                    list_html_nodes.append(
-                        ParentNode(
-                            "li",
-                            [LeafNode(value=node.value.removeprefix("- "))],
-                        ),
-                    )
-                else:
-                    list_html_nodes[-1].children.append(node)
-
-            return ParentNode("ul", list_html_nodes)
+            return ParentNode("ul", _list_items(text, meta, plain))
 
         case BlockType.HEADING:
-            text_nodes = text_to_textnodes(text)
-            html_nodes = list(map(text_node_to_html_node, text_nodes))
-
-            # cleaned_split_text = [s.strip() for s in split_text if s.strip()]
-            matches = re.findall(r"^#+", text)
-            tag_type = len("".join(matches))
-
-            list_html_nodes = []
-            for node in html_nodes:
-                if node.value is not None and node.value.startswith(
-                    ("# ", "## ", "### ", "#### ", "##### ", "###### "),
-                ):
-                    list_html_nodes.append(
-                        LeafNode(value=re.sub(r"^#+\s", "", node.value)),
-                    )
-                else:
-                    list_html_nodes.append(node)
-
-            return ParentNode(f"h{tag_type}", list_html_nodes)
+            (level,) = meta
+            text_nodes = text_to_textnodes(text[level + 1 :])
+            return ParentNode(f"h{level}", _to_html_nodes(text_nodes, plain))
 
         case _:
             new_text_block = " ".join(text.replace("\n", "").split())
             text_nodes_list = text_to_textnodes(new_text_block)
-            leaf_nodes = [text_node_to_html_node(node) for node in text_nodes_list]
-            return ParentNode("p", leaf_nodes)
+            return ParentNode("p", _to_html_nodes(text_nodes_list, plain))
 
 
 def block_to_block_type(block_of_markdown):
-    match block_of_markdown:
-        case s if s.startswith(
-            ("# ", "## ", "### ", "#### ", "##### ", "###### "),
-        ):
-            return BlockType.HEADING
-        case s if s.startswith("```") and s.endswith("```"):
-            return BlockType.CODE
-        case s if s.startswith(">"):
-            return BlockType.QUOTE
-        case s if s.startswith("- "):
-            return BlockType.ULIST
-        case s if re.match(r"^\d+\.\s", s):
-            return BlockType.OLIST
-        case _:
-            return BlockType.PARAGRAPH
+    return classify_block(block_of_markdown)[0]
+
+
+def _classify_heading(text):
+    match = HEADING_PATTERN.match(text)
+    if match is None:
+        return None
+    return BlockType.HEADING, (len(match[1]),)
+
+
+def _classify_code(text):
+    if text.startswith("```") and text.endswith("```"):
+        return BlockType.CODE, ()
+    return None
+
+
+def _classify_quote(text):
+    return BlockType.QUOTE, ()
+
+
+def _classify_ulist(text):
+    if not text.startswith(ULIST_MARKER):
+        return None
+    marker_lengths = tuple(
+        len(ULIST_MARKER) if line.startswith(ULIST_MARKER) else 0 for line in text.split("\n")
+    )
+    return BlockType.ULIST, marker_lengths
+
+
+def _classify_olist(text):
+    if OLIST_MARKER_PATTERN.match(text) is None:
+        return None
+    marker_lengths = []
+    for line in text.split("\n"):
+        match = OLIST_MARKER_PATTERN.match(line)
+        marker_lengths.append(0 if match is None else match.end())
+    return BlockType.OLIST, tuple(marker_lengths)
+
+
+# Every block type but paragraphs is recognised by its first character.
+_BLOCK_CLASSIFIERS = {
+    "#": _classify_heading,
+    "`": _classify_code,
+    ">": _classify_quote,
+    "-": _classify_ulist,
+    **dict.fromkeys("0123456789", _classify_olist),
+}
+
+
+def classify_block(text):
+    """Return a block's type and the metadata parsed while recognising it.
+
+    See ``Block.meta`` for what the metadata holds.
+    """
+    classifier = _BLOCK_CLASSIFIERS.get(text[:1])
+    if classifier is not None:
+        result = classifier(text)
+        if result is not None:
+            return result
+    return BlockType.PARAGRAPH, ()
 
 
 def markdown_to_blocks(markdown):
-    split_markdown = markdown.split("\n\n")
-    return [inline.strip() for inline in split_markdown if inline.strip() != ""]
+    return [block.text for block in iter_blocks(markdown.split("\n"))]
+
+
+def _make_block(lines):
+    text = "\n".join(lines).strip()
+    return Block(text, *classify_block(text))
+
+
+def iter_blocks(lines):
+    """Yield typed blocks from an iterable of lines, such as an open file.
+
+    Blocks are separated by blank lines, except inside a fenced code block
+    that opens a block, so code may contain blank lines. Only the current
+    block is held in memory. A fence left open at the end of the input is
+    split on blank lines as if it were never opened.
+    """
+    buffer = []
+    in_fence = False
+
+    for raw_line in lines:
+        line = raw_line.rstrip("\r\n")
+
+        if in_fence:
+            buffer.append(line)
+            if line.rstrip().endswith("```"):
+                in_fence = False
+            continue
+
+        if not line.strip():
+            if buffer:
+                yield _make_block(buffer)
+                buffer = []
+            continue
+
+        if not buffer:
+            stripped = line.strip()
+            in_fence = stripped.startswith("```") and not (
+                len(stripped) >= 6 and stripped.endswith("```")
+            )
+        buffer.append(line)
+
+    if not in_fence:
+        if buffer:
+            yield _make_block(buffer)
+        return
+
+    block_lines = []
+    for line in buffer:
+        if line.strip():
+            block_lines.append(line)
+        elif block_lines:
+            yield _make_block(block_lines)
+            block_lines = []
+    if block_lines:
+        yield _make_block(block_lines)
@@ -0,0 +1,128 @@
+import hashlib
+import json
+from logging import getLogger
+from pathlib import Path
+
+# Bump whenever a change to the generator alters the HTML it produces, so
+# pages built by an older version are not mistaken for up to date.
+GENERATOR_VERSION = "3"
+
+MANIFEST_FORMAT = 1
+
+HASH_BLOCK_SIZE = 1024 * 1024
+
+
+def hash_bytes(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+def hash_file(path):
+    """Hash a file's contents without reading it whole."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as fp:
+        while block := fp.read(HASH_BLOCK_SIZE):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def page_key(source_hash, template_hash, basepath, resolver_key=None, assets_key=None):
+    parts = (GENERATOR_VERSION, source_hash, template_hash, basepath)
+    if resolver_key is not None:
+        parts += (resolver_key,)
+    if assets_key is not None:
+        parts += (assets_key,)
+    return hash_bytes("\0".join(parts).encode("utf-8"))
+
+
+class BuildManifest:
+    """On-disk record of every generated page and the inputs it was built from."""
+
+    def __init__(self, path, entries=None):
+        self.path = Path(path)
+        self.entries: dict = entries or {}
+
+    @classmethod
+    def load(cls, path):
+        logger = getLogger(__name__)
+        manifest_file = Path(path)
+        if not manifest_file.exists():
+            return cls(manifest_file)
+
+        try:
+            data = json.loads(manifest_file.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            logger.warning("Ignoring unreadable build manifest %s", manifest_file)
+            return cls(manifest_file)
+
+        if data.get("format") != MANIFEST_FORMAT:
+            logger.info("Build manifest %s is outdated, rebuilding", manifest_file)
+            return cls(manifest_file)
+
+        return cls(manifest_file, data.get("outputs", {}))
+
+    def save(self):
+        data = {"format": MANIFEST_FORMAT, "outputs": self.entries}
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.path.write_text(json.dumps(data, indent=1, sort_keys=True), encoding="utf-8")
+
+    def source_hash(self, dest_path, source_path):
+        """Return the stored digest of the source if its size and mtime are unchanged.
+
+        Otherwise return None: the source has to be read to render the page
+        anyway, so its digest is taken from that read.
+        """
+        stat = Path(source_path).stat()
+        entry = self.entries.get(str(dest_path))
+        if (
+            entry is not None
+            and entry["source"] == str(source_path)
+            and entry["size"] == stat.st_size
+            and entry["mtime_ns"] == stat.st_mtime_ns
+        ):
+            return entry["source_hash"]
+        return None
+
+    def is_fresh(self, dest_path, key):
+        entry = self.entries.get(str(dest_path))
+        return entry is not None and entry["key"] == key and Path(dest_path).exists()
+
+    def urls(self, dest_path):
+        """Return the root-relative URLs the page referred to when it was built."""
+        entry = self.entries.get(str(dest_path))
+        return () if entry is None else entry.get("urls", ())
+
+    def record(self, dest_path, source_path, source_hash, key, urls=None):
+        stat = Path(source_path).stat()
+        entry = {
+            "source": str(source_path),
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+            "source_hash": source_hash,
+            "key": key,
+        }
+        if urls:
+            entry["urls"] = sorted(urls)
+        self.entries[str(dest_path)] = entry
+
+    def prune(self, live_dest_paths, dest_root):
+        """Delete outputs whose source is gone and return their paths."""
+        live = {str(path) for path in live_dest_paths}
+        stale = [dest for dest in self.entries if dest not in live]
+
+        for dest in stale:
+            del self.entries[dest]
+            stale_file = Path(dest)
+            stale_file.unlink(missing_ok=True)
+            remove_empty_parents(stale_file.parent, Path(dest_root))
+
+        return stale
+
+
+def remove_empty_parents(directory, stop_at):
+    stop_at = stop_at.resolve()
+    current = directory
+    while current.exists() and stop_at in current.resolve().parents:
+        if any(current.iterdir()):
+            break
+        current.rmdir()
+        current = current.parent
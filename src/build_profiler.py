@@ -0,0 +1,146 @@
+import json
+import math
+from collections import defaultdict
+from contextlib import contextmanager
+from functools import wraps
+from pathlib import Path
+from time import perf_counter
+
+# The profiler in use for this process, or None when profiling is off.
+_active = None
+
+
+class BuildProfiler:
+    """Accumulates wall-clock time per build stage and per page."""
+
+    def __init__(self):
+        self.stage_totals: dict = defaultdict(float)
+        self.stage_calls: dict = defaultdict(int)
+        self.page_times: dict = defaultdict(float)
+
+    def add(self, stage, elapsed, page=None):
+        self.stage_totals[stage] += elapsed
+        self.stage_calls[stage] += 1
+        if page is not None:
+            self.page_times[page] += elapsed
+
+    @contextmanager
+    def stage(self, stage, page=None):
+        start = perf_counter()
+        try:
+            yield
+        finally:
+            self.add(stage, perf_counter() - start, page)
+
+    def to_dict(self, slowest=10):
+        times = sorted(self.page_times.values())
+        slowest_pages = sorted(self.page_times.items(), key=lambda item: item[1], reverse=True)
+        return {
+            "stages": {
+                stage: {"total": total, "calls": self.stage_calls[stage]}
+                for stage, total in self.stage_totals.items()
+            },
+            "pages": {
+                "count": len(times),
+                "p50": percentile(times, 50),
+                "p95": percentile(times, 95),
+                "max": times[-1] if times else 0.0,
+            },
+            "slowest": [{"page": page, "seconds": seconds} for page, seconds in slowest_pages[:slowest]],
+        }
+
+    def merge(self, data):
+        """Fold in the raw totals of another profiler, e.g. from a worker process."""
+        for stage, total in data["stage_totals"].items():
+            self.stage_totals[stage] += total
+        for stage, calls in data["stage_calls"].items():
+            self.stage_calls[stage] += calls
+        for page, seconds in data["page_times"].items():
+            self.page_times[page] += seconds
+
+    def drain(self):
+        """Return the raw totals collected so far and start over."""
+        data = {
+            "stage_totals": dict(self.stage_totals),
+            "stage_calls": dict(self.stage_calls),
+            "page_times": dict(self.page_times),
+        }
+        self.__init__()
+        return data
+
+    def report(self, slowest=10):
+        summary = self.to_dict(slowest)
+        lines = [f"{'stage':<12}{'total s':>10}{'calls':>8}"]
+        for stage, stats in sorted(
+            summary["stages"].items(),
+            key=lambda item: item[1]["total"],
+            reverse=True,
+        ):
+            lines.append(f"{stage:<12}{stats['total']:>10.4f}{stats['calls']:>8}")
+
+        pages = summary["pages"]
+        lines.append(
+            f"pages: {pages['count']}  p50 {pages['p50']:.4f}s  "
+            f"p95 {pages['p95']:.4f}s  max {pages['max']:.4f}s",
+        )
+        if summary["slowest"]:
+            lines.append("slowest pages:")
+            lines.extend(f"  {entry['seconds']:.4f}s  {entry['page']}" for entry in summary["slowest"])
+        return "\n".join(lines)
+
+    def write_json(self, path, slowest=10):
+        Path(path).write_text(json.dumps(self.to_dict(slowest), indent=2), encoding="utf-8")
+
+
+def percentile(sorted_values, percent):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(percent / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+def enable_profiling():
+    global _active
+    _active = BuildProfiler()
+    return _active
+
+
+def disable_profiling():
+    global _active
+    _active = None
+
+
+def active_profiler():
+    return _active
+
+
+@contextmanager
+def profile_stage(stage, page=None):
+    if _active is None:
+        yield
+        return
+
+    with _active.stage(stage, page):
+        yield
+
+
+def profiled(stage):
+    """Time every call of the decorated function under ``stage`` while profiling."""
+
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            profiler = _active
+            if profiler is None:
+                return func(*args, **kwargs)
+
+            start = perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                profiler.add(stage, perf_counter() - start)
+
+        return wrapper
+
+    return decorator
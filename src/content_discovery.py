@@ -0,0 +1,176 @@
+import fnmatch
+import json
+import os
+import time
+from logging import getLogger
+from pathlib import Path
+
+IGNORE_FILE_NAME = ".ssgignore"
+
+# Always skipped: version control metadata and editor swap or backup files.
+DEFAULT_IGNORE_PATTERNS = (
+    ".git/",
+    ".hg/",
+    ".svn/",
+    ".DS_Store",
+    "*.swp",
+    "*.swo",
+    "*~",
+    ".#*",
+    "#*#",
+)
+
+DIRECTORY_INDEX_FORMAT = 1
+
+# A directory modified this close to the build may change again within the
+# same mtime tick, so its listing is not kept for the next build.
+RACY_WINDOW_NS = 2 * 10**9
+
+
+def load_ignore_patterns(content_dir):
+    """Return the default ignore patterns plus those in the content directory's .ssgignore."""
+    patterns = list(DEFAULT_IGNORE_PATTERNS)
+    try:
+        lines = (Path(content_dir) / IGNORE_FILE_NAME).read_text(encoding="utf-8").splitlines()
+    except FileNotFoundError:
+        return patterns
+
+    patterns.extend(
+        line.strip() for line in lines if line.strip() and not line.lstrip().startswith("#")
+    )
+    return patterns
+
+
+def is_ignored(relative_path, is_dir, patterns):
+    """Match a path relative to the content directory, like a simple .gitignore.
+
+    A pattern containing a slash is matched against the whole relative
+    path, any other against the last component only. A trailing slash
+    restricts a pattern to directories.
+    """
+    name = relative_path.rsplit("/", 1)[-1]
+    for pattern in patterns:
+        if pattern.endswith("/"):
+            if not is_dir:
+                continue
+            pattern = pattern.rstrip("/")
+
+        if "/" in pattern:
+            if fnmatch.fnmatchcase(relative_path, pattern.lstrip("/")):
+                return True
+        elif fnmatch.fnmatchcase(name, pattern):
+            return True
+    return False
+
+
+class DirectoryIndex:
+    """On-disk listing of every content directory from the previous build.
+
+    A directory's mtime changes whenever an entry is added, removed or
+    renamed directly inside it, so while it is unchanged its stored list of
+    markdown files and subdirectories is reused instead of scanning it.
+    """
+
+    def __init__(self, path, entries=None, patterns=None):
+        self.path = Path(path)
+        self.entries: dict = entries or {}
+        self.patterns: list = patterns or []
+
+    @classmethod
+    def load(cls, path):
+        logger = getLogger(__name__)
+        index_file = Path(path)
+        if not index_file.exists():
+            return cls(index_file)
+
+        try:
+            data = json.loads(index_file.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            logger.warning("Ignoring unreadable directory index %s", index_file)
+            return cls(index_file)
+
+        if data.get("format") != DIRECTORY_INDEX_FORMAT:
+            return cls(index_file)
+        return cls(index_file, data.get("directories", {}), data.get("patterns", []))
+
+    def save(self):
+        data = {
+            "format": DIRECTORY_INDEX_FORMAT,
+            "patterns": self.patterns,
+            "directories": self.entries,
+        }
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.path.write_text(json.dumps(data, indent=1, sort_keys=True), encoding="utf-8")
+
+    def listing(self, relative_dir, mtime_ns):
+        entry = self.entries.get(relative_dir)
+        if entry is None or entry["mtime_ns"] != mtime_ns:
+            return None
+        return entry["files"], entry["dirs"]
+
+
+def _scan_directory(directory, relative_dir, patterns):
+    files = []
+    dirs = []
+    with os.scandir(directory) as entries:
+        for entry in entries:
+            relative = f"{relative_dir}/{entry.name}" if relative_dir else entry.name
+            # DirEntry answers these from the directory listing itself on
+            # most platforms, without a stat per entry.
+            if entry.is_dir():
+                if not is_ignored(relative, True, patterns):
+                    dirs.append(entry.name)
+            elif entry.name.endswith(".md") and entry.is_file():
+                if not is_ignored(relative, False, patterns):
+                    files.append(entry.name)
+    return sorted(files), sorted(dirs)
+
+
+def discover_pages(dir_path_content, dest_dir_path, index=None):
+    """Map every markdown file under the content directory to its output path.
+
+    The tree is walked iteratively with os.scandir, skipping anything that
+    matches the ignore patterns. With a DirectoryIndex, directories whose
+    mtime is unchanged are not scanned again, and the index is updated to
+    the current tree.
+    """
+    root = Path(dir_path_content)
+    dest_root = Path(dest_dir_path)
+    if root.is_file():
+        if root.suffix == ".md":
+            return [(root, dest_root.parent / "index.html")]
+        return []
+
+    patterns = load_ignore_patterns(root)
+    if index is not None and index.patterns != patterns:
+        index.entries = {}
+        index.patterns = patterns
+    racy_after = time.time_ns() - RACY_WINDOW_NS
+
+    visited = {}
+    pages = []
+    pending = [""]
+    while pending:
+        relative_dir = pending.pop()
+        directory = root / relative_dir
+
+        listing = None
+        if index is not None:
+            mtime_ns = directory.stat().st_mtime_ns
+            listing = index.listing(relative_dir, mtime_ns)
+        if listing is None:
+            listing = _scan_directory(directory, relative_dir, patterns)
+        files, dirs = listing
+
+        if index is not None and mtime_ns < racy_after:
+            visited[relative_dir] = {"mtime_ns": mtime_ns, "files": files, "dirs": dirs}
+
+        for name in files:
+            pages.append((root / relative_dir / name, dest_root / relative_dir / "index.html"))
+        pending.extend(f"{relative_dir}/{name}" if relative_dir else name for name in dirs)
+
+    if index is not None:
+        index.entries = visited
+
+    pages.sort(key=lambda page: page[0].relative_to(root).parts)
+    return pages
@@ -0,0 +1,182 @@
+import mimetypes
+import threading
+import time
+from html import escape
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from logging import getLogger
+from pathlib import Path
+from urllib.parse import unquote, urlsplit
+
+from block_markdown import markdown_to_html_node
+from generate_website import parse_page
+from template_engine import load_template
+from watch import changed_paths, snapshot
+
+LIVERELOAD_PATH = "/__livereload"
+LIVERELOAD_SCRIPT = (
+    f'<script>new EventSource("{LIVERELOAD_PATH}").onmessage = () => location.reload();</script>'
+)
+
+
+class DevServer:
+    """Serve pages rendered on request from content/ and files from static/.
+
+    Rendered pages are kept in memory until their source or the template
+    changes. A background thread polls for changes and tells connected
+    browsers to reload through a server-sent event stream.
+    """
+
+    def __init__(self, content_dir, static_dir, template_path, interval=0.5):
+        self.content_dir = Path(content_dir)
+        self.static_dir = Path(static_dir)
+        self.template_path = Path(template_path)
+        self.interval = interval
+
+        self._pages: dict = {}
+        self._lock = threading.Lock()
+        self._reload = threading.Condition()
+        self.generation = 0
+
+    def source_for(self, url_path):
+        """Return the markdown file that renders url_path, or None."""
+        relative = url_path.strip("/").removesuffix("index.html").strip("/")
+        source = self.content_dir / relative / "index.md"
+        if ".." in Path(relative).parts or not source.is_file():
+            return None
+        return source
+
+    def static_file_for(self, url_path):
+        root = self.static_dir.resolve()
+        candidate = (root / url_path.lstrip("/")).resolve()
+        if root not in candidate.parents or not candidate.is_file():
+            return None
+        return candidate
+
+    def render(self, source):
+        with self._lock:
+            html = self._pages.get(source)
+        if html is not None:
+            return html
+
+        title, _, body = parse_page(source.read_text(encoding="utf-8"))
+        html = load_template(self.template_path).render(
+            {"Title": title, "Content": markdown_to_html_node(body).to_html()},
+        )
+        if "</body>" in html:
+            html = html.replace("</body>", f"{LIVERELOAD_SCRIPT}</body>", 1)
+        else:
+            html += LIVERELOAD_SCRIPT
+
+        with self._lock:
+            self._pages[source] = html
+        return html
+
+    def invalidate(self, changes):
+        with self._lock:
+            if changes["template"]:
+                self._pages.clear()
+            else:
+                for path in changes["content"]:
+                    self._pages.pop(path, None)
+
+        with self._reload:
+            self.generation += 1
+            self._reload.notify_all()
+
+    def wait_for_reload(self, seen_generation, timeout):
+        """Block until a change newer than seen_generation, returning the latest generation."""
+        with self._reload:
+            self._reload.wait_for(lambda: self.generation > seen_generation, timeout)
+            return self.generation
+
+    def _watch(self):
+        logger = getLogger(__name__)
+        roots = {
+            "content": self.content_dir,
+            "static": self.static_dir,
+            "template": self.template_path,
+        }
+        snapshots = {name: snapshot(root) for name, root in roots.items()}
+        while True:
+            time.sleep(self.interval)
+            current = {name: snapshot(root) for name, root in roots.items()}
+            changes = {name: changed_paths(snapshots[name], current[name]) for name in roots}
+            snapshots = current
+            if any(changes.values()):
+                logger.info("Change detected, reloading browsers")
+                self.invalidate(changes)
+
+    def serve(self, host="127.0.0.1", port=8888):
+        logger = getLogger(__name__)
+        threading.Thread(target=self._watch, daemon=True).start()
+
+        httpd = ThreadingHTTPServer((host, port), DevRequestHandler)
+        httpd.daemon_threads = True
+        httpd.dev_server = self
+        logger.info("Serving %s on http://%s:%d/", self.content_dir, host, port)
+        try:
+            httpd.serve_forever()
+        except KeyboardInterrupt:
+            logger.info("Stopped serving")
+        finally:
+            httpd.server_close()
+
+
+class DevRequestHandler(BaseHTTPRequestHandler):
+    def log_message(self, format, *args):
+        getLogger(__name__).info("%s %s", self.address_string(), format % args)
+
+    def _send(self, status, body, content_type):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("Cache-Control", "no-store")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        dev_server = self.server.dev_server
+        url_path = unquote(urlsplit(self.path).path)
+
+        if url_path == LIVERELOAD_PATH:
+            self._stream_reloads(dev_server)
+            return
+
+        source = dev_server.source_for(url_path)
+        if source is not None:
+            try:
+                html = dev_server.render(source)
+            except Exception as e:
+                getLogger(__name__).exception("Failed to render %s", source)
+                body = f"<pre>Failed to render {source}: {escape(str(e))}</pre>{LIVERELOAD_SCRIPT}"
+                self._send(HTTPStatus.INTERNAL_SERVER_ERROR, body.encode(), "text/html")
+                return
+            self._send(HTTPStatus.OK, html.encode("utf-8"), "text/html; charset=utf-8")
+            return
+
+        static_file = dev_server.static_file_for(url_path)
+        if static_file is not None:
+            content_type = mimetypes.guess_type(static_file.name)[0] or "application/octet-stream"
+            self._send(HTTPStatus.OK, static_file.read_bytes(), content_type)
+            return
+
+        self._send(HTTPStatus.NOT_FOUND, b"Not found", "text/plain")
+
+    def _stream_reloads(self, dev_server):
+        self.send_response(HTTPStatus.OK)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-store")
+        self.end_headers()
+
+        seen = dev_server.generation
+        try:
+            while True:
+                latest = dev_server.wait_for_reload(seen, timeout=15)
+                # A comment line doubles as a keep-alive when nothing changed.
+                message = b"data: reload\n\n" if latest > seen else b": ping\n\n"
+                seen = latest
+                self.wfile.write(message)
+                self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            return
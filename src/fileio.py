@@ -0,0 +1,220 @@
+import mmap
+import os
+import shutil
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+# Sources at least this large are decoded straight from a memory map
+# instead of being read into an intermediate bytes object first.
+MMAP_THRESHOLD = 1024 * 1024
+
+WRITE_BUFFER_SIZE = 256 * 1024
+COMPARE_BLOCK_SIZE = 64 * 1024
+
+COPY_MODES = ("copy", "hardlink", "reflink")
+
+# Linux FICLONE ioctl, _IOW(0x94, 9, int) in linux/fs.h.
+FICLONE = 0x40049409
+
+
+def read_text(path, mmap_threshold=MMAP_THRESHOLD):
+    """Read a UTF-8 file, memory-mapping it when it is at least mmap_threshold bytes."""
+    with open(path, "rb") as fp:
+        size = os.fstat(fp.fileno()).st_size
+        if size == 0 or size < mmap_threshold:
+            return fp.read().decode("utf-8")
+
+        with mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            return str(mapped, "utf-8")
+
+
+class AtomicFile:
+    """A text file written piece by piece to a temporary file next to path.
+
+    commit renames it into place, so readers see either the old file or
+    the complete new one, never a partial write; discard removes it.
+    """
+
+    def __init__(self, path, encoding="utf-8"):
+        self.path = Path(path)
+        self.tmp_path = self.path.with_name(f".{self.path.name}.{os.getpid()}.tmp")
+        # Opening with mode 0o666 lets the umask decide the final permissions,
+        # as it would for a plain open().
+        fd = os.open(self.tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o666)
+        self._fp = open(fd, "w", encoding=encoding, buffering=WRITE_BUFFER_SIZE)
+
+    def write(self, text):
+        self._fp.write(text)
+
+    def writelines(self, chunks):
+        self._fp.writelines(chunks)
+
+    def commit(self, skip_unchanged=False):
+        """Move the file into place and return whether path was replaced.
+
+        With skip_unchanged, an existing file with identical contents is
+        kept, with its mtime, and the new one is discarded.
+        """
+        try:
+            self._fp.close()
+            if skip_unchanged and self._matches_existing():
+                self.tmp_path.unlink()
+                return False
+            self.tmp_path.replace(self.path)
+        except BaseException:
+            self.discard()
+            raise
+        return True
+
+    def _matches_existing(self):
+        return files_match(self.tmp_path, self.path)
+
+    def discard(self):
+        self._fp.close()
+        self.tmp_path.unlink(missing_ok=True)
+
+
+def files_match(path, other):
+    """Return whether both files exist and have identical contents."""
+    # Compare sizes first, then contents block by block, so neither file
+    # is read whole. filecmp.cmp would do the same but caches every
+    # result, keyed by size and mtime, for the life of the process.
+    try:
+        if os.stat(path).st_size != os.stat(other).st_size:
+            return False
+        with open(path, "rb") as fp, open(other, "rb") as other_fp:
+            while block := fp.read(COMPARE_BLOCK_SIZE):
+                if block != other_fp.read(COMPARE_BLOCK_SIZE):
+                    return False
+    except FileNotFoundError:
+        return False
+    return True
+
+
+def atomic_write(path, chunks, encoding="utf-8", skip_unchanged=False):
+    """Write text chunks to a temporary file next to path, then rename it into place.
+
+    Readers see either the old file or the complete new one, never a
+    partial write. The temporary file is removed if writing fails.
+    Returns whether path was replaced; see AtomicFile.commit.
+    """
+    output = AtomicFile(path, encoding)
+    try:
+        output.writelines(chunks)
+    except BaseException:
+        output.discard()
+        raise
+    return output.commit(skip_unchanged)
+
+
+def write_if_changed(path, chunks, encoding="utf-8"):
+    """Atomically write text chunks unless path already holds exactly that text.
+
+    The chunks are streamed to disk and compared there, never joined in
+    memory. An unchanged file keeps its mtime, so sync and upload tools
+    skip it. Returns whether the file was written.
+    """
+    return atomic_write(path, chunks, encoding, skip_unchanged=True)
+
+
+def make_parent_dirs(paths):
+    """Create the parent directory of every path, each distinct directory once.
+
+    Only the deepest directories are passed to mkdir, since creating them
+    creates their ancestors too. Returns the number of mkdir calls made.
+    """
+    parents = {Path(path).parent for path in paths}
+    ancestors = {ancestor for parent in parents for ancestor in parent.parents}
+    leaves = sorted(parents - ancestors)
+    for directory in leaves:
+        directory.mkdir(parents=True, exist_ok=True)
+    return len(leaves)
+
+
+def _link(src, dest):
+    dest = Path(dest)
+    if dest.exists() and os.path.samefile(src, dest):
+        return
+    tmp_path = dest.with_name(f".{dest.name}.{os.getpid()}.tmp")
+    tmp_path.unlink(missing_ok=True)
+    os.link(src, tmp_path)
+    tmp_path.replace(dest)
+
+
+def _clone(src_fd, dest_fd):
+    if fcntl is not None:
+        try:
+            fcntl.ioctl(dest_fd, FICLONE, src_fd)
+            return
+        except OSError:
+            pass
+
+    if not hasattr(os, "copy_file_range"):
+        raise OSError("copy_file_range is not available")
+
+    # copy_file_range shares extents on filesystems that support it and
+    # otherwise still copies inside the kernel.
+    remaining = os.fstat(src_fd).st_size
+    while remaining > 0:
+        copied = os.copy_file_range(src_fd, dest_fd, remaining)
+        if copied == 0:
+            break
+        remaining -= copied
+
+
+def _reflink(src, dest):
+    # Clone into a temporary file, so a failed clone never leaves dest
+    # truncated for the plain copy fallback, or for readers, to find.
+    dest = Path(dest)
+    tmp_path = dest.with_name(f".{dest.name}.{os.getpid()}.tmp")
+    try:
+        with open(src, "rb") as src_fp, open(tmp_path, "wb") as dest_fp:
+            _clone(src_fp.fileno(), dest_fp.fileno())
+        shutil.copystat(src, tmp_path)
+        tmp_path.replace(dest)
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
+
+
+def copy_file(src, dest, mode="copy"):
+    """Publish src at dest by copying, hardlinking or reflinking it.
+
+    hardlink and reflink fall back to a plain copy when the filesystem
+    cannot do them, e.g. across devices. Hardlinked files share their
+    contents with static/, so they must not be edited in place.
+    """
+    if mode == "hardlink":
+        try:
+            _link(src, dest)
+            return
+        except OSError:
+            pass
+    elif mode == "reflink":
+        try:
+            _reflink(src, dest)
+            return
+        except OSError:
+            pass
+    elif mode != "copy":
+        raise ValueError(f"Unknown copy mode {mode!r}, expected one of {COPY_MODES}")
+
+    shutil.copy2(src, dest)
+
+
+def copy_files(pairs, mode="copy", workers=1):
+    """Copy (src, dest) pairs, on a thread pool when workers is above 1."""
+    pairs = list(pairs)
+    if workers > 1 and len(pairs) > 1:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            # list() re-raises the first failure, if any.
+            list(pool.map(lambda pair: copy_file(*pair, mode), pairs))
+    else:
+        for src, dest in pairs:
+            copy_file(src, dest, mode)
+    return len(pairs)
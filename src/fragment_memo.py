@@ -0,0 +1,56 @@
+from collections import OrderedDict
+
+
+class FragmentMemo:
+    """Bounded in-memory LRU of block markdown -> serialized HTML segments and text.
+
+    Blocks that repeat across pages, such as notices or footers, are parsed
+    and serialized once per process. Hit and miss counts are kept so they
+    can be reported, and drained from worker processes into the parent.
+    """
+
+    def __init__(self, max_entries=2048):
+        self.max_entries = max_entries
+        self._fragments: OrderedDict = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._fragments)
+
+    def __getstate__(self):
+        # Workers start with an empty memo of the same size.
+        return {"max_entries": self.max_entries}
+
+    def __setstate__(self, state):
+        self.__init__(state["max_entries"])
+
+    def get(self, key):
+        fragment = self._fragments.get(key)
+        if fragment is None:
+            self.misses += 1
+            return None
+
+        self._fragments.move_to_end(key)
+        self.hits += 1
+        return fragment
+
+    def put(self, key, fragment):
+        self._fragments[key] = fragment
+        self._fragments.move_to_end(key)
+        if len(self._fragments) > self.max_entries:
+            self._fragments.popitem(last=False)
+
+    def drain_counts(self):
+        """Return (hits, misses) since the last drain and reset them."""
+        counts = self.hits, self.misses
+        self.hits = self.misses = 0
+        return counts
+
+    def add_counts(self, hits, misses):
+        self.hits += hits
+        self.misses += misses
+
+    def hit_rate(self):
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
@@ -1,146 +1,912 @@
+import asyncio
 import shutil
-from logging import INFO, basicConfig, getLogger
+import traceback
+from concurrent.futures import ProcessPoolExecutor
+from logging import CRITICAL, INFO, basicConfig, getLogger
 from pathlib import Path
 
+from asset_manifest import ASSET_MANIFEST_NAME, AssetManifest
 from block_markdown import markdown_to_html_node
+from build_manifest import BuildManifest, hash_bytes, page_key
+from build_profiler import active_profiler, enable_profiling, profile_stage
+from content_discovery import DirectoryIndex, discover_pages
+from fileio import (
+    atomic_write,
+    copy_files,
+    files_match,
+    make_parent_dirs,
+    read_text,
+    write_if_changed,
+)
+from htmlnode import FragmentNode, join_chunks, resolve_urls
+from site_outputs import OUTPUT_NAMES, PageText, make_page_record
+from template_engine import load_template
+from url_resolver import UrlResolver
 
 
-def copy_static_to_public():
+def copy_static_to_public(sync=False, checksum=False, mode="copy", workers=1, fingerprint=False):
+    """Publish static/ into docs/.
+
+    With fingerprint set, assets are published under content-hashed names
+    and the AssetManifest describing them is returned; otherwise None.
+    """
     dest_path = Path("docs")
     src_path = Path("static")
     if not src_path.exists():
         err_msg = f"The directory {src_path} does not exist."
         raise FileNotFoundError(err_msg)
 
-    if dest_path.exists():
-        shutil.rmtree(dest_path)
-    dest_path.mkdir(exist_ok=False)
+    if not sync:
+        if dest_path.exists():
+            shutil.rmtree(dest_path)
+        dest_path.mkdir(exist_ok=False)
+
+    assets = None
+    if fingerprint:
+        assets, (copied, removed, unchanged) = sync_fingerprinted_static(
+            src_path,
+            dest_path,
+            checksum=checksum,
+            mode=mode,
+            workers=workers,
+        )
+    else:
+        copied, removed, unchanged = sync_static_directory(
+            src_path,
+            dest_path,
+            checksum=checksum,
+            mode=mode,
+            workers=workers,
+        )
+
+    if sync:
+        print(
+            f"* {src_path} -> {dest_path} "
+            f"({copied} copied, {removed} removed, {unchanged} unchanged)",
+        )
+    else:
+        print(f"* {src_path} -> {dest_path}")
+    return assets
+
+
+def _is_up_to_date(src_file, dest_file, checksum):
+    try:
+        dest_stat = dest_file.stat()
+    except FileNotFoundError:
+        return False
+
+    src_stat = src_file.stat()
+    if src_stat.st_size != dest_stat.st_size:
+        return False
+
+    if checksum:
+        return files_match(src_file, dest_file)
+
+    # Whole seconds, like rsync, so filesystems with coarse timestamps still match.
+    return int(src_stat.st_mtime) == int(dest_stat.st_mtime)
 
-    for item in src_path.iterdir():
-        helper_copy_directory(item, dest_path / item.name)
 
-    print(f"* {src_path} -> {dest_path}")
+def sync_static_directory(
+    src_path,
+    dest_path,
+    checksum=False,
+    mode="copy",
+    workers=1,
+    assets=None,
+):
+    """Mirror src_path into dest_path without clearing it first.
 
+    Files are copied only when their size or mtime (or contents when
+    checksum is set) differ, using ``mode`` ("copy", "hardlink" or
+    "reflink") on up to ``workers`` threads. With an AssetManifest, files
+    are published under their fingerprinted names, and stylesheets with
+    their rewritten contents. Files in dest_path that
+    no longer exist in src_path are removed, except generated .html pages,
+    the sitemap, feed and search index, and the asset manifest. Returns
+    the number of files copied, removed and left unchanged.
+    """
+    src_path = Path(src_path)
+    dest_path = Path(dest_path)
+    dest_path.mkdir(parents=True, exist_ok=True)
 
-def helper_copy_directory(src_item, dest_item):
-    if src_item.is_file():
-        shutil.copy2(src_item, dest_item)
+    removed = unchanged = 0
+    to_copy = []
+    expected = set()
+    if assets is not None:
+        expected.add(Path(ASSET_MANIFEST_NAME))
 
-    elif src_item.is_dir():
-        dest_item.mkdir(exist_ok=True)
-        for child in src_item.iterdir():
-            helper_copy_directory(child, dest_item / child.name)
+    rewritten = 0
+    for src_item in sorted(src_path.rglob("*")):
+        relative = src_item.relative_to(src_path)
+        contents = None
+        if assets is not None and src_item.is_file():
+            contents = assets.contents.get(relative.as_posix())
+            relative = Path(assets.resolve(relative.as_posix()))
+        expected.add(relative)
+        dest_item = dest_path / relative
+
+        if src_item.is_dir():
+            if dest_item.is_file():
+                dest_item.unlink()
+            dest_item.mkdir(exist_ok=True)
+            continue
+
+        if dest_item.is_dir():
+            shutil.rmtree(dest_item)
+
+        if contents is not None:
+            # Unlike a copy, the text has no source mtime to compare, so
+            # compare the contents; an unchanged file keeps its mtime.
+            if write_if_changed(dest_item, [contents]):
+                rewritten += 1
+            else:
+                unchanged += 1
+            continue
+
+        if _is_up_to_date(src_item, dest_item, checksum):
+            unchanged += 1
+            continue
+
+        to_copy.append((src_item, dest_item))
+
+    copied = copy_files(to_copy, mode, workers) + rewritten
+
+    # Reverse order visits a directory's contents before the directory itself.
+    for dest_item in sorted(dest_path.rglob("*"), reverse=True):
+        relative = dest_item.relative_to(dest_path)
+        if relative in expected or relative.parts[0] in OUTPUT_NAMES:
+            continue
+
+        if dest_item.is_dir():
+            if not any(dest_item.iterdir()):
+                dest_item.rmdir()
+        elif dest_item.suffix != ".html":
+            dest_item.unlink()
+            removed += 1
+
+    return copied, removed, unchanged
+
+
+def sync_fingerprinted_static(src_path, dest_path, checksum=False, mode="copy", workers=1):
+    """Sync src_path into dest_path under content-hashed names.
+
+    Digests are reused from the asset manifest of the previous build where
+    a file is unchanged. Returns the new AssetManifest, which is also saved
+    into dest_path, and the sync counts.
+    """
+    manifest_path = Path(dest_path) / ASSET_MANIFEST_NAME
+    assets = AssetManifest.build(src_path, AssetManifest.load(manifest_path))
+    counts = sync_static_directory(src_path, dest_path, checksum, mode, workers, assets)
+    assets.save(manifest_path)
+    return assets, counts
 
 
 class TitleNotFoundError(Exception):
     """Raised when a title cannot be extracted from markdown."""
 
 
+def split_front_matter(markdown):
+    """Split a leading ``---`` block of ``key: value`` lines off markdown.
+
+    Returns the metadata, with lower-cased keys, and the remaining body.
+    Markdown without a complete front matter block is returned unchanged
+    with empty metadata.
+    """
+    first_line_end = markdown.find("\n")
+    if first_line_end == -1 or markdown[:first_line_end].rstrip() != "---":
+        return {}, markdown
+
+    metadata = {}
+    position = first_line_end + 1
+    while position:
+        line_end = markdown.find("\n", position)
+        line = markdown[position:] if line_end == -1 else markdown[position:line_end]
+        if line.rstrip() == "---":
+            return metadata, "" if line_end == -1 else markdown[line_end + 1 :]
+
+        key, separator, value = line.partition(":")
+        if separator and key.strip():
+            metadata[key.strip().lower()] = value.strip().strip("\"'")
+        position = line_end + 1
+
+    return {}, markdown
+
+
 def extract_title(markdown):
-    file = Path(markdown)
-    markdown_content = file.read_text()
+    """Return the text of the H1 heading that must open the markdown."""
+    line_end = markdown.find("\n")
+    first_line = markdown if line_end == -1 else markdown[:line_end]
 
-    if markdown_content.startswith("# "):
-        return markdown_content.removeprefix("# ")
+    if first_line.startswith("# "):
+        return first_line.removeprefix("# ").rstrip("\r")
 
     err_msg = "No title found in the provided markdown."
     raise TitleNotFoundError(err_msg)
 
 
-def generate_page(from_path, template_path, dest_path, basepath):
+def parse_page(markdown):
+    """Split a page's markdown into its title, front matter metadata and body.
+
+    A ``title`` in the front matter takes precedence over the H1 heading.
+    """
+    metadata, body = split_front_matter(markdown)
+    title = metadata.get("title")
+    if title is None:
+        title = extract_title(body)
+    return title, metadata, body
+
+
+def render_body(
+    body,
+    from_path,
+    cache=None,
+    memo=None,
+    resolver=None,
+    urls=None,
+    page_text=None,
+):
+    """Return the body's HTML as a lazy iterable of chunks, for streaming
+    into the output file.
+
+    The parsed body, from the render cache when one is given, does not
+    depend on the resolver; link and image URLs are passed through it as
+    the chunks are produced, and the root-relative ones added to the set
+    urls, if given. page_text, a PageText, is filled in from the same
+    parse, or from the cache entry, before this returns.
+    """
+    logger = getLogger(__name__)
+    if cache is None:
+        logger.info("Converting markdown to HTML nodes")
+        node = markdown_to_html_node(body, memo, page_text)
+    else:
+        cache_key = cache.key(body)
+        entry = cache.get(cache_key)
+        # Entries cached by builds without page records have no text.
+        if entry is None or (page_text is not None and "terms" not in entry):
+            logger.info("Converting markdown to HTML, render cache miss")
+            node = markdown_to_html_node(body, memo, page_text)
+            entry = {"segments": join_chunks(node.iter_chunks())}
+            if page_text is not None:
+                entry["summary"] = page_text.summary
+                entry["terms"] = page_text.terms
+            cache.put(cache_key, entry)
+        else:
+            logger.info("Using cached HTML for %s", from_path)
+            if page_text is not None:
+                page_text.summary = entry["summary"]
+                page_text.terms.update(entry["terms"])
+        node = FragmentNode(entry["segments"])
+
+    if resolver is None:
+        return node.iter_chunks()
+    return resolve_urls(node.iter_chunks(), resolver, urls)
+
+
+def generate_page(
+    from_path,
+    template_path,
+    dest_path,
+    basepath,
+    cache=None,
+    create_dirs=True,
+    assets=None,
+    memo=None,
+    skip_unchanged=False,
+    resolver=None,
+    records=None,
+    urls=None,
+    source_hashes=None,
+):
+    """Render one markdown file into dest_path and return whether it was written.
+
+    Root-relative URLs go through resolver, by default a UrlResolver for
+    basepath and assets, and are added to the set urls, if given, whether
+    in the page or the template. With skip_unchanged, an existing output
+    identical to the new HTML is left untouched and False is returned. The
+    page's PageRecord is appended to records, and the digest of the
+    markdown read stored in source_hashes[dest_path], if given.
+    """
     logger = getLogger(__name__)
+    page = str(from_path)
+    if resolver is None:
+        resolver = UrlResolver(basepath, assets)
+    resolver = resolver.for_page(dest_path)
     try:
         logger.info("Reading markdown from %s", from_path)
-        markdown = from_path.read_text()
+        with profile_stage("read", page):
+            markdown = read_text(from_path)
     except Exception:
         logger.exception("Failed to read markdown file %s", from_path)
         raise
 
+    source_hash = hash_bytes(markdown.encode("utf-8"))
+    if source_hashes is not None:
+        source_hashes[dest_path] = source_hash
+
     try:
-        logger.info("Reading HTML template from %s", template_path)
-        html_template = Path(template_path).read_text()
+        logger.info("Extracting title from %s", from_path)
+        with profile_stage("title", page):
+            extracted_title, metadata, body = parse_page(markdown)
     except Exception:
-        logger.exception("Failed to read template file %s", template_path)
+        logger.exception("Failed to extract title from %s", from_path)
         raise
 
     try:
-        logger.info("Converting markdown to HTML nodes")
-        markdown_as_html_nodes = markdown_to_html_node(markdown)
-        html_content = markdown_as_html_nodes.to_html()
+        logger.info("Loading HTML template from %s", template_path)
+        with profile_stage("template", page):
+            html_template = load_template(template_path)
     except Exception:
-        logger.exception("Failed to convert markdown to HTML")
+        logger.exception("Failed to load template file %s", template_path)
         raise
 
+    if urls is not None:
+        urls.update(html_template.urls)
+    page_text = None if records is None else PageText()
+
     try:
-        logger.info("Extracting title from %s", from_path)
-        extracted_title = extract_title(from_path)
+        with profile_stage("parse", page):
+            html_content = render_body(body, from_path, cache, memo, resolver, urls, page_text)
+
+        if active_profiler() is not None:
+            # Serialization is normally streamed into the write; materialize
+            # it here so the profile can report it separately.
+            with profile_stage("to_html", page):
+                html_content = "".join(html_content)
     except Exception:
-        logger.exception("Failed to extract title from %s", from_path)
+        logger.exception("Failed to convert markdown to HTML")
         raise
 
+    if create_dirs:
+        try:
+            logger.info("Ensuring output directory exists for %s", dest_path)
+            with profile_stage("mkdir", page):
+                Path(dest_path).parent.mkdir(parents=True, exist_ok=True)
+        except Exception:
+            logger.exception("Failed to create output directory for %s", dest_path)
+            raise
+
     try:
-        logger.info("Filling template for %s", dest_path)
-        html = (
-            html_template.replace("{{ Title }}", extracted_title, 1)
-            .replace(
-                "{{ Content }}",
-                html_content,
-                1,
+        logger.info("Writing HTML to %s", dest_path)
+        with profile_stage("write", page):
+            chunks = html_template.iter_render(
+                {"Title": extracted_title, "Content": html_content},
+                resolver,
             )
-            .replace('href="/', f'href="{basepath}')
-            .replace('src="/', f'src="{basepath}')
-        )
+            changed = atomic_write(dest_path, chunks, skip_unchanged=skip_unchanged)
+        if changed:
+            logger.info(
+                "Successfully generated page from %s to %s using %s",
+                from_path,
+                dest_path,
+                template_path,
+            )
+        else:
+            logger.info("Left %s untouched, its HTML is unchanged", dest_path)
     except Exception:
-        logger.exception("Failed to fill template for %s", dest_path)
+        logger.exception("Failed to write HTML to %s", dest_path)
         raise
 
-    try:
-        logger.info("Ensuring output directory exists for %s", dest_path)
-        Path(dest_path).parent.mkdir(parents=True, exist_ok=True)
-    except Exception:
-        logger.exception("Failed to create output directory for %s", dest_path)
-        raise
+    if records is not None:
+        with profile_stage("record", page):
+            records.append(
+                make_page_record(
+                    from_path,
+                    dest_path,
+                    source_hash,
+                    extracted_title,
+                    metadata,
+                    page_text,
+                ),
+            )
+
+    return changed
+
+
+class PageBuildError(Exception):
+    """Raised when one or more pages fail to build."""
+
+    def __init__(self, failures):
+        self.failures = failures
+        pages = ", ".join(str(from_path) for from_path, _ in failures)
+        super().__init__(f"{len(failures)} page(s) failed to build: {pages}")
+
 
+# Each worker process keeps its own fragment memo across the pages it renders.
+_worker_memo = None
+
+
+def _init_worker(profile, memo):
+    global _worker_memo
+    # Workers report back to the parent, which logs in page order.
+    getLogger(__name__).setLevel(CRITICAL)
+    if profile:
+        enable_profiling()
+    _worker_memo = memo
+
+
+def _generate_page_job(job):
+    (
+        from_path,
+        template_path,
+        dest_path,
+        basepath,
+        cache,
+        create_dirs,
+        resolver,
+        skip_unchanged,
+        collect_records,
+        collect_urls,
+        collect_hash,
+    ) = job
+    error = None
+    changed = False
+    records = [] if collect_records else None
+    urls = set() if collect_urls else None
+    source_hashes = {} if collect_hash else None
     try:
-        logger.info("Writing HTML to %s", dest_path)
-        Path(dest_path).write_text(html, encoding="utf-8")
-        logger.info(
-            "Successfully generated page from %s to %s using %s",
+        changed = generate_page(
             from_path,
-            dest_path,
             template_path,
+            dest_path,
+            basepath,
+            cache,
+            create_dirs,
+            memo=_worker_memo,
+            skip_unchanged=skip_unchanged,
+            resolver=resolver,
+            records=records,
+            urls=urls,
+            source_hashes=source_hashes,
         )
     except Exception:
-        logger.exception("Failed to write HTML to %s", dest_path)
-        raise
+        error = traceback.format_exc()
+
+    record = records[0] if records else None
+    source_hash = source_hashes.get(dest_path) if source_hashes else None
+    profiler = active_profiler()
+    profile = None if profiler is None else profiler.drain()
+    memo_counts = None if _worker_memo is None else _worker_memo.drain_counts()
+    return error, changed, record, urls, source_hash, profile, memo_counts
+
+
+def generate_pages_parallel(
+    pages,
+    template_path,
+    basepath,
+    jobs,
+    cache=None,
+    create_dirs=True,
+    resolver=None,
+    memo=None,
+    skip_unchanged=False,
+    records=None,
+    page_urls=None,
+    source_hashes=None,
+):
+    """Render (from_path, dest_path) pairs on a process pool.
+
+    Results are logged in the order of ``pages`` regardless of completion
+    order. Once every page has been attempted, returns the generated pages,
+    the dest paths among them that were left untouched because their HTML
+    was unchanged, and a list of (from_path, traceback) failures. Each
+    worker starts an empty copy of ``memo``, whose hit and miss counts are
+    added to it. Page records are appended to records, the set of
+    root-relative URLs each page refers to stored in page_urls[dest_path]
+    and the digest of its source in source_hashes[dest_path], if given.
+    """
+    logger = getLogger(__name__)
+    work = [
+        (
+            from_path,
+            template_path,
+            dest_path,
+            basepath,
+            cache,
+            create_dirs,
+            resolver,
+            skip_unchanged,
+            records is not None,
+            page_urls is not None,
+            source_hashes is not None,
+        )
+        for from_path, dest_path in pages
+    ]
+    chunksize = max(1, len(work) // (jobs * 4))
+
+    profiler = active_profiler()
+    generated = []
+    unchanged = []
+    failures = []
+    with ProcessPoolExecutor(
+        max_workers=jobs,
+        initializer=_init_worker,
+        initargs=(profiler is not None, memo),
+    ) as pool:
+        results = pool.map(_generate_page_job, work, chunksize=chunksize)
+        for (from_path, dest_path), result in zip(pages, results, strict=True):
+            error, changed, record, urls, source_hash, profile, memo_counts = result
+            if profile is not None:
+                profiler.merge(profile)
+            if memo_counts is not None:
+                memo.add_counts(*memo_counts)
+
+            if error is None:
+                logger.info("Generated %s from %s", dest_path, from_path)
+                generated.append((from_path, dest_path))
+                if not changed:
+                    unchanged.append(dest_path)
+                if record is not None:
+                    records.append(record)
+                if urls is not None:
+                    page_urls[dest_path] = urls
+                if source_hash is not None:
+                    source_hashes[dest_path] = source_hash
+            else:
+                logger.error("Failed to generate %s:\n%s", from_path, error)
+                failures.append((from_path, error))
+
+    return generated, unchanged, failures
+
+
+async def _run_page_pipeline(
+    pages,
+    template_path,
+    resolver,
+    io_workers,
+    queue_size,
+    cache,
+    memo,
+    skip_unchanged,
+    records,
+    page_urls,
+    source_hashes,
+):
+    html_template = load_template(template_path)
+    to_read = asyncio.Queue()
+    for page in pages:
+        to_read.put_nowait(page)
+    to_render = asyncio.Queue(queue_size)
+    to_write = asyncio.Queue(queue_size)
+    # dest_path -> True/False for written/unchanged, or a traceback string.
+    results = {}
 
+    async def read():
+        while not to_read.empty():
+            from_path, dest_path = to_read.get_nowait()
+            try:
+                with profile_stage("read", str(from_path)):
+                    markdown = await asyncio.to_thread(read_text, from_path)
+            except Exception:
+                results[dest_path] = traceback.format_exc()
+                continue
+            await to_render.put((from_path, dest_path, markdown))
 
-def generate_pages_recursive(dir_path_content, template_path, dest_dir_path, basepath):
+    async def render():
+        while (item := await to_render.get()) is not None:
+            from_path, dest_path, markdown = item
+            try:
+                with profile_stage("render", str(from_path)):
+                    source_hash = hash_bytes(markdown.encode("utf-8"))
+                    if source_hashes is not None:
+                        source_hashes[dest_path] = source_hash
+                    title, metadata, body = parse_page(markdown)
+                    page_resolver = resolver.for_page(dest_path)
+                    urls = None if page_urls is None else set(html_template.urls)
+                    page_text = None if records is None else PageText()
+                    content = render_body(
+                        body,
+                        from_path,
+                        cache,
+                        memo,
+                        page_resolver,
+                        urls,
+                        page_text,
+                    )
+                    html = html_template.render(
+                        {"Title": title, "Content": content},
+                        page_resolver,
+                    )
+                if urls is not None:
+                    page_urls[dest_path] = urls
+                record = None
+                if records is not None:
+                    with profile_stage("record", str(from_path)):
+                        record = make_page_record(
+                            from_path,
+                            dest_path,
+                            source_hash,
+                            title,
+                            metadata,
+                            page_text,
+                        )
+            except Exception:
+                results[dest_path] = traceback.format_exc()
+                continue
+            await to_write.put((from_path, dest_path, html, record))
+            # Rendering never awaits, so yield to let reads and writes progress.
+            await asyncio.sleep(0)
+
+    async def write():
+        while (item := await to_write.get()) is not None:
+            from_path, dest_path, html, record = item
+            try:
+                with profile_stage("write", str(from_path)):
+                    changed = await asyncio.to_thread(
+                        atomic_write,
+                        dest_path,
+                        [html],
+                        skip_unchanged=skip_unchanged,
+                    )
+                results[dest_path] = changed
+                if record is not None:
+                    records.append(record)
+            except Exception:
+                results[dest_path] = traceback.format_exc()
+
+    readers = [asyncio.create_task(read()) for _ in range(io_workers)]
+    renderer = asyncio.create_task(render())
+    writers = [asyncio.create_task(write()) for _ in range(io_workers)]
+
+    await asyncio.gather(*readers)
+    await to_render.put(None)
+    await renderer
+    for _ in writers:
+        await to_write.put(None)
+    await asyncio.gather(*writers)
+    return results
+
+
+def generate_pages_async(
+    pages,
+    template_path,
+    basepath,
+    io_workers=8,
+    queue_size=32,
+    cache=None,
+    resolver=None,
+    memo=None,
+    skip_unchanged=False,
+    records=None,
+    page_urls=None,
+    source_hashes=None,
+):
+    """Render (from_path, dest_path) pairs with reads and writes overlapping rendering.
+
+    Up to io_workers reads and io_workers writes run on threads while the
+    event loop renders one page at a time; bounded queues keep at most
+    queue_size pages waiting between stages. Output directories must
+    already exist. Page records are appended to records, if given, in
+    completion order, and page_urls and source_hashes are filled in as by
+    generate_pages_parallel. Returns the same (generated, unchanged,
+    failures) as generate_pages_parallel.
+    """
+    logger = getLogger(__name__)
+    results = asyncio.run(
+        _run_page_pipeline(
+            pages,
+            template_path,
+            resolver or UrlResolver(basepath),
+            io_workers,
+            queue_size,
+            cache,
+            memo,
+            skip_unchanged,
+            records,
+            page_urls,
+            source_hashes,
+        ),
+    )
+
+    generated = []
+    unchanged = []
+    failures = []
+    for from_path, dest_path in pages:
+        result = results[dest_path]
+        if isinstance(result, bool):
+            logger.info("Generated %s from %s", dest_path, from_path)
+            generated.append((from_path, dest_path))
+            if not result:
+                unchanged.append(dest_path)
+        else:
+            logger.error("Failed to generate %s:\n%s", from_path, result)
+            failures.append((from_path, result))
+
+    return generated, unchanged, failures
+
+
+def generate_pages_recursive(
+    dir_path_content,
+    template_path,
+    dest_dir_path,
+    basepath,
+    manifest_path=None,
+    jobs=1,
+    cache=None,
+    assets=None,
+    memo=None,
+    skip_unchanged=False,
+    async_io=False,
+    index_path=None,
+    resolver=None,
+    outputs=None,
+):
+    """Build every page under dir_path_content into dest_dir_path.
+
+    With index_path, the content directory listing is kept there between
+    builds so unchanged directories are not rescanned.
+
+    URLs are resolved by resolver, by default a UrlResolver for basepath
+    and assets. Pages are rendered on ``jobs`` processes, or with async_io
+    through a pipeline that overlaps file reads and writes with rendering.
+
+    With SiteOutputs, the record of each page rendered is gathered as it is
+    built and, together with the stored records of pages that were up to
+    date, streamed into the sitemap, feed and search index.
+
+    Returns the number of pages written and the number rendered but left
+    untouched because their HTML was unchanged (only with skip_unchanged).
+    Pages the build manifest already knows to be up to date count as
+    neither.
+    """
     basicConfig(level=INFO)
     logger = getLogger(__name__)
+    if resolver is None:
+        resolver = UrlResolver(basepath, assets)
 
-    current_item = Path(dir_path_content)
-    if current_item.is_file() and current_item.suffix == ".md":
-        try:
-            logger.info("Generate a page")
-            dest_dir = dest_dir_path.parent
+    with profile_stage("discover"):
+        index = None if index_path is None else DirectoryIndex.load(index_path)
+        pages = discover_pages(dir_path_content, dest_dir_path, index)
+        if index is not None:
+            index.save()
 
-            generate_page(
-                current_item,
-                template_path,
-                dest_dir / "index.html",
-                basepath,
-            )
+    store = None if outputs is None else outputs.load_records()
+    manifest = None
+    pending = []
+    source_hashes = None
+    # With fingerprinted assets, each page is keyed on the published names
+    # of just the assets it refers to, so changing one asset rebuilds only
+    # the pages that use it.
+    page_urls = None
+    if manifest_path is not None:
+        manifest = BuildManifest.load(manifest_path)
+        # Digests of the sources read to render pending pages.
+        source_hashes = {}
+        template_hash = hash_bytes(Path(template_path).read_bytes())
+        if resolver.assets is not None:
+            page_urls = {}
 
-        except OSError as e:
-            err_msg = f"An OS error occurred: {e}"
-            logger.exception(err_msg)
+        def key_for(source_hash, urls):
+            assets_key = resolver.assets_key(urls)
+            return page_key(source_hash, template_hash, basepath, resolver.base_key, assets_key)
 
+        for from_path, dest_path in pages:
+            # None for a source changed since the last build, which is
+            # rendered without being read just to hash it.
+            source_hash = manifest.source_hash(dest_path, from_path)
+            if source_hash is not None:
+                # A page's URLs can only change with its source or the
+                # template, which change its key anyway, so those of its
+                # last build hold.
+                key = key_for(source_hash, manifest.urls(dest_path))
+                # A page is rendered again if its stored record is missing or
+                # was made from another version of its source, as after a
+                # build without site outputs or one that failed.
+                if manifest.is_fresh(dest_path, key) and (
+                    store is None or store.source_hash(dest_path) == source_hash
+                ):
+                    logger.info("Skipping %s, %s is up to date", from_path, dest_path)
+                    continue
+            pending.append((from_path, dest_path))
     else:
-        for child in current_item.iterdir():
-            generate_pages_recursive(
-                child,
+        pending = pages
+
+    generated = []
+    unchanged = []
+    memo_counts = None if memo is None else (memo.hits, memo.misses)
+    try:
+        # Create every output directory up front, once, rather than once
+        # per page in each worker.
+        with profile_stage("mkdir"):
+            make_parent_dirs(dest_path for _, dest_path in pending)
+
+        if async_io and pending:
+            generated, unchanged, failures = generate_pages_async(
+                pending,
                 template_path,
-                Path(dest_dir_path) / child.name,
                 basepath,
+                cache=cache,
+                resolver=resolver,
+                memo=memo,
+                skip_unchanged=skip_unchanged,
+                records=store,
+                page_urls=page_urls,
+                source_hashes=source_hashes,
             )
+            if failures:
+                raise PageBuildError(failures)
+        elif jobs > 1 and len(pending) > 1:
+            generated, unchanged, failures = generate_pages_parallel(
+                pending,
+                template_path,
+                basepath,
+                jobs,
+                cache,
+                create_dirs=False,
+                resolver=resolver,
+                memo=memo,
+                skip_unchanged=skip_unchanged,
+                records=store,
+                page_urls=page_urls,
+                source_hashes=source_hashes,
+            )
+            if failures:
+                raise PageBuildError(failures)
+        else:
+            failures = []
+            for from_path, dest_path in pending:
+                urls = None if page_urls is None else set()
+                try:
+                    logger.info("Generate a page")
+                    changed = generate_page(
+                        from_path,
+                        template_path,
+                        dest_path,
+                        basepath,
+                        cache,
+                        create_dirs=False,
+                        resolver=resolver,
+                        memo=memo,
+                        skip_unchanged=skip_unchanged,
+                        records=store,
+                        urls=urls,
+                        source_hashes=source_hashes,
+                    )
+                except Exception:
+                    # Like the parallel and async paths, keep building the
+                    # other pages and report every failure at the end.
+                    error = traceback.format_exc()
+                    logger.error("Failed to generate %s:\n%s", from_path, error)
+                    failures.append((from_path, error))
+                    continue
+
+                generated.append((from_path, dest_path))
+                if not changed:
+                    unchanged.append(dest_path)
+                if urls is not None:
+                    page_urls[dest_path] = urls
+            if failures:
+                raise PageBuildError(failures)
+
+        if outputs is not None:
+            with profile_stage("outputs"):
+                count = outputs.write(store.iter_records(dest for _, dest in pages))
+            store.save()
+            logger.info("Wrote the sitemap, feed and search index for %d page(s)", count)
+
+    finally:
+        if store is not None:
+            store.close()
+        if memo is not None:
+            logger.info(
+                "Fragment memo: %d hits, %d misses",
+                memo.hits - memo_counts[0],
+                memo.misses - memo_counts[1],
+            )
+        if manifest is not None:
+            for from_path, dest_path in generated:
+                source_hash = source_hashes[dest_path]
+                urls = () if page_urls is None else page_urls[dest_path]
+                key = key_for(source_hash, urls)
+                manifest.record(dest_path, from_path, source_hash, key, urls)
+            for stale in manifest.prune([dest for _, dest in pages], dest_dir_path):
+                logger.info("Removed %s, its source no longer exists", stale)
+            manifest.save()
+
+    written = len(generated) - len(unchanged)
+    logger.info(
+        "%d page(s) written, %d unchanged, %d already up to date",
+        written,
+        len(unchanged),
+        len(pages) - len(pending),
+    )
+    return written, len(unchanged)
@@ -1,14 +1,80 @@
+from types import MappingProxyType
+
+# Shared, read-only defaults so leaves and attribute-less nodes do not each
+# allocate their own empty containers.
+EMPTY_CHILDREN = ()
+EMPTY_PROPS = MappingProxyType({})
+
+
+class LinkUrl(str):
+    """A link or image URL, kept as written in the markdown.
+
+    Serialized HTML yields it as a chunk of its own, so a UrlResolver can
+    point it elsewhere when the page is written; see resolve_urls. Parsed
+    and cached HTML therefore does not depend on the resolver.
+    """
+
+    __slots__ = ()
+
+
+def resolve_urls(chunks, resolver, urls=None):
+    """Pass the LinkUrl chunks of serialized HTML through resolver.
+
+    The root-relative ones are added, as written, to the set urls, if given.
+    """
+    for chunk in chunks:
+        if type(chunk) is LinkUrl:
+            if urls is not None and chunk.startswith("/"):
+                urls.add(str(chunk))
+            yield resolver.resolve(chunk)
+        else:
+            yield chunk
+
+
+def join_chunks(chunks):
+    """Merge serialized HTML into alternating [html, url, html, ..., html] segments.
+
+    Adjacent chunks are joined, except around LinkUrl chunks, so the
+    result can be stored and later resolved for any page; see FragmentNode.
+    """
+    segments = []
+    pending = []
+    for chunk in chunks:
+        if type(chunk) is LinkUrl:
+            segments.append("".join(pending))
+            segments.append(chunk)
+            pending = []
+        else:
+            pending.append(chunk)
+    segments.append("".join(pending))
+    return segments
+
+
 class HTMLNode:
+    __slots__ = ("children", "props", "tag", "value")
+
     def __init__(self, tag=None, value=None, children=None, props=None):
         self.tag: str | None = tag
         self.value: str | None = value
-        self.children: list = children or []
-        self.props: dict = props or {}
+        self.children: list = children if children is not None else []
+        self.props: dict = props or EMPTY_PROPS
+
+    def to_html(self, resolver=None):
+        return "".join(self.iter_html(resolver))
+
+    def iter_html(self, resolver=None):
+        """Yield the HTML in chunks, with link and image URLs passed through resolver."""
+        chunks = self.iter_chunks()
+        return chunks if resolver is None else resolve_urls(chunks, resolver)
 
-    def to_html(self):
-        msg = "to_html method not implemented"
+    def iter_chunks(self):
+        """Yield the HTML in chunks, with each LinkUrl as a chunk of its own."""
+        msg = "iter_chunks method not implemented"
         raise NotImplementedError(msg)
 
+    def write_html(self, fp, resolver=None):
+        fp.writelines(self.iter_html(resolver))
+
     def props_to_html(self):
         if not self.props:
             return ""
@@ -19,45 +85,126 @@ class HTMLNode:
 
         return "".join(props_strings)
 
+    def _iter_tag(self, end):
+        # The start tag followed by end, split only around LinkUrl values.
+        chunk = f"<{self.tag}"
+        for key, value in self.props.items():
+            if type(value) is LinkUrl:
+                yield f'{chunk} {key}="'
+                yield value
+                chunk = '"'
+            else:
+                chunk += f' {key}="{value}"'
+        yield chunk + end
+
+    def __getstate__(self):
+        # EMPTY_PROPS is a mappingproxy, which cannot be pickled.
+        return self.tag, self.value, self.children, dict(self.props) or None
+
+    def __setstate__(self, state):
+        tag, value, children, props = state
+        self.tag = tag
+        self.value = value
+        self.children = children
+        self.props = props or EMPTY_PROPS
+
     def __repr__(self):
-        return f"HTMLNODE({self.tag}, {self.value}, {self.children}, {self.props})"
+        children = self.children or []
+        props = self.props or {}
+        return f"HTMLNODE({self.tag}, {self.value}, {children}, {props})"
 
 
 class LeafNode(HTMLNode):
+    __slots__ = ()
+
     def __init__(self, tag=None, value=None, props=None):
-        super().__init__(tag, value, None, props)
+        super().__init__(tag, value, EMPTY_CHILDREN, props)
 
-    def to_html(self):
+    def _check_value(self):
         if self.value is None:
-            err_msg = f"No value was given for LeafNode with tag={self.tag} and props={self.props}"
+            err_msg = f"No value was given for LeafNode with tag={self.tag} and props={dict(self.props)}"
             raise ValueError(err_msg)
 
+    def to_html(self, resolver=None):
+        self._check_value()
+
         if self.tag is None:
             return self.value
 
+        if resolver is not None and self.props:
+            return "".join(self.iter_html(resolver))
+
         props_string = self.props_to_html()
 
         return f"<{self.tag}{props_string}>{self.value}</{self.tag}>"
 
+    def iter_chunks(self):
+        if self.tag is None or not self.props:
+            yield self.to_html()
+            return
 
-class ParentNode(HTMLNode):
-    def __init__(self, tag, children, props=None):
-        super().__init__(tag, None, children, props)
-
-    def to_html(self):
-        if self.tag is None:
-            msg = "No tag attribute was given"
-            raise ValueError(msg)
+        self._check_value()
+        yield from self._iter_tag(f">{self.value}</{self.tag}>")
 
-        if self.children is None:
-            err_msg = "invalid HTML: no children"
-            raise ValueError(err_msg)
 
-        html_node = ""
-        for node in self.children:
-            leaf_nodestr = node.to_html()
+class ParentNode(HTMLNode):
+    __slots__ = ()
 
-            html_node += leaf_nodestr
+    def __init__(self, tag, children, props=None):
+        super().__init__(tag, None, children, props)
 
-        props_string = self.props_to_html()
-        return f"<{self.tag}{props_string}>{html_node}</{self.tag}>"
+    def iter_chunks(self):
+        # An explicit stack instead of recursion keeps each chunk O(1) to
+        # produce and avoids the recursion limit on deeply nested trees.
+        stack = [self]
+        while stack:
+            node = stack.pop()
+
+            if isinstance(node, str):
+                yield node
+
+            elif isinstance(node, LeafNode):
+                if node.props:
+                    yield from node.iter_chunks()
+                else:
+                    yield node.to_html()
+
+            elif isinstance(node, ParentNode):
+                if node.tag is None:
+                    msg = "No tag attribute was given"
+                    raise ValueError(msg)
+
+                if node.children is None:
+                    err_msg = "invalid HTML: no children"
+                    raise ValueError(err_msg)
+
+                if node.props:
+                    yield from node._iter_tag(">")
+                else:
+                    yield f"<{node.tag}>"
+                stack.append(f"</{node.tag}>")
+                stack.extend(reversed(node.children))
+
+            else:
+                yield from node.iter_chunks()
+
+
+class FragmentNode(HTMLNode):
+    """HTML serialized ahead of time, as segments from join_chunks.
+
+    Used for fragments reused across pages, from the fragment memo or the
+    render cache; their URLs are resolved like those of any other node.
+    """
+
+    __slots__ = ()
+
+    def __init__(self, segments):
+        super().__init__(None, None, segments)
+
+    def iter_chunks(self):
+        segments = self.children
+        yield segments[0]
+        for index in range(1, len(segments), 2):
+            # Segments loaded from the render cache are plain strings.
+            yield LinkUrl(segments[index])
+            yield segments[index + 1]
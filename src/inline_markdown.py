@@ -1,18 +1,79 @@
 import re
 
+from build_profiler import profiled
 from textnode import TextNode, TextType
 
+IMAGE_PATTERN = re.compile(r"!\[([^\[\]]*)\]\(([^\(\)]*)\)")
+LINK_PATTERN = re.compile(r"(?<!!)\[([^\[\]]*)\]\(([^\(\)]*)\)")
 
+# Everything that can start an inline element. Plain text between matches
+# is never looked at character by character.
+INLINE_TOKEN_PATTERN = re.compile(r"!\[|\[|\*\*|_|`")
+
+DELIMITER_TEXT_TYPES = {
+    "**": TextType.BOLD,
+    "_": TextType.ITALIC,
+    "`": TextType.CODE,
+}
+
+
+@profiled("inline")
 def text_to_textnodes(text):
-    nodes = [TextNode(txt, TextType.TEXT) for txt in text.split("\n") if txt.strip()]
-    nodes = split_nodes_image(nodes)
-    nodes = split_nodes_link(nodes)
-    nodes = split_nodes_delimiter(nodes, "**", TextType.BOLD)
-    nodes = split_nodes_delimiter(nodes, "_", TextType.ITALIC)
-    nodes = split_nodes_delimiter(nodes, "`", TextType.CODE)
+    """Lex inline markdown into TextNodes in a single scan per line.
+
+    Images and links are recognised where they start, and a delimiter's
+    content runs to its matching closer, so markup inside a code span,
+    emphasis or link text is kept literally instead of being split again.
+    """
+    nodes = []
+    for line in text.split("\n"):
+        if line.strip():
+            _lex_line(line, nodes)
     return nodes
 
 
+def _append_text(nodes, text):
+    if text.strip():
+        nodes.append(TextNode(text, TextType.TEXT))
+
+
+def _lex_line(line, nodes):
+    text_start = 0
+    search_from = 0
+
+    while token := INLINE_TOKEN_PATTERN.search(line, search_from):
+        marker = token.group()
+
+        if marker in DELIMITER_TEXT_TYPES:
+            closing_index = line.find(marker, token.end())
+            if closing_index == -1:
+                msg = "invalid Markdown, formatted section not closed"
+                raise ValueError(msg)
+
+            _append_text(nodes, line[text_start : token.start()])
+            section = line[token.end() : closing_index]
+            if section.strip():
+                nodes.append(TextNode(section, DELIMITER_TEXT_TYPES[marker]))
+            text_start = search_from = closing_index + len(marker)
+            continue
+
+        if marker == "![":
+            pattern, text_type = IMAGE_PATTERN, TextType.IMAGE
+        else:
+            pattern, text_type = LINK_PATTERN, TextType.LINK
+
+        match = pattern.match(line, token.start())
+        if match is None:
+            search_from = token.end()
+            continue
+
+        _append_text(nodes, line[text_start : token.start()])
+        nodes.append(TextNode(match.group(1), text_type, match.group(2)))
+        text_start = search_from = match.end()
+
+    _append_text(nodes, line[text_start:])
+
+
 def split_nodes_delimiter(old_nodes, delimiter, text_type):
     new_nodes = []
 
@@ -42,7 +103,7 @@ def split_nodes_delimiter(old_nodes, delimiter, text_type):
 
 
 def extracted_image(text):
-    return re.findall(r"!\[([^\[\]]*)\]\(([^\(\)]*)\)", text)
+    return IMAGE_PATTERN.findall(text)
 
 
 def split_nodes_image(old_nodes):
@@ -74,7 +135,7 @@ def split_nodes_image(old_nodes):
 
 
 def extracted_link(text):
-    return re.findall(r"(?<!!)\[([^\[\]]*)\]\(([^\(\)]*)\)", text)
+    return LINK_PATTERN.findall(text)
 
 
 def split_nodes_link(old_nodes):
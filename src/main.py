@@ -1,22 +1,217 @@
+import argparse
+import os
 import sys
 from logging import INFO, basicConfig, getLogger
 
+from build_profiler import enable_profiling, profile_stage
+from dev_server import DevServer
+from fileio import COPY_MODES
+from fragment_memo import FragmentMemo
 from generate_website import (
+    PageBuildError,
     copy_static_to_public,
     generate_pages_recursive,
 )
+from render_cache import RenderCache
+from site_outputs import SiteOutputs
+from url_resolver import CdnUrlResolver, RelativeUrlResolver, UrlResolver
+from watch import SiteWatcher
 
 
-def main():
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Build the static site into docs/. Use 'main.py serve' to preview it.",
+    )
+    parser.add_argument(
+        "basepath",
+        nargs="?",
+        default="/",
+        help="URL prefix the site is served from (default: /)",
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=1,
+        help="render pages on N worker processes (0 uses every CPU)",
+    )
+    parser.add_argument(
+        "--async",
+        dest="async_io",
+        action="store_true",
+        help="overlap reading and writing files with rendering, for slow filesystems",
+    )
+    parser.add_argument(
+        "--clean",
+        action="store_true",
+        help="delete docs/ and copy every static file instead of syncing",
+    )
+    parser.add_argument(
+        "--checksum",
+        action="store_true",
+        help="compare static files by content instead of size and mtime",
+    )
+    parser.add_argument(
+        "--static-mode",
+        choices=COPY_MODES,
+        default="copy",
+        help="publish static files by copying, hardlinking or reflinking them; "
+        "links fall back to copying where unsupported (default: copy)",
+    )
+    parser.add_argument(
+        "--static-jobs",
+        type=int,
+        default=1,
+        metavar="N",
+        help="copy static files on N threads (default: 1)",
+    )
+    parser.add_argument(
+        "--skip-unchanged",
+        action="store_true",
+        help="leave pages whose HTML did not change untouched, keeping their mtime",
+    )
+    parser.add_argument(
+        "--fingerprint",
+        action="store_true",
+        help="publish CSS, JS, images and fonts under content-hashed names "
+        "and point pages at them",
+    )
+    urls = parser.add_mutually_exclusive_group()
+    urls.add_argument(
+        "--cdn-url",
+        metavar="URL",
+        help="serve static files (images, CSS, JS, ...) from this host, "
+        "e.g. https://cdn.example.com",
+    )
+    urls.add_argument(
+        "--relative-urls",
+        action="store_true",
+        help="write links relative to each page, so the site works from any "
+        "directory or straight from disk",
+    )
+    parser.add_argument(
+        "--site-url",
+        metavar="URL",
+        help="public URL of the site, e.g. https://example.com/blog/; writes "
+        "sitemap.xml, feed.xml (RSS of blog/) and a search index in search/",
+    )
+    parser.add_argument(
+        "--cache-dir",
+        help="reuse rendered page bodies across builds from this directory, e.g. .ssg-cache",
+    )
+    parser.add_argument(
+        "--cache-max-mb",
+        type=int,
+        default=256,
+        help="evict least recently used cache entries above this size (default: 256)",
+    )
+    parser.add_argument(
+        "--fragment-memo",
+        type=int,
+        default=2048,
+        metavar="N",
+        help="remember the HTML of up to N repeated blocks per process, 0 to disable "
+        "(default: 2048)",
+    )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="print per-stage and per-page timings after the build",
+    )
+    parser.add_argument(
+        "--profile-json",
+        metavar="PATH",
+        help="also write the profile as JSON to PATH (implies --profile)",
+    )
+    parser.add_argument(
+        "--profile-top",
+        type=int,
+        default=10,
+        metavar="N",
+        help="number of slowest pages to list in the profile (default: 10)",
+    )
+    parser.add_argument(
+        "--watch",
+        action="store_true",
+        help="after building, keep rebuilding whatever changes",
+    )
+    parser.add_argument(
+        "--watch-interval",
+        type=float,
+        default=0.5,
+        metavar="SECONDS",
+        help="how often --watch polls for changes (default: 0.5)",
+    )
+    args = parser.parse_args(argv)
+    if args.jobs < 0:
+        parser.error("--jobs must not be negative")
+    if args.jobs == 0:
+        args.jobs = os.cpu_count() or 1
+    return args
+
+
+def parse_serve_args(argv):
+    parser = argparse.ArgumentParser(
+        prog="main.py serve",
+        description="Preview the site, rendering pages from content/ on request.",
+    )
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8888)
+    parser.add_argument(
+        "--interval",
+        type=float,
+        default=0.5,
+        metavar="SECONDS",
+        help="how often to poll for changes to reload browsers (default: 0.5)",
+    )
+    return parser.parse_args(argv)
+
+
+def serve(argv):
+    args = parse_serve_args(argv)
+    DevServer("content", "static", "template.html", args.interval).serve(args.host, args.port)
+
+
+def make_resolver(args, assets):
+    if args.relative_urls:
+        return RelativeUrlResolver("docs", assets)
+    if args.cdn_url:
+        return CdnUrlResolver(args.cdn_url, args.basepath, assets)
+    return UrlResolver(args.basepath, assets)
+
+
+def main(argv=None):
     basicConfig(level=INFO)
     logger = getLogger(__name__)
 
-    basepath = sys.argv[1] if len(sys.argv) > 1 else "/"
+    argv = sys.argv[1:] if argv is None else argv
+    if argv[:1] == ["serve"]:
+        serve(argv[1:])
+        return
+
+    args = parse_args(argv)
+    basepath = args.basepath
+    profiler = enable_profiling() if args.profile or args.profile_json else None
+    cache = None
+    if args.cache_dir:
+        cache = RenderCache(args.cache_dir, args.cache_max_mb * 1024 * 1024)
+    memo = FragmentMemo(args.fragment_memo) if args.fragment_memo > 0 else None
+    outputs = None
+    if args.site_url:
+        outputs = SiteOutputs("docs", args.site_url, ".ssg-records.jsonl")
 
+    assets = None
     try:
         logger.info("Starting static site generation...")
 
-        copy_static_to_public()
+        with profile_stage("static"):
+            assets = copy_static_to_public(
+                sync=not args.clean,
+                checksum=args.checksum,
+                mode=args.static_mode,
+                workers=args.static_jobs,
+                fingerprint=args.fingerprint,
+            )
 
         logger.info("Static files copied to Public directory successfully.")
 
@@ -24,10 +219,27 @@ def main():
         err_msg = f"An OS error occurred: {e}"
         logger.exception(err_msg)
 
+    resolver = make_resolver(args, assets)
     try:
         logger.info("Generate a pages from content recursively")
 
-        generate_pages_recursive("content", "template.html", "docs", basepath)
+        written, unchanged = generate_pages_recursive(
+            "content",
+            "template.html",
+            "docs",
+            basepath,
+            manifest_path=".ssg-manifest.json",
+            index_path=".ssg-dirindex.json",
+            jobs=args.jobs,
+            cache=cache,
+            assets=assets,
+            memo=memo,
+            skip_unchanged=args.skip_unchanged,
+            async_io=args.async_io,
+            resolver=resolver,
+            outputs=outputs,
+        )
+        print(f"* content -> docs ({written} written, {unchanged} unchanged)")
 
         logger.info("Generating Static sites successfully")
 
@@ -35,6 +247,40 @@ def main():
         err_msg = f"An OS error occurred: {e}"
         logger.exception(err_msg)
 
+    except PageBuildError as e:
+        logger.error("%s", e)
+        if not args.watch:
+            raise SystemExit(1) from e
+
+    finally:
+        if profiler is not None:
+            print(profiler.report(args.profile_top))
+            if args.profile_json:
+                profiler.write_json(args.profile_json, args.profile_top)
+
+    if args.watch:
+        SiteWatcher(
+            "content",
+            "static",
+            "template.html",
+            "docs",
+            basepath,
+            ".ssg-manifest.json",
+            jobs=args.jobs,
+            cache=cache,
+            static_mode=args.static_mode,
+            static_workers=args.static_jobs,
+            checksum=args.checksum,
+            assets=assets,
+            memo=memo,
+            skip_unchanged=args.skip_unchanged,
+            async_io=args.async_io,
+            index_path=".ssg-dirindex.json",
+            resolver=resolver,
+            outputs=outputs,
+            interval=args.watch_interval,
+        ).run()
+
 
 if __name__ == "__main__":
     main()
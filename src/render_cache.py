@@ -0,0 +1,117 @@
+import hashlib
+import json
+import os
+import tempfile
+from logging import getLogger
+from pathlib import Path
+
+from block_markdown import PARSER_VERSION
+
+# Eviction trims the cache to this fraction of max_bytes.
+LOW_WATER = 0.9
+
+
+class RenderCache:
+    """Rendered body HTML on disk, keyed by markdown content and parser version.
+
+    The body does not depend on the template or basepath, so builds that
+    differ only in those reuse each other's parse results. Each entry is a
+    JSON object whose ``segments`` are the body's HTML as split by
+    htmlnode.join_chunks, so its URLs can be resolved for any page. Entries are
+    evicted least recently used first once the cache grows past max_bytes,
+    down to LOW_WATER of it, so the directory is only rescanned after
+    another tenth of the limit has been written; a hit refreshes the
+    entry's mtime.
+    """
+
+    def __init__(self, directory=".ssg-cache", max_bytes=256 * 1024 * 1024):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self._size = None
+
+    def __getstate__(self):
+        # Each process recounts the cache size the first time it writes.
+        return {"directory": self.directory, "max_bytes": self.max_bytes}
+
+    def __setstate__(self, state):
+        self.__init__(state["directory"], state["max_bytes"])
+
+    def key(self, markdown):
+        data = f"{PARSER_VERSION}\0{markdown}".encode()
+        return hashlib.sha256(data).hexdigest()
+
+    def _path(self, key):
+        return self.directory / key[:2] / f"{key}.json"
+
+    def get(self, key):
+        logger = getLogger(__name__)
+        path = self._path(key)
+        try:
+            entry = json.loads(path.read_bytes())
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        except ValueError:
+            logger.warning("Ignoring unreadable render cache entry %s", path.name)
+            return None
+        return entry
+
+    def put(self, key, entry):
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        data = json.dumps(entry, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        if self._size is None:
+            self._size = self._scan_size()
+        try:
+            # Replacing an entry, e.g. one another process just wrote.
+            self._size -= path.stat().st_size
+        except FileNotFoundError:
+            pass
+
+        fd, tmp_name = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+        with os.fdopen(fd, "wb") as tmp:
+            tmp.write(data)
+        Path(tmp_name).replace(path)
+        self._size += len(data)
+
+        if self._size > self.max_bytes:
+            self.evict()
+
+    def _entries(self):
+        """Return (mtime_ns, size, path) of every entry."""
+        entries = []
+        try:
+            shards = list(os.scandir(self.directory))
+        except FileNotFoundError:
+            return entries
+        for shard in shards:
+            if not shard.is_dir():
+                continue
+            for entry in os.scandir(shard.path):
+                # Entries of older cache formats are counted, and so evicted, too.
+                if not entry.name.endswith(".tmp") and entry.is_file():
+                    stat = entry.stat()
+                    entries.append((stat.st_mtime_ns, stat.st_size, Path(entry.path)))
+        return entries
+
+    def _scan_size(self):
+        return sum(size for _, size, _ in self._entries())
+
+    def evict(self):
+        """Delete least recently used entries until the cache fits in LOW_WATER of max_bytes."""
+        logger = getLogger(__name__)
+        entries = self._entries()
+        entries.sort()
+
+        # Other processes sharing the cache may have added entries, so
+        # start from the size on disk rather than the running total.
+        size = sum(entry_size for _, entry_size, _ in entries)
+        target = int(self.max_bytes * LOW_WATER)
+        for _, entry_size, entry in entries:
+            if size <= target:
+                break
+            entry.unlink(missing_ok=True)
+            size -= entry_size
+            logger.info("Evicted %s from the render cache", entry.name)
+
+        self._size = size
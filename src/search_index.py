@@ -0,0 +1,129 @@
+import json
+import re
+from array import array
+from pathlib import Path
+from urllib.parse import urlsplit
+
+from fileio import AtomicFile
+
+SEARCH_DIR_NAME = "search"
+SEARCH_META_NAME = "index.json"
+LOADER_NAME = "search.js"
+LOADER_SOURCE = Path(__file__).with_name("search_loader.js")
+
+SEARCH_INDEX_FORMAT = 1
+
+# Terms are sharded by their first PREFIX_LENGTH characters, so a query
+# fetches one small file per word instead of the whole index.
+PREFIX_LENGTH = 2
+
+# Longer "words" are usually hashes or URLs, which nobody searches for.
+MAX_TERM_LENGTH = 32
+
+# Must match TOKEN in search_loader.js, which tokenizes queries the same way.
+TOKEN_PATTERN = re.compile(r"\w+")
+PLAIN_SHARD_NAME = re.compile(r"[a-z0-9_]+")
+
+
+def tokenize(text):
+    return [
+        token for token in TOKEN_PATTERN.findall(text.lower()) if len(token) <= MAX_TERM_LENGTH
+    ]
+
+
+def shard_key(term, prefix_length=PREFIX_LENGTH):
+    return term[:prefix_length]
+
+
+def shard_file_name(key):
+    """Shards of non-ASCII prefixes are named by their hex-encoded UTF-8."""
+    if PLAIN_SHARD_NAME.fullmatch(key):
+        return f"{key}.json"
+    return f"_{key.encode('utf-8').hex()}.json"
+
+
+class ShardedSearchIndexWriter:
+    """Inverted index split into term-prefix shards, plus a loader script.
+
+    ``index.json`` lists every page as [url, title, summary]; a page's
+    position in it is its document id. Each shard maps its terms to a
+    posting list of (document id gap, term count) pairs, flattened into
+    one array, with ids in ascending order so gaps stay small. Postings
+    are appended as records stream in; shards are written on close, and
+    those of prefixes no longer in use are removed.
+    """
+
+    def __init__(self, directory, site_url, prefix_length=PREFIX_LENGTH):
+        self.directory = Path(directory)
+        # Search results link within the site, so they omit the host.
+        self.url_prefix = urlsplit(site_url).path.rstrip("/")
+        self.prefix_length = prefix_length
+        self.docs = []
+        self._postings: dict = {}
+        self._last_doc: dict = {}
+        self._outputs = []
+
+    def add(self, page_path, record):
+        doc_id = len(self.docs)
+        self.docs.append([self.url_prefix + page_path, record.title, record.summary])
+        for term, count in record.terms.items():
+            postings = self._postings.get(term)
+            if postings is None:
+                postings = self._postings[term] = array("I")
+                gap = doc_id
+            else:
+                gap = doc_id - self._last_doc[term]
+            postings.append(gap)
+            postings.append(count)
+            self._last_doc[term] = doc_id
+
+    def _write(self, name, text):
+        output = AtomicFile(self.directory / name)
+        self._outputs.append(output)
+        output.write(text)
+        return output
+
+    def discard(self):
+        for output in self._outputs:
+            output.discard()
+
+    def close(self):
+        try:
+            return self._write_shards()
+        except BaseException:
+            self.discard()
+            raise
+
+    def _write_shards(self):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        shards: dict = {}
+        for term in sorted(self._postings):
+            shards.setdefault(shard_key(term, self.prefix_length), []).append(term)
+
+        meta = {
+            "format": SEARCH_INDEX_FORMAT,
+            "prefix_length": self.prefix_length,
+            "shards": sorted(shards),
+            "docs": self.docs,
+        }
+        self._write(SEARCH_META_NAME, _compact_json(meta))
+        self._write(LOADER_NAME, LOADER_SOURCE.read_text(encoding="utf-8"))
+        written = {SEARCH_META_NAME, LOADER_NAME}
+        for key, terms in shards.items():
+            name = shard_file_name(key)
+            self._write(name, _compact_json({term: self._postings[term].tolist() for term in terms}))
+            written.add(name)
+
+        changed = False
+        for output in self._outputs:
+            changed |= output.commit(skip_unchanged=True)
+
+        for stale in self.directory.iterdir():
+            if stale.name not in written and stale.suffix == ".json":
+                stale.unlink()
+                changed = True
+        return changed
+
+
+def _compact_json(data):
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":"))
@@ -0,0 +1,111 @@
+// Client for the sharded search index the site generator writes to search/.
+//
+//   <script src="/search/search.js"></script>
+//   const search = await SiteSearch.load("/search/");
+//   const results = await search.query("balrog");  // [{url, title, summary, score}]
+//
+// Only index.json and the shards of the queried words' prefixes are fetched,
+// each at most once. Every word must match; the last one also matches as a
+// prefix, for search as you type.
+(function (global) {
+  "use strict";
+
+  // Must match TOKEN_PATTERN and MAX_TERM_LENGTH in search_index.py.
+  const TOKEN = /[\p{L}\p{N}_]+/gu;
+  const MAX_TERM_LENGTH = 32;
+
+  function tokenize(text) {
+    return (text.toLowerCase().match(TOKEN) || []).filter(
+      (token) => [...token].length <= MAX_TERM_LENGTH,
+    );
+  }
+
+  function shardFileName(key) {
+    if (/^[a-z0-9_]+$/.test(key)) {
+      return key + ".json";
+    }
+    const bytes = new TextEncoder().encode(key);
+    return "_" + Array.from(bytes, (b) => b.toString(16).padStart(2, "0")).join("") + ".json";
+  }
+
+  class SiteSearch {
+    constructor(baseUrl, meta) {
+      this.baseUrl = baseUrl.endsWith("/") ? baseUrl : baseUrl + "/";
+      this.meta = meta;
+      this.available = new Set(meta.shards);
+      this.shards = new Map();
+    }
+
+    static async load(baseUrl) {
+      const base = baseUrl.endsWith("/") ? baseUrl : baseUrl + "/";
+      const response = await fetch(base + "index.json");
+      return new SiteSearch(base, await response.json());
+    }
+
+    shard(term) {
+      const key = [...term].slice(0, this.meta.prefix_length).join("");
+      if (!this.available.has(key)) {
+        return Promise.resolve({});
+      }
+      if (!this.shards.has(key)) {
+        const url = this.baseUrl + shardFileName(key);
+        this.shards.set(key, fetch(url).then((response) => response.json()));
+      }
+      return this.shards.get(key);
+    }
+
+    // Map of document id -> score for one query word.
+    async scores(term, isPrefix) {
+      const shard = await this.shard(term);
+      const terms = isPrefix ? Object.keys(shard).filter((t) => t.startsWith(term)) : [term];
+      const docCount = this.meta.docs.length;
+      const scores = new Map();
+      for (const t of terms) {
+        const postings = shard[t];
+        if (!postings) {
+          continue;
+        }
+        const idf = Math.log(1 + docCount / (postings.length / 2));
+        let doc = 0;
+        for (let i = 0; i < postings.length; i += 2) {
+          doc += postings[i];
+          scores.set(doc, (scores.get(doc) || 0) + postings[i + 1] * idf);
+        }
+      }
+      return scores;
+    }
+
+    async query(text, limit = 10) {
+      const terms = tokenize(text);
+      if (terms.length === 0) {
+        return [];
+      }
+      const typing = !/\s$/.test(text);
+      const perTerm = await Promise.all(
+        terms.map((term, i) => this.scores(term, typing && i === terms.length - 1)),
+      );
+
+      let scores = perTerm[0];
+      for (const next of perTerm.slice(1)) {
+        const both = new Map();
+        for (const [doc, score] of scores) {
+          if (next.has(doc)) {
+            both.set(doc, score + next.get(doc));
+          }
+        }
+        scores = both;
+      }
+
+      return [...scores]
+        .sort((a, b) => b[1] - a[1] || a[0] - b[0])
+        .slice(0, limit)
+        .map(([doc, score]) => {
+          const [url, title, summary] = this.meta.docs[doc];
+          return { url, title, summary, score };
+        });
+    }
+  }
+
+  SiteSearch.tokenize = tokenize;
+  global.SiteSearch = SiteSearch;
+})(typeof window !== "undefined" ? window : globalThis);
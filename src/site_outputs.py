@@ -0,0 +1,349 @@
+import heapq
+import json
+import os
+import textwrap
+from collections import Counter
+from datetime import date, datetime, timezone
+from email.utils import format_datetime
+from logging import getLogger
+from pathlib import Path
+from typing import NamedTuple
+from xml.sax.saxutils import escape
+
+from block_markdown import BlockType
+from fileio import AtomicFile
+from search_index import SEARCH_DIR_NAME, ShardedSearchIndexWriter, tokenize
+
+SITEMAP_NAME = "sitemap.xml"
+FEED_NAME = "feed.xml"
+
+# Written into the output directory by the build, so a static sync keeps
+# them and everything under them.
+OUTPUT_NAMES = (SITEMAP_NAME, FEED_NAME, SEARCH_DIR_NAME)
+
+RECORDS_FORMAT = 3
+
+# Without a description in the front matter, a page's summary is the start
+# of its first paragraph of at least this many words, which skips
+# navigation links and image-only paragraphs.
+SUMMARY_MIN_WORDS = 8
+SUMMARY_LENGTH = 280
+
+
+class PageRecord(NamedTuple):
+    """What the sitemap, feed and search index need to know about a page."""
+
+    dest: str
+    # Digest of the markdown the record was made from; a stored record is
+    # reused only while it matches the source's.
+    source_hash: str
+    title: str
+    # ISO date from the front matter ``date``, else the source's mtime.
+    date: str
+    summary: str
+    # Search term -> number of occurrences in the page.
+    terms: dict
+
+
+def page_date(metadata, from_path):
+    value = metadata.get("date", "")
+    try:
+        return date.fromisoformat(value[:10]).isoformat()
+    except ValueError:
+        mtime = Path(from_path).stat().st_mtime
+        return datetime.fromtimestamp(mtime, timezone.utc).date().isoformat()
+
+
+class PageText:
+    """A page's search terms and summary, gathered while its body is parsed.
+
+    markdown_to_html_node passes it the text of each block, taken from the
+    same TextNodes as the HTML, so the page is parsed once for both and
+    its text is never held in full. The render cache stores summary and
+    terms next to the body's HTML.
+    """
+
+    def __init__(self, summary=None, terms=None):
+        # The start of the first paragraph of at least SUMMARY_MIN_WORDS.
+        self.summary = summary
+        self.terms = Counter(terms)
+
+    def add(self, block_type, text):
+        self.terms.update(tokenize(text))
+        if (
+            self.summary is None
+            and block_type == BlockType.PARAGRAPH
+            and len(text.split()) >= SUMMARY_MIN_WORDS
+        ):
+            self.summary = textwrap.shorten(text, SUMMARY_LENGTH, placeholder=" …")
+
+
+def make_page_record(from_path, dest_path, source_hash, title, metadata, page_text):
+    """Build a page's record from its front matter and the PageText of its body."""
+    return PageRecord(
+        str(dest_path),
+        source_hash,
+        title,
+        page_date(metadata, from_path),
+        metadata.get("description", page_text.summary) or "",
+        dict(page_text.terms),
+    )
+
+
+class PageRecordStore:
+    """Page records from the last build, as JSON Lines, one page per line.
+
+    Only the byte offset and source hash of each page's line are held in
+    memory. Records of
+    pages rendered in this build are appended to the next store as they
+    arrive, in any order; iter_records then copies over the records of the
+    pages that were not rendered, so nothing is re-read from markdown.
+    """
+
+    def __init__(self, path, offsets=None, source_hashes=None):
+        self.path = Path(path)
+        self.offsets: dict = offsets or {}
+        self.source_hashes: dict = source_hashes or {}
+        self._next_path = self.path.with_name(f".{self.path.name}.{os.getpid()}.tmp")
+        self._next = None
+        self._next_offsets: dict = {}
+        self._next_source_hashes: dict = {}
+
+    @classmethod
+    def load(cls, path):
+        logger = getLogger(__name__)
+        offsets = {}
+        source_hashes = {}
+        decoder = json.JSONDecoder()
+        try:
+            with open(path, "rb") as fp:
+                header = fp.readline()
+                if json.loads(header or b"{}").get("format") != RECORDS_FORMAT:
+                    return cls(path)
+
+                offset = fp.tell()
+                for line in fp:
+                    # Each line is a compact JSON list whose first items are
+                    # the dest path and source hash; decode only those.
+                    text = line.decode("utf-8")
+                    dest, end = decoder.raw_decode(text, 1)
+                    source_hashes[dest], _ = decoder.raw_decode(text, end + 1)
+                    offsets[dest] = offset
+                    offset += len(line)
+        except FileNotFoundError:
+            return cls(path)
+        except (OSError, ValueError):
+            logger.warning("Ignoring unreadable page record store %s", path)
+            return cls(path)
+
+        return cls(path, offsets, source_hashes)
+
+    def __contains__(self, dest_path):
+        return str(dest_path) in self.offsets
+
+    def source_hash(self, dest_path):
+        """Return the source hash of the page's stored record, or None without one."""
+        return self.source_hashes.get(str(dest_path))
+
+    def _open_next(self):
+        if self._next is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._next = open(self._next_path, "w+b")
+            self._next.write(json.dumps({"format": RECORDS_FORMAT}).encode("utf-8") + b"\n")
+        return self._next
+
+    def _append_line(self, dest, source_hash, line):
+        next_file = self._open_next()
+        self._next_offsets[dest] = next_file.tell()
+        self._next_source_hashes[dest] = source_hash
+        next_file.write(line)
+
+    def append(self, record):
+        """Add the record of a page rendered in this build."""
+        text = json.dumps(list(record), ensure_ascii=False, separators=(",", ":"))
+        self._append_line(record.dest, record.source_hash, text.encode("utf-8") + b"\n")
+
+    def iter_records(self, dest_paths):
+        """Yield the record of each page in dest_paths, in that order.
+
+        Records appended in this build take precedence over the last
+        build's. Pages with neither are skipped.
+        """
+        next_file = self._open_next()
+        previous = open(self.path, "rb") if self.offsets else None
+        try:
+            for dest_path in dest_paths:
+                dest = str(dest_path)
+                offset = self._next_offsets.get(dest)
+                if offset is not None:
+                    next_file.seek(offset)
+                    line = next_file.readline()
+                elif dest in self.offsets:
+                    previous.seek(self.offsets[dest])
+                    line = previous.readline()
+                    next_file.seek(0, os.SEEK_END)
+                    self._append_line(dest, self.source_hashes[dest], line)
+                else:
+                    continue
+                yield PageRecord(*json.loads(line))
+        finally:
+            next_file.seek(0, os.SEEK_END)
+            if previous is not None:
+                previous.close()
+
+    def save(self):
+        """Replace the store with the records appended and carried over in this build."""
+        next_file = self._open_next()
+        next_file.close()
+        self._next_path.replace(self.path)
+        self._next = None
+        self.offsets, self._next_offsets = self._next_offsets, {}
+        self.source_hashes, self._next_source_hashes = self._next_source_hashes, {}
+
+    def close(self):
+        """Discard anything appended since the last save."""
+        if self._next is not None:
+            self._next.close()
+            self._next = None
+            self._next_path.unlink(missing_ok=True)
+        self._next_offsets = {}
+        self._next_source_hashes = {}
+
+
+class SitemapWriter:
+    """sitemap.xml listing every page, streamed as records arrive."""
+
+    def __init__(self, path, site_url):
+        self.output = AtomicFile(path)
+        self.site_url = site_url
+        self.output.write(
+            '<?xml version="1.0" encoding="UTF-8"?>\n'
+            '<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n',
+        )
+
+    def add(self, page_path, record):
+        url = escape(self.site_url + page_path)
+        self.output.write(f"<url><loc>{url}</loc><lastmod>{record.date}</lastmod></url>\n")
+
+    def close(self):
+        self.output.write("</urlset>\n")
+        return self.output.commit(skip_unchanged=True)
+
+    def discard(self):
+        self.output.discard()
+
+
+class FeedWriter:
+    """RSS 2.0 feed of the newest pages under one section, e.g. /blog/.
+
+    Only the max_items newest entries are kept while records stream past.
+    """
+
+    def __init__(self, path, site_url, section="blog", max_items=20):
+        self.output = AtomicFile(path)
+        self.site_url = site_url
+        self.prefix = f"/{section.strip('/')}/"
+        self.max_items = max_items
+        self.title = site_url
+        self.description = ""
+        self._items = []
+
+    def add(self, page_path, record):
+        if page_path == "/":
+            self.title = record.title
+            self.description = record.summary
+        if not page_path.startswith(self.prefix) or page_path == self.prefix:
+            return
+
+        # The heap's smallest, i.e. oldest, item is the one evicted.
+        item = (record.date, self.site_url + page_path, record.title, record.summary)
+        if len(self._items) < self.max_items:
+            heapq.heappush(self._items, item)
+        else:
+            heapq.heappushpop(self._items, item)
+
+    def close(self):
+        self.output.write(
+            '<?xml version="1.0" encoding="UTF-8"?>\n<rss version="2.0"><channel>\n'
+            f"<title>{escape(self.title)}</title>\n"
+            f"<link>{escape(self.site_url)}/</link>\n"
+            f"<description>{escape(self.description or self.title)}</description>\n",
+        )
+        # Newest first, pages from the same day by URL.
+        items = sorted(self._items, key=lambda item: item[1])
+        items.sort(key=lambda item: item[0], reverse=True)
+        for page_date, url, title, summary in items:
+            published = datetime.combine(
+                date.fromisoformat(page_date),
+                datetime.min.time(),
+                timezone.utc,
+            )
+            self.output.write(
+                f"<item><title>{escape(title)}</title>"
+                f"<link>{escape(url)}</link>"
+                f"<guid>{escape(url)}</guid>"
+                f"<pubDate>{format_datetime(published, usegmt=True)}</pubDate>"
+                f"<description>{escape(summary)}</description></item>\n",
+            )
+        self.output.write("</channel></rss>\n")
+        return self.output.commit(skip_unchanged=True)
+
+    def discard(self):
+        self.output.discard()
+
+
+class SiteOutputs:
+    """Writes sitemap.xml, feed.xml and the search/ index into dest_dir.
+
+    They are fed, in a single streaming pass, by the page records gathered
+    while pages are rendered, kept between builds at records_path. Files
+    whose contents did not change are left untouched.
+    """
+
+    def __init__(self, dest_dir, site_url, records_path, feed_section="blog", feed_items=20):
+        self.dest_dir = Path(dest_dir)
+        self.site_url = site_url.rstrip("/")
+        self.records_path = Path(records_path)
+        self.feed_section = feed_section
+        self.feed_items = feed_items
+
+    def load_records(self):
+        return PageRecordStore.load(self.records_path)
+
+    def page_path(self, dest_path):
+        """Return the site path of a page, e.g. ``/blog/tom/``."""
+        directory = Path(dest_path).parent.relative_to(self.dest_dir).as_posix()
+        return "/" if directory == "." else f"/{directory}/"
+
+    def write(self, records):
+        """Write every output from an iterable of PageRecords; returns the number of pages."""
+        self.dest_dir.mkdir(parents=True, exist_ok=True)
+        writers = []
+        try:
+            writers.append(SitemapWriter(self.dest_dir / SITEMAP_NAME, self.site_url))
+            writers.append(
+                FeedWriter(
+                    self.dest_dir / FEED_NAME,
+                    self.site_url,
+                    self.feed_section,
+                    self.feed_items,
+                ),
+            )
+            writers.append(
+                ShardedSearchIndexWriter(self.dest_dir / SEARCH_DIR_NAME, self.site_url),
+            )
+
+            count = 0
+            for record in records:
+                page_path = self.page_path(record.dest)
+                for writer in writers:
+                    writer.add(page_path, record)
+                count += 1
+        except BaseException:
+            for writer in writers:
+                writer.discard()
+            raise
+
+        for writer in writers:
+            writer.close()
+        return count
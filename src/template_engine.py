@@ -0,0 +1,100 @@
+import re
+from pathlib import Path
+
+from url_resolver import UrlResolver
+
+SLOT_PATTERN = re.compile(r"\{\{\s*(\w+)\s*\}\}")
+
+# A root-relative href/src attribute in template markup.
+ROOT_URL_PATTERN = re.compile(r'\b(href|src)="(/[^"]*)"')
+
+DEFAULT_RESOLVER = UrlResolver()
+
+
+class MissingSlotError(Exception):
+    """Raised when a template slot is rendered without a value."""
+
+
+def rewrite_root_urls(html, resolver):
+    """Pass every root-relative href/src attribute in html through resolver."""
+
+    def replace(match):
+        return f'{match[1]}="{resolver.resolve(match[2])}"'
+
+    return ROOT_URL_PATTERN.sub(replace, html)
+
+
+class Template:
+    """A template parsed once into literal segments and named slots.
+
+    Slots are written ``{{ Name }}``. Output is the first literal followed
+    by alternating slot values and literals, so rendering never copies or
+    rescans the assembled document. URLs in the template's own markup are
+    resolved once per UrlResolver; slot values are written as given.
+    ``urls`` lists the root-relative URLs in the markup.
+    """
+
+    def __init__(self, source):
+        self.literals: list = []
+        self.slot_names: list = []
+
+        last_index = 0
+        for match in SLOT_PATTERN.finditer(source):
+            self.literals.append(source[last_index : match.start()])
+            self.slot_names.append(match.group(1))
+            last_index = match.end()
+        self.literals.append(source[last_index:])
+        self.urls = [
+            match[2] for literal in self.literals for match in ROOT_URL_PATTERN.finditer(literal)
+        ]
+
+        self._resolved_literals: dict = {DEFAULT_RESOLVER.key: self.literals}
+
+    def _literals_for(self, resolver):
+        literals = self._resolved_literals.get(resolver.key)
+        if literals is None:
+            literals = [rewrite_root_urls(literal, resolver) for literal in self.literals]
+            self._resolved_literals[resolver.key] = literals
+        return literals
+
+    def iter_render(self, values, resolver=DEFAULT_RESOLVER):
+        """Yield the rendered document in chunks.
+
+        A value may be a string or an iterable of string chunks, such as
+        ``HTMLNode.iter_html()``, which is streamed through without joining.
+        """
+        literals = self._literals_for(resolver)
+        for name in self.slot_names:
+            if name not in values:
+                err_msg = f"No value was given for template slot {name!r}"
+                raise MissingSlotError(err_msg)
+
+        yield literals[0]
+        for name, literal in zip(self.slot_names, literals[1:], strict=True):
+            value = values[name]
+            if isinstance(value, str):
+                yield value
+            else:
+                yield from value
+            yield literal
+
+    def render(self, values, resolver=DEFAULT_RESOLVER):
+        return "".join(self.iter_render(values, resolver))
+
+
+_template_cache: dict = {}
+
+
+def load_template(template_path):
+    """Return the compiled template for a path, reparsing only if the file changed."""
+    path = Path(template_path)
+    stat = path.stat()
+    signature = (stat.st_mtime_ns, stat.st_size)
+
+    cached = _template_cache.get(path)
+    if cached is not None and cached[0] == signature:
+        return cached[1]
+
+    template = Template(path.read_text(encoding="utf-8"))
+    _template_cache[path] = (signature, template)
+    return template
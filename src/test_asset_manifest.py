@@ -0,0 +1,120 @@
+import os
+import tempfile
+import unittest
+from pathlib import Path
+
+from asset_manifest import (
+    ASSET_MANIFEST_NAME,
+    AssetManifest,
+    fingerprint_path,
+    rewrite_css_urls,
+)
+from generate_website import sync_fingerprinted_static
+
+
+class TestAssetManifest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self.tmp.name)
+        self.static = self.root / "static"
+        (self.static / "images").mkdir(parents=True)
+        (self.static / "index.css").write_text("body {}")
+        (self.static / "images" / "a.png").write_bytes(b"png")
+        (self.static / "robots.txt").write_text("User-agent: *")
+        self.dest = self.root / "docs"
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_fingerprint_path(self):
+        self.assertEqual(fingerprint_path("images/a.png", "0123456789abcdef"), "images/a.0123456789.png")
+
+    def test_build_skips_fixed_name_files(self):
+        assets = AssetManifest.build(self.static)
+        self.assertEqual(sorted(assets.entries), ["images/a.png", "index.css"])
+        self.assertEqual(assets.resolve("robots.txt"), "robots.txt")
+        self.assertRegex(assets.resolve("index.css"), r"^index\.[0-9a-f]{10}\.css$")
+
+    def test_digest_changes_with_content(self):
+        before = AssetManifest.build(self.static)
+        (self.static / "index.css").write_text("body { margin: 0 }")
+        after = AssetManifest.build(self.static, before)
+        self.assertNotEqual(before.digest, after.digest)
+        self.assertEqual(before.resolve("images/a.png"), after.resolve("images/a.png"))
+
+    def test_unchanged_files_reuse_previous_digest(self):
+        previous = AssetManifest.build(self.static)
+        previous.entries["images/a.png"]["digest"] = "f" * 64
+        self.assertEqual(
+            AssetManifest.build(self.static, previous).resolve("images/a.png"),
+            "images/a.ffffffffff.png",
+        )
+
+    def test_save_and_load(self):
+        assets = AssetManifest.build(self.static)
+        assets.save(self.root / "assets.json")
+        loaded = AssetManifest.load(self.root / "assets.json")
+        self.assertEqual(loaded.entries, assets.entries)
+        self.assertEqual(loaded.digest, assets.digest)
+
+    def test_rewrite_css_urls(self):
+        names = {"images/a.png": "images/a.1234567890.png", "fonts/b.woff2": "fonts/b.abc.woff2"}
+        css = (
+            'a { background: url(../images/a.png?v=1#x) }\n'
+            '@font-face { src: url("/fonts/b.woff2") }\n'
+            "b { background: url('missing.png'), url(data:image/png;base64,AA==) }\n"
+            "c { background: url(https://cdn.example.com/images/a.png) url(../../a.png) }\n"
+        )
+        self.assertEqual(
+            rewrite_css_urls(css, "css/site.css", lambda source: names.get(source, source)),
+            'a { background: url(../images/a.1234567890.png?v=1#x) }\n'
+            '@font-face { src: url("/fonts/b.abc.woff2") }\n'
+            "b { background: url('missing.png'), url(data:image/png;base64,AA==) }\n"
+            "c { background: url(https://cdn.example.com/images/a.png) url(../../a.png) }\n",
+        )
+
+    def test_css_is_hashed_after_its_references_are_rewritten(self):
+        (self.static / "print.css").write_text("p { background: url(images/a.png) }")
+        (self.static / "index.css").write_text('@import "print.css";')
+        assets = AssetManifest.build(self.static)
+        png = assets.resolve("images/a.png")
+        self.assertEqual(assets.contents["print.css"], f"p {{ background: url({png}) }}")
+        self.assertEqual(
+            assets.contents["index.css"],
+            f'@import "{assets.resolve("print.css")}";',
+        )
+
+        (self.static / "images" / "a.png").write_bytes(b"new png")
+        after = AssetManifest.build(self.static, assets)
+        self.assertNotEqual(after.resolve("print.css"), assets.resolve("print.css"))
+        self.assertNotEqual(after.resolve("index.css"), assets.resolve("index.css"))
+
+    def test_sync_publishes_rewritten_css(self):
+        (self.static / "index.css").write_text("body { background: url(/images/a.png) }")
+        assets, counts = sync_fingerprinted_static(self.static, self.dest)
+        self.assertEqual(counts, (3, 0, 0))
+        css = (self.dest / assets.resolve("index.css")).read_text()
+        self.assertEqual(css, f"body {{ background: url(/{assets.resolve('images/a.png')}) }}")
+        self.assertTrue((self.dest / assets.resolve("images/a.png")).exists())
+
+        _, counts = sync_fingerprinted_static(self.static, self.dest)
+        self.assertEqual(counts, (0, 0, 3))
+
+    def test_sync_publishes_hashed_names_and_removes_old_ones(self):
+        assets, counts = sync_fingerprinted_static(self.static, self.dest)
+        self.assertEqual(counts, (3, 0, 0))
+        css = self.dest / assets.resolve("index.css")
+        self.assertEqual(css.read_text(), "body {}")
+        self.assertTrue((self.dest / "robots.txt").exists())
+        self.assertTrue((self.dest / ASSET_MANIFEST_NAME).exists())
+
+        (self.static / "index.css").write_text("body { margin: 0 }")
+        os.utime(self.static / "index.css", ns=(10**9, 10**9))
+        new_assets, counts = sync_fingerprinted_static(self.static, self.dest)
+        self.assertEqual(counts, (1, 1, 2))
+        self.assertFalse(css.exists())
+        self.assertTrue((self.dest / new_assets.resolve("index.css")).exists())
+
+
+if __name__ == "__main__":
+    unittest.main()
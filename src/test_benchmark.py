@@ -0,0 +1,51 @@
+import random
+import tempfile
+import unittest
+from pathlib import Path
+
+from benchmark import compare_to_baseline, generate_corpus, run_benchmarks, synthetic_page
+from block_markdown import markdown_to_html_node
+
+
+class TestBenchmark(unittest.TestCase):
+    def test_synthetic_page_is_valid_markdown(self):
+        rng = random.Random(1)
+        for _ in range(20):
+            page = synthetic_page(rng, 2048, code_density=0.2, link_density=0.2)
+            self.assertTrue(page.startswith("# "))
+            markdown_to_html_node(page).to_html()
+
+    def test_generate_corpus_respects_page_count_and_depth(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            sources = generate_corpus(tmp, 12, 512, depth=1, seed=3)
+            self.assertEqual(len(sources), 12)
+            for source in sources:
+                self.assertLessEqual(len(source.relative_to(tmp).parts), 3)
+
+    def test_run_benchmarks_reports_every_stage(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            corpus = Path(tmp) / "content"
+            generate_corpus(corpus, 3, 512)
+            template = Path(tmp) / "template.html"
+            template.write_text("<title>{{ Title }}</title>{{ Content }}")
+
+            results = run_benchmarks(corpus, template, repeat=1)
+
+        self.assertEqual(set(results), {"inline", "parse", "to_html", "build"})
+        for stats in results.values():
+            self.assertGreater(stats["mb_per_sec"], 0)
+
+    def test_compare_to_baseline(self):
+        baseline = {"parse": {"mb_per_sec": 10.0}, "build": {"mb_per_sec": 5.0}}
+        results = {
+            "parse": {"mb_per_sec": 8.5},
+            "build": {"mb_per_sec": 4.8},
+            "inline": {"mb_per_sec": 1.0},
+        }
+        regressions = compare_to_baseline(results, baseline, threshold=10)
+        self.assertEqual(len(regressions), 1)
+        self.assertTrue(regressions[0].startswith("parse:"))
+
+
+if __name__ == "__main__":
+    unittest.main()
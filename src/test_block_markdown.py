@@ -1,11 +1,16 @@
+import io
 import unittest
 
 from block_markdown import (
+    Block,
     BlockType,
     block_to_block_type,
+    classify_block,
+    iter_blocks,
     markdown_to_blocks,
     markdown_to_html_node,
 )
+from url_resolver import UrlResolver
 
 
 class TestBlockMarkdown(unittest.TestCase):
@@ -147,6 +152,20 @@ Second block
             BlockType.PARAGRAPH,
         )
 
+    def test_classify_block_metadata(self):
+        self.assertEqual(classify_block("### Title"), (BlockType.HEADING, (3,)))
+        self.assertEqual(
+            classify_block("- a\ncontinued\n- b"),
+            (BlockType.ULIST, (2, 0, 2)),
+        )
+        self.assertEqual(classify_block("1. a\n10.\tb"), (BlockType.OLIST, (3, 4)))
+        self.assertEqual(classify_block("1.\nnot a list"), (BlockType.PARAGRAPH, ()))
+        self.assertEqual(classify_block("####### Too deep"), (BlockType.PARAGRAPH, ()))
+
+    def test_list_continuation_lines_join_the_item(self):
+        html = markdown_to_html_node("1. **a** b\n   more\n2. c").to_html()
+        self.assertEqual(html, "<div><ol><li><b>a</b> b   more</li><li>c</li></ol></div>")
+
     def test_block_to_block_type_paragraph(self):
         self.assertEqual(
             block_to_block_type("Just a normal paragraph."),
@@ -326,6 +345,52 @@ Second block
             '<div><pre><code>func main(){\n    fmt.Println("Aiya, Ambar!")\n}\n</code></pre></div>',
         )
 
+    def test_iter_blocks_yields_typed_blocks(self):
+        lines = io.StringIO("# Title\n\n- a\n- b\n\nText\n")
+        self.assertEqual(
+            list(iter_blocks(lines)),
+            [
+                Block("# Title", BlockType.HEADING, (1,)),
+                Block("- a\n- b", BlockType.ULIST, (2, 2)),
+                Block("Text", BlockType.PARAGRAPH),
+            ],
+        )
+
+    def test_fenced_code_keeps_blank_lines(self):
+        md = "```\nfirst\n\n    second\n```\n\nafter"
+        self.assertEqual(
+            markdown_to_blocks(md),
+            ["```\nfirst\n\n    second\n```", "after"],
+        )
+        self.assertEqual(
+            markdown_to_html_node(md).to_html(),
+            "<div><pre><code>first\n\n    second\n</code></pre><p>after</p></div>",
+        )
+
+    def test_unclosed_fence_splits_on_blank_lines(self):
+        self.assertEqual(
+            markdown_to_blocks("```\ncode\n\nmore"),
+            ["```\ncode", "more"],
+        )
+
+    def test_crlf_line_endings(self):
+        self.assertEqual(markdown_to_blocks("One\r\n\r\nTwo\r\n"), ["One", "Two"])
+
+    def test_markdown_to_html_node_from_file(self):
+        lines = io.StringIO("## Sub\n\n> quote\n")
+        self.assertEqual(
+            markdown_to_html_node(lines).to_html(),
+            "<div><h2>Sub</h2><blockquote>quote</blockquote></div>",
+        )
+
+    def test_resolver_rewrites_links_but_not_code(self):
+        md = '[blog](/blog/) and `<a href="/x">`\n\n```\n<img src="/a.png">\n```'
+        self.assertEqual(
+            markdown_to_html_node(md).to_html(UrlResolver("/site/")),
+            '<div><p><a href="/site/blog/">blog</a> and <code><a href="/x"></code></p>'
+            '<pre><code><img src="/a.png">\n</code></pre></div>',
+        )
+
 
 if __name__ == "__main__":
     unittest.main()
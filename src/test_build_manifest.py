@@ -0,0 +1,157 @@
+import tempfile
+import unittest
+from pathlib import Path
+
+from build_manifest import HASH_BLOCK_SIZE, BuildManifest, hash_bytes, hash_file, page_key
+from generate_website import generate_pages_recursive
+
+
+class TestBuildManifest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self.tmp.name)
+        self.source = self.root / "index.md"
+        self.source.write_text("# Title")
+        self.dest = self.root / "out" / "index.html"
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_hash_file_matches_hash_bytes(self):
+        data = b"x" * HASH_BLOCK_SIZE + b"tail"
+        path = self.root / "big.bin"
+        path.write_bytes(data)
+        self.assertEqual(hash_file(path), hash_bytes(data))
+
+    def test_page_key_depends_on_basepath(self):
+        self.assertNotEqual(page_key("a", "b", "/"), page_key("a", "b", "/site/"))
+
+    def test_page_key_depends_on_assets(self):
+        self.assertNotEqual(page_key("a", "b", "/"), page_key("a", "b", "/", "assets"))
+
+    def test_fresh_only_after_record_and_output_exists(self):
+        manifest = BuildManifest(self.root / "manifest.json")
+        source_hash = hash_bytes(self.source.read_bytes())
+        key = page_key(source_hash, "t", "/")
+        self.assertFalse(manifest.is_fresh(self.dest, key))
+
+        manifest.record(self.dest, self.source, source_hash, key)
+        self.assertFalse(manifest.is_fresh(self.dest, key))
+
+        self.dest.parent.mkdir()
+        self.dest.write_text("<html></html>")
+        self.assertTrue(manifest.is_fresh(self.dest, key))
+        self.assertFalse(manifest.is_fresh(self.dest, page_key(source_hash, "t", "/x/")))
+
+    def test_source_hash_known_only_while_stat_unchanged(self):
+        manifest = BuildManifest(self.root / "manifest.json")
+        self.assertIsNone(manifest.source_hash(self.dest, self.source))
+
+        manifest.record(self.dest, self.source, "hash", "key")
+        self.assertEqual(manifest.source_hash(self.dest, self.source), "hash")
+
+        self.source.write_text("# Longer title")
+        self.assertIsNone(manifest.source_hash(self.dest, self.source))
+
+    def test_save_and_load_round_trip(self):
+        manifest = BuildManifest(self.root / "manifest.json")
+        manifest.record(self.dest, self.source, "hash", "key", {"/b.png", "/a.css"})
+        manifest.save()
+
+        loaded = BuildManifest.load(self.root / "manifest.json")
+        self.assertEqual(loaded.entries, manifest.entries)
+        self.assertEqual(loaded.urls(self.dest), ["/a.css", "/b.png"])
+        self.assertEqual(loaded.urls(self.root / "other.html"), ())
+
+    def test_load_corrupt_manifest_is_empty(self):
+        path = self.root / "manifest.json"
+        path.write_text("{not json")
+        self.assertEqual(BuildManifest.load(path).entries, {})
+
+    def test_prune_removes_stale_output_and_empty_dirs(self):
+        manifest = BuildManifest(self.root / "manifest.json")
+        self.dest.parent.mkdir()
+        self.dest.write_text("<html></html>")
+        manifest.record(self.dest, self.source, "hash", "key")
+
+        stale = manifest.prune([], self.root)
+        self.assertEqual(stale, [str(self.dest)])
+        self.assertFalse(self.dest.exists())
+        self.assertFalse(self.dest.parent.exists())
+
+
+class TestIncrementalBuild(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        root = Path(self.tmp.name)
+        self.content = root / "content"
+        (self.content / "blog").mkdir(parents=True)
+        (self.content / "index.md").write_text("# Home\n\nWelcome")
+        (self.content / "blog" / "index.md").write_text("# Blog\n\nPosts")
+        self.template = root / "template.html"
+        self.template.write_text("<title>{{ Title }}</title>{{ Content }}")
+        self.dest = root / "docs"
+        self.manifest = root / "manifest.json"
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def build(self, basepath="/"):
+        generate_pages_recursive(
+            self.content,
+            self.template,
+            self.dest,
+            basepath,
+            manifest_path=self.manifest,
+        )
+
+    def test_unchanged_pages_are_not_rewritten(self):
+        self.build()
+        home = self.dest / "index.html"
+        home.write_text("sentinel")
+        self.build()
+        self.assertEqual(home.read_text(), "sentinel")
+
+    def test_changed_inputs_rebuild(self):
+        self.build()
+        home = self.dest / "index.html"
+        home.write_text("sentinel")
+
+        self.build(basepath="/site/")
+        self.assertNotEqual(home.read_text(), "sentinel")
+
+        home.write_text("sentinel")
+        self.template.write_text("<h1>{{ Title }}</h1>{{ Content }}")
+        self.build(basepath="/site/")
+        self.assertTrue(home.read_text().startswith("<h1>"))
+
+    def test_records_digest_of_the_source_read_to_render(self):
+        for kwargs in ({}, {"jobs": 2}, {"async_io": True}):
+            with self.subTest(**kwargs):
+                self.manifest.unlink(missing_ok=True)
+                generate_pages_recursive(
+                    self.content,
+                    self.template,
+                    self.dest,
+                    "/",
+                    manifest_path=self.manifest,
+                    **kwargs,
+                )
+                manifest = BuildManifest.load(self.manifest)
+                for source in ("index.md", "blog/index.md"):
+                    dest = self.dest / source.replace(".md", ".html")
+                    self.assertEqual(
+                        manifest.source_hash(dest, self.content / source),
+                        hash_bytes((self.content / source).read_bytes()),
+                    )
+
+    def test_deleted_source_prunes_output(self):
+        self.build()
+        (self.content / "blog" / "index.md").unlink()
+        self.build()
+        self.assertFalse((self.dest / "blog" / "index.html").exists())
+        self.assertTrue((self.dest / "index.html").exists())
+
+
+if __name__ == "__main__":
+    unittest.main()
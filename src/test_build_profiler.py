@@ -0,0 +1,85 @@
+import json
+import tempfile
+import unittest
+from pathlib import Path
+
+from build_profiler import (
+    BuildProfiler,
+    active_profiler,
+    disable_profiling,
+    enable_profiling,
+    percentile,
+    profile_stage,
+    profiled,
+)
+from inline_markdown import text_to_textnodes
+
+
+class TestBuildProfiler(unittest.TestCase):
+    def tearDown(self):
+        disable_profiling()
+
+    def test_percentile(self):
+        values = [1.0, 2.0, 3.0, 4.0]
+        self.assertEqual(percentile(values, 50), 2.0)
+        self.assertEqual(percentile(values, 95), 4.0)
+        self.assertEqual(percentile([], 50), 0.0)
+
+    def test_stage_totals_and_page_times(self):
+        profiler = BuildProfiler()
+        profiler.add("read", 0.5, "a.md")
+        profiler.add("write", 0.25, "a.md")
+        profiler.add("read", 1.0, "b.md")
+
+        summary = profiler.to_dict(slowest=1)
+        self.assertEqual(summary["stages"]["read"], {"total": 1.5, "calls": 2})
+        self.assertEqual(summary["pages"]["count"], 2)
+        self.assertEqual(summary["pages"]["max"], 1.0)
+        self.assertEqual(summary["slowest"], [{"page": "b.md", "seconds": 1.0}])
+
+    def test_drain_and_merge(self):
+        worker = BuildProfiler()
+        worker.add("parse", 2.0, "a.md")
+        data = worker.drain()
+        self.assertEqual(worker.to_dict()["stages"], {})
+
+        parent = BuildProfiler()
+        parent.add("parse", 1.0, "b.md")
+        parent.merge(data)
+        self.assertEqual(parent.to_dict()["stages"]["parse"], {"total": 3.0, "calls": 2})
+
+    def test_profile_stage_is_noop_when_disabled(self):
+        self.assertIsNone(active_profiler())
+        with profile_stage("read", "a.md"):
+            pass
+        self.assertIsNone(active_profiler())
+
+    def test_profiled_records_when_enabled(self):
+        @profiled("square")
+        def square(x):
+            return x * x
+
+        self.assertEqual(square(3), 9)
+        profiler = enable_profiling()
+        self.assertEqual(square(4), 16)
+        text_to_textnodes("**bold**")
+        stages = profiler.to_dict()["stages"]
+        self.assertEqual(stages["square"]["calls"], 1)
+        self.assertEqual(stages["inline"]["calls"], 1)
+
+    def test_write_json(self):
+        profiler = BuildProfiler()
+        profiler.add("read", 0.5, "a.md")
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "profile.json"
+            profiler.write_json(path)
+            self.assertEqual(json.loads(path.read_text())["pages"]["count"], 1)
+
+    def test_report_lists_slowest_pages(self):
+        profiler = BuildProfiler()
+        profiler.add("read", 0.5, "slow.md")
+        self.assertIn("slow.md", profiler.report())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,96 @@
+import os
+import tempfile
+import unittest
+from pathlib import Path
+
+from content_discovery import DirectoryIndex, discover_pages, is_ignored, load_ignore_patterns
+
+
+class TestIgnorePatterns(unittest.TestCase):
+    def test_name_patterns_match_any_component(self):
+        patterns = ["*.swp", "drafts/"]
+        self.assertTrue(is_ignored("blog/.post.md.swp", False, patterns))
+        self.assertTrue(is_ignored("blog/drafts", True, patterns))
+        self.assertFalse(is_ignored("blog/drafts", False, patterns))
+        self.assertFalse(is_ignored("blog/post.md", False, patterns))
+
+    def test_slash_patterns_match_from_the_root(self):
+        patterns = ["/blog/old", "notes/*.md"]
+        self.assertTrue(is_ignored("blog/old", True, patterns))
+        self.assertFalse(is_ignored("archive/blog/old", True, patterns))
+        self.assertTrue(is_ignored("notes/a.md", False, patterns))
+
+    def test_ignore_file_extends_defaults(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            (Path(tmp) / ".ssgignore").write_text("# comment\n\ndrafts/\n")
+            patterns = load_ignore_patterns(tmp)
+            self.assertIn(".git/", patterns)
+            self.assertEqual(patterns[-1], "drafts/")
+
+
+class TestDiscoverPages(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self.tmp.name)
+        self.content = self.root / "content"
+        for relative in ("index.md", "blog/a/index.md", "blog/b/index.md", "drafts/x/index.md"):
+            (self.content / relative).parent.mkdir(parents=True, exist_ok=True)
+            (self.content / relative).write_text("# Page")
+        (self.content / "blog" / "a" / ".index.md.swp").write_text("swap")
+        (self.content / ".git").mkdir()
+        (self.content / ".git" / "HEAD.md").write_text("not content")
+        (self.content / ".ssgignore").write_text("drafts/\n")
+        self.dest = self.root / "docs"
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def relative_dests(self, pages):
+        return [dest.relative_to(self.dest).as_posix() for _, dest in pages]
+
+    def test_skips_ignored_entries(self):
+        self.assertEqual(
+            self.relative_dests(discover_pages(self.content, self.dest)),
+            ["blog/a/index.html", "blog/b/index.html", "index.html"],
+        )
+
+    def test_index_reuses_unchanged_directories(self):
+        old = 10**9
+        for directory in (self.content, self.content / "blog", self.content / "blog" / "a"):
+            os.utime(directory, ns=(old, old))
+        index = DirectoryIndex(self.root / "index.json")
+        discover_pages(self.content, self.dest, index)
+        index.save()
+
+        # A file added behind an unchanged directory mtime is not seen,
+        # which shows the stored listing was used instead of a scan.
+        (self.content / "blog" / "a" / "extra.md").write_text("# Extra")
+        os.utime(self.content / "blog" / "a", ns=(old, old))
+        (self.content / "blog" / "c").mkdir()
+        (self.content / "blog" / "c" / "index.md").write_text("# C")
+        os.utime(self.content / "blog", ns=(old, old))
+
+        pages = discover_pages(self.content, self.dest, DirectoryIndex.load(self.root / "index.json"))
+        self.assertEqual(
+            self.relative_dests(pages),
+            ["blog/a/index.html", "blog/b/index.html", "index.html"],
+        )
+
+        os.utime(self.content / "blog")
+        pages = discover_pages(self.content, self.dest, DirectoryIndex.load(self.root / "index.json"))
+        self.assertIn("blog/c/index.html", self.relative_dests(pages))
+
+    def test_changed_ignore_file_resets_index(self):
+        os.utime(self.content, ns=(10**9, 10**9))
+        index = DirectoryIndex(self.root / "index.json")
+        discover_pages(self.content, self.dest, index)
+        self.assertIn("", index.entries)
+
+        (self.content / ".ssgignore").write_text("")
+        os.utime(self.content, ns=(10**9, 10**9))
+        pages = discover_pages(self.content, self.dest, index)
+        self.assertIn("drafts/x/index.html", self.relative_dests(pages))
+
+
+if __name__ == "__main__":
+    unittest.main()
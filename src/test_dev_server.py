@@ -0,0 +1,95 @@
+import tempfile
+import threading
+import unittest
+import urllib.error
+import urllib.request
+from http.server import ThreadingHTTPServer
+from pathlib import Path
+
+from dev_server import LIVERELOAD_SCRIPT, DevRequestHandler, DevServer
+
+
+class TestDevServer(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        root = Path(self.tmp.name)
+        self.content = root / "content"
+        (self.content / "blog").mkdir(parents=True)
+        (self.content / "index.md").write_text("# Home\n\nWelcome")
+        (self.content / "blog" / "index.md").write_text("# Blog\n\nPosts")
+        self.static = root / "static"
+        self.static.mkdir()
+        (self.static / "index.css").write_text("body {}")
+        (root / "secret.txt").write_text("secret")
+        self.template = root / "template.html"
+        self.template.write_text("<title>{{ Title }}</title><body>{{ Content }}</body>")
+        self.server = DevServer(self.content, self.static, self.template)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_source_for(self):
+        self.assertEqual(self.server.source_for("/"), self.content / "index.md")
+        self.assertEqual(self.server.source_for("/blog"), self.content / "blog" / "index.md")
+        self.assertEqual(
+            self.server.source_for("/blog/index.html"),
+            self.content / "blog" / "index.md",
+        )
+        self.assertIsNone(self.server.source_for("/missing"))
+        self.assertIsNone(self.server.source_for("/../content"))
+
+    def test_static_file_for_stays_inside_static(self):
+        self.assertEqual(
+            self.server.static_file_for("/index.css"),
+            (self.static / "index.css").resolve(),
+        )
+        self.assertIsNone(self.server.static_file_for("/../secret.txt"))
+        self.assertIsNone(self.server.static_file_for("/"))
+
+    def test_render_injects_livereload_and_caches(self):
+        source = self.content / "blog" / "index.md"
+        html = self.server.render(source)
+        self.assertIn("<p>Posts</p>", html)
+        self.assertIn(f"{LIVERELOAD_SCRIPT}</body>", html)
+
+        source.write_text("# Blog\n\nEdited")
+        self.assertIs(self.server.render(source), html)
+
+        self.server.invalidate({"content": {source}, "static": set(), "template": set()})
+        self.assertIn("<p>Edited</p>", self.server.render(source))
+        self.assertEqual(self.server.generation, 1)
+
+    def test_template_change_clears_every_page(self):
+        home = self.content / "index.md"
+        self.server.render(home)
+        self.template.write_text("<main>{{ Content }}</main>")
+        self.server.invalidate({"content": set(), "static": set(), "template": {self.template}})
+        self.assertTrue(self.server.render(home).startswith("<main>"))
+
+    def test_wait_for_reload(self):
+        self.assertEqual(self.server.wait_for_reload(0, timeout=0), 0)
+        self.server.invalidate({"content": set(), "static": set(), "template": set()})
+        self.assertEqual(self.server.wait_for_reload(0, timeout=0), 1)
+
+    def test_http_requests(self):
+        httpd = ThreadingHTTPServer(("127.0.0.1", 0), DevRequestHandler)
+        httpd.dev_server = self.server
+        thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+        thread.start()
+        base = f"http://127.0.0.1:{httpd.server_address[1]}"
+        try:
+            with urllib.request.urlopen(f"{base}/blog") as response:
+                self.assertIn(b"<p>Posts</p>", response.read())
+            with urllib.request.urlopen(f"{base}/index.css") as response:
+                self.assertEqual(response.headers["Content-Type"], "text/css")
+            with self.assertRaises(urllib.error.HTTPError) as ctx:
+                urllib.request.urlopen(f"{base}/nope")
+            self.assertEqual(ctx.exception.code, 404)
+            ctx.exception.close()
+        finally:
+            httpd.shutdown()
+            httpd.server_close()
+
+
+if __name__ == "__main__":
+    unittest.main()
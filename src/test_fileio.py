@@ -0,0 +1,172 @@
+import os
+import tempfile
+import unittest
+from pathlib import Path
+
+from fileio import (
+    COMPARE_BLOCK_SIZE,
+    AtomicFile,
+    atomic_write,
+    copy_file,
+    copy_files,
+    files_match,
+    make_parent_dirs,
+    read_text,
+    write_if_changed,
+)
+
+
+class TestReadText(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self.tmp.name)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_small_file(self):
+        path = self.root / "page.md"
+        path.write_text("# Título\n", encoding="utf-8")
+        self.assertEqual(read_text(path), "# Título\n")
+
+    def test_mmap_path_matches_plain_read(self):
+        path = self.root / "page.md"
+        path.write_text("# Título\n\n" + "text " * 1000, encoding="utf-8")
+        self.assertEqual(read_text(path, mmap_threshold=1), path.read_text(encoding="utf-8"))
+
+    def test_empty_file(self):
+        path = self.root / "empty.md"
+        path.touch()
+        self.assertEqual(read_text(path, mmap_threshold=0), "")
+
+
+class TestAtomicWrite(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self.tmp.name)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_writes_chunks_and_leaves_no_temp_file(self):
+        path = self.root / "index.html"
+        path.write_text("old")
+        atomic_write(path, ["<p>", "new", "</p>"])
+        self.assertEqual(path.read_text(), "<p>new</p>")
+        self.assertEqual([p.name for p in self.root.iterdir()], ["index.html"])
+
+    def test_failure_keeps_old_file(self):
+        path = self.root / "index.html"
+        path.write_text("old")
+
+        def chunks():
+            yield "partial"
+            raise ValueError("boom")
+
+        with self.assertRaises(ValueError):
+            atomic_write(path, chunks())
+        self.assertEqual(path.read_text(), "old")
+        self.assertEqual([p.name for p in self.root.iterdir()], ["index.html"])
+
+    def test_atomic_file_streams_and_keeps_identical_file(self):
+        path = self.root / "feed.xml"
+        output = AtomicFile(path)
+        output.write("<a>")
+        self.assertFalse(path.exists())
+        output.write("</a>")
+        self.assertTrue(output.commit(skip_unchanged=True))
+        os.utime(path, ns=(0, 0))
+
+        output = AtomicFile(path)
+        output.writelines(["<a>", "</a>"])
+        self.assertFalse(output.commit(skip_unchanged=True))
+        self.assertEqual(path.stat().st_mtime_ns, 0)
+        self.assertEqual([p.name for p in self.root.iterdir()], ["feed.xml"])
+
+    def test_write_if_changed_keeps_identical_file(self):
+        path = self.root / "index.html"
+        self.assertTrue(write_if_changed(path, ["<p>", "a</p>"]))
+        os.utime(path, ns=(10**9, 10**9))
+
+        self.assertFalse(write_if_changed(path, ["<p>a</p>"]))
+        self.assertEqual(path.stat().st_mtime_ns, 10**9)
+
+        self.assertTrue(write_if_changed(path, ["<p>b</p>"]))
+        self.assertEqual(path.read_text(), "<p>b</p>")
+
+    def test_write_if_changed_compares_past_the_first_block(self):
+        path = self.root / "index.html"
+        text = "a" * COMPARE_BLOCK_SIZE
+        self.assertTrue(write_if_changed(path, [text, "b"]))
+        self.assertFalse(write_if_changed(path, iter([text, "b"])))
+        self.assertTrue(write_if_changed(path, [text, "c"]))
+        self.assertEqual(path.read_text()[-1], "c")
+        self.assertEqual([p.name for p in self.root.iterdir()], ["index.html"])
+
+    def test_files_match(self):
+        a, b = self.root / "a.bin", self.root / "b.bin"
+        a.write_bytes(b"x" * COMPARE_BLOCK_SIZE + b"1")
+        b.write_bytes(b"x" * COMPARE_BLOCK_SIZE + b"1")
+        self.assertTrue(files_match(a, b))
+        b.write_bytes(b"x" * COMPARE_BLOCK_SIZE + b"2")
+        self.assertFalse(files_match(a, b))
+        b.write_bytes(b"x")
+        self.assertFalse(files_match(a, b))
+        self.assertFalse(files_match(a, self.root / "missing.bin"))
+
+
+class TestMakeParentDirs(unittest.TestCase):
+    def test_creates_each_directory_once(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            root = Path(tmp)
+            paths = [
+                root / "index.html",
+                root / "blog" / "index.html",
+                root / "blog" / "a" / "index.html",
+                root / "blog" / "b" / "index.html",
+                root / "blog" / "b" / "extra.html",
+            ]
+            self.assertEqual(make_parent_dirs(paths), 2)
+            self.assertTrue((root / "blog" / "a").is_dir())
+            self.assertTrue((root / "blog" / "b").is_dir())
+
+
+class TestCopyFile(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self.tmp.name)
+        self.src = self.root / "image.png"
+        self.src.write_bytes(b"png" * 1000)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_modes_produce_identical_files(self):
+        for mode in ("copy", "hardlink", "reflink"):
+            with self.subTest(mode=mode):
+                dest = self.root / f"{mode}.png"
+                dest.write_bytes(b"old")
+                copy_file(self.src, dest, mode)
+                self.assertEqual(dest.read_bytes(), self.src.read_bytes())
+                self.assertEqual(dest.stat().st_mtime_ns, self.src.stat().st_mtime_ns)
+
+    def test_hardlink_shares_the_inode(self):
+        dest = self.root / "linked.png"
+        copy_file(self.src, dest, "hardlink")
+        self.assertTrue(dest.samefile(self.src))
+        copy_file(self.src, dest, "hardlink")
+        self.assertEqual(sorted(p.name for p in self.root.iterdir()), ["image.png", "linked.png"])
+
+    def test_unknown_mode(self):
+        with self.assertRaises(ValueError):
+            copy_file(self.src, self.root / "dest.png", "symlink")
+
+    def test_copy_files_on_threads(self):
+        pairs = [(self.src, self.root / f"{n}.png") for n in range(8)]
+        self.assertEqual(copy_files(pairs, workers=4), 8)
+        for _, dest in pairs:
+            self.assertEqual(dest.read_bytes(), self.src.read_bytes())
+
+
+if __name__ == "__main__":
+    unittest.main()
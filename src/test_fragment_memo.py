@@ -0,0 +1,52 @@
+import pickle
+import unittest
+
+from block_markdown import markdown_to_html_node
+from fragment_memo import FragmentMemo
+
+
+class TestFragmentMemo(unittest.TestCase):
+    def test_get_and_put_count_hits_and_misses(self):
+        memo = FragmentMemo()
+        self.assertIsNone(memo.get("a"))
+        memo.put("a", "<p>a</p>")
+        self.assertEqual(memo.get("a"), "<p>a</p>")
+        self.assertEqual((memo.hits, memo.misses), (1, 1))
+        self.assertEqual(memo.hit_rate(), 0.5)
+
+    def test_evicts_least_recently_used(self):
+        memo = FragmentMemo(max_entries=2)
+        memo.put("a", "A")
+        memo.put("b", "B")
+        memo.get("a")
+        memo.put("c", "C")
+        self.assertEqual(len(memo), 2)
+        self.assertIsNone(memo.get("b"))
+        self.assertEqual(memo.get("a"), "A")
+
+    def test_drain_and_add_counts(self):
+        memo = FragmentMemo()
+        memo.get("a")
+        self.assertEqual(memo.drain_counts(), (0, 1))
+        self.assertEqual((memo.hits, memo.misses), (0, 0))
+        memo.add_counts(3, 2)
+        self.assertEqual((memo.hits, memo.misses), (3, 2))
+
+    def test_pickles_empty(self):
+        memo = FragmentMemo(max_entries=5)
+        memo.put("a", "A")
+        copy = pickle.loads(pickle.dumps(memo))
+        self.assertEqual((copy.max_entries, len(copy)), (5, 0))
+
+    def test_memoized_render_matches_plain_render(self):
+        markdown = "# Title\n\n> Notice\n\n- a **b**\n- c\n\n```\ncode\n```\n\n> Notice"
+        memo = FragmentMemo()
+        expected = markdown_to_html_node(markdown).to_html()
+        self.assertEqual(markdown_to_html_node(markdown, memo).to_html(), expected)
+        self.assertEqual((memo.hits, memo.misses), (1, 4))
+        self.assertEqual(markdown_to_html_node(markdown, memo).to_html(), expected)
+        self.assertEqual(memo.hits, 6)
+
+
+if __name__ == "__main__":
+    unittest.main()
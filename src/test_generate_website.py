@@ -1,70 +1,428 @@
+import json
+import os
+import shutil
 import tempfile
 import unittest
 from pathlib import Path
 
-from generate_website import TitleNotFoundError, extract_title
+from asset_manifest import AssetManifest
+from fragment_memo import FragmentMemo
+from generate_website import (
+    PageBuildError,
+    TitleNotFoundError,
+    discover_pages,
+    extract_title,
+    generate_pages_recursive,
+    parse_page,
+    split_front_matter,
+    sync_static_directory,
+)
+from search_index import SEARCH_DIR_NAME, SEARCH_META_NAME
+from site_outputs import SITEMAP_NAME, SiteOutputs
 
 
 class TestExtractTitle(unittest.TestCase):
-    def write_temp_markdown(self, content):
-        with tempfile.NamedTemporaryFile(
-            delete=False,
-            mode="w",
-            encoding="utf-8",
-            suffix=".md",
-        ) as tmp:
-            tmp.write(content)
-            return tmp.name
-
     def test_valid_title(self):
-        path = self.write_temp_markdown("# My Title")
-        self.assertEqual(extract_title(path), "My Title")
-        Path(path).unlink()
+        self.assertEqual(extract_title("# My Title"), "My Title")
 
     def test_valid_title_with_trailing_space(self):
-        path = self.write_temp_markdown("# My Title ")
-        self.assertEqual(extract_title(path), "My Title ")
-        Path(path).unlink()
+        self.assertEqual(extract_title("# My Title "), "My Title ")
 
     def test_title_with_special_characters(self):
-        path = self.write_temp_markdown("# T!t1e @ 2025")
-        self.assertEqual(extract_title(path), "T!t1e @ 2025")
-        Path(path).unlink()
+        self.assertEqual(extract_title("# T!t1e @ 2025"), "T!t1e @ 2025")
 
     def test_title_with_only_hash(self):
-        path = self.write_temp_markdown("# ")
-        self.assertEqual(extract_title(path), "")
-        Path(path).unlink()
+        self.assertEqual(extract_title("# "), "")
+
+    def test_title_is_only_the_first_line(self):
+        self.assertEqual(extract_title("# Title\r\n\nBody text\n"), "Title")
 
     def test_no_title(self):
-        path = self.write_temp_markdown("No heading here")
         with self.assertRaises(TitleNotFoundError):
-            extract_title(path)
-        Path(path).unlink()
+            extract_title("No heading here")
 
     def test_title_not_at_start(self):
-        path = self.write_temp_markdown("Some text\n# Not a title")
         with self.assertRaises(TitleNotFoundError):
-            extract_title(path)
-        Path(path).unlink()
+            extract_title("Some text\n# Not a title")
 
     def test_multiple_hashes(self):
-        path = self.write_temp_markdown("## Subtitle")
         with self.assertRaises(TitleNotFoundError):
-            extract_title(path)
-        Path(path).unlink()
+            extract_title("## Subtitle")
 
     def test_empty_string(self):
-        path = self.write_temp_markdown("")
         with self.assertRaises(TitleNotFoundError):
-            extract_title(path)
-        Path(path).unlink()
+            extract_title("")
 
     def test_whitespace_only(self):
-        path = self.write_temp_markdown("   ")
         with self.assertRaises(TitleNotFoundError):
-            extract_title(path)
-        Path(path).unlink()
+            extract_title("   ")
+
+
+class TestFrontMatter(unittest.TestCase):
+    def test_no_front_matter(self):
+        self.assertEqual(split_front_matter("# Title\n"), ({}, "# Title\n"))
+
+    def test_front_matter(self):
+        metadata, body = split_front_matter(
+            '---\nTitle: "Custom"\ndate: 2025-01-02\nnot a pair\n---\n# Heading\n',
+        )
+        self.assertEqual(metadata, {"title": "Custom", "date": "2025-01-02"})
+        self.assertEqual(body, "# Heading\n")
+
+    def test_unterminated_front_matter_is_body(self):
+        markdown = "---\ntitle: x\n# Heading"
+        self.assertEqual(split_front_matter(markdown), ({}, markdown))
+
+    def test_parse_page_prefers_front_matter_title(self):
+        self.assertEqual(
+            parse_page("---\ntitle: Custom\n---\n# Heading\n\nText"),
+            ("Custom", {"title": "Custom"}, "# Heading\n\nText"),
+        )
+        self.assertEqual(
+            parse_page("---\ndate: 2025\n---\n# Heading"),
+            ("Heading", {"date": "2025"}, "# Heading"),
+        )
+
+
+class TestGeneratePages(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        root = Path(self.tmp.name)
+        self.content = root / "content"
+        for name in ("a", "b", "c"):
+            (self.content / name).mkdir(parents=True)
+            (self.content / name / "index.md").write_text(f"# Page {name}")
+        (self.content / "index.md").write_text("# Home")
+        (self.content / "notes.txt").write_text("not markdown")
+        self.template = root / "template.html"
+        self.template.write_text("<title>{{ Title }}</title>{{ Content }}")
+        self.dest = root / "docs"
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_discover_pages(self):
+        pages = discover_pages(self.content, self.dest)
+        self.assertEqual(
+            [dest.relative_to(self.dest).as_posix() for _, dest in pages],
+            ["a/index.html", "b/index.html", "c/index.html", "index.html"],
+        )
+
+    def test_title_and_front_matter_in_output(self):
+        (self.content / "a" / "index.md").write_text(
+            "---\ntitle: Custom A\n---\n# Page a\n\nBody",
+        )
+        generate_pages_recursive(self.content, self.template, self.dest, "/")
+        self.assertEqual(
+            (self.dest / "a" / "index.html").read_text(),
+            "<title>Custom A</title><div><h1>Page a</h1><p>Body</p></div>",
+        )
+        self.assertTrue((self.dest / "b" / "index.html").read_text().startswith("<title>Page b</title>"))
+
+    def test_skip_unchanged_counts_and_keeps_mtime(self):
+        self.assertEqual(
+            generate_pages_recursive(self.content, self.template, self.dest, "/"),
+            (4, 0),
+        )
+        page = self.dest / "a" / "index.html"
+        os.utime(page, ns=(10**9, 10**9))
+        (self.content / "b" / "index.md").write_text("# Page b changed")
+
+        for jobs in (1, 2):
+            with self.subTest(jobs=jobs):
+                self.assertEqual(
+                    generate_pages_recursive(
+                        self.content,
+                        self.template,
+                        self.dest,
+                        "/",
+                        jobs=jobs,
+                        skip_unchanged=True,
+                    ),
+                    (1, 3) if jobs == 1 else (0, 4),
+                )
+                self.assertEqual(page.stat().st_mtime_ns, 10**9)
+
+    def test_asset_change_rebuilds_only_pages_using_it(self):
+        for name in ("a", "b", "c"):
+            (self.content / name / "index.md").write_text(f"# Page {name}\n\n![x](/images/{name}.png)")
+        manifest_path = self.dest.parent / "manifest.json"
+        names = {"images/a.png": "images/a.1.png", "images/b.png": "images/b.1.png"}
+
+        def build(**kwargs):
+            assets = AssetManifest({source: {"path": path} for source, path in names.items()})
+            return generate_pages_recursive(
+                self.content,
+                self.template,
+                self.dest,
+                "/",
+                manifest_path=manifest_path,
+                assets=assets,
+                **kwargs,
+            )
+
+        self.assertEqual(build(), (4, 0))
+        names["images/b.png"] = "images/b.2.png"
+        self.assertEqual(build(jobs=2), (1, 0))
+        self.assertIn("/images/b.2.png", (self.dest / "b" / "index.html").read_text())
+
+        # c refers to an image that was not fingerprinted before.
+        names["images/c.png"] = "images/c.1.png"
+        self.assertEqual(build(async_io=True), (1, 0))
+        self.assertIn("/images/c.1.png", (self.dest / "c" / "index.html").read_text())
+
+        names["images/a.png"] = "images/a.2.png"
+        self.assertEqual(build(), (1, 0))
+        self.assertEqual(build(), (0, 0))
+
+    def test_turning_fingerprinting_on_rebuilds_every_page(self):
+        self.template.write_text('<link href="/index.css">{{ Content }}')
+        manifest_path = self.dest.parent / "manifest.json"
+
+        def build(assets=None):
+            return generate_pages_recursive(
+                self.content,
+                self.template,
+                self.dest,
+                "/",
+                manifest_path=manifest_path,
+                assets=assets,
+            )
+
+        self.assertEqual(build(), (4, 0))
+        assets = AssetManifest({"index.css": {"path": "index.1.css"}})
+        self.assertEqual(build(assets), (4, 0))
+        self.assertIn('href="/index.1.css"', (self.dest / "index.html").read_text())
+        self.assertEqual(build(assets), (0, 0))
+        self.assertEqual(build(), (4, 0))
+        self.assertIn('href="/index.css"', (self.dest / "index.html").read_text())
+
+    def test_parallel_matches_serial(self):
+        generate_pages_recursive(self.content, self.template, self.dest, "/")
+        serial = {p: p.read_text() for p in self.dest.rglob("*.html")}
+
+        for page in serial:
+            page.unlink()
+        generate_pages_recursive(self.content, self.template, self.dest, "/", jobs=2)
+        parallel = {p: p.read_text() for p in self.dest.rglob("*.html")}
+
+        self.assertEqual(serial, parallel)
+
+    def test_fragment_memo_counts_from_workers(self):
+        for name in ("a", "b", "c"):
+            (self.content / name / "index.md").write_text(f"# Page {name}\n\nShared footer")
+        memo = FragmentMemo()
+        generate_pages_recursive(self.content, self.template, self.dest, "/", jobs=2, memo=memo)
+        self.assertEqual(memo.hits + memo.misses, 7)
+        self.assertEqual(
+            (self.dest / "c" / "index.html").read_text(),
+            "<title>Page c</title><div><h1>Page c</h1><p>Shared footer</p></div>",
+        )
+
+    def test_async_matches_serial(self):
+        generate_pages_recursive(self.content, self.template, self.dest, "/site/")
+        serial = {p: p.read_text() for p in self.dest.rglob("*.html")}
+
+        for page in serial:
+            page.unlink()
+        self.assertEqual(
+            generate_pages_recursive(self.content, self.template, self.dest, "/site/", async_io=True),
+            (4, 0),
+        )
+        self.assertEqual(serial, {p: p.read_text() for p in self.dest.rglob("*.html")})
+
+    def test_async_aggregates_failures(self):
+        (self.content / "b" / "index.md").write_text("no title")
+
+        with self.assertRaises(PageBuildError) as ctx:
+            generate_pages_recursive(self.content, self.template, self.dest, "/", async_io=True)
+
+        self.assertEqual([p.parent.name for p, _ in ctx.exception.failures], ["b"])
+        self.assertTrue((self.dest / "c" / "index.html").exists())
+
+    def test_site_outputs_from_one_pass(self):
+        root = Path(self.tmp.name)
+        outputs = SiteOutputs(self.dest, "https://example.com", root / "records.jsonl")
+        manifest = root / "manifest.json"
+        for jobs, async_io in ((1, False), (2, False), (1, True)):
+            with self.subTest(jobs=jobs, async_io=async_io):
+                shutil.rmtree(self.dest, ignore_errors=True)
+                for path in (manifest, outputs.records_path):
+                    path.unlink(missing_ok=True)
+                generate_pages_recursive(
+                    self.content,
+                    self.template,
+                    self.dest,
+                    "/",
+                    manifest_path=manifest,
+                    jobs=jobs,
+                    async_io=async_io,
+                    outputs=outputs,
+                )
+                self.assertEqual(
+                    self.search_shard("pa"),
+                    {"page": [0, 1, 1, 1, 1, 1]},
+                )
+
+        # Up-to-date pages are listed from their stored records.
+        (self.content / "b" / "index.md").write_text("# Page b\n\nNew")
+        self.assertEqual(
+            generate_pages_recursive(
+                self.content,
+                self.template,
+                self.dest,
+                "/",
+                manifest_path=manifest,
+                outputs=outputs,
+            ),
+            (1, 0),
+        )
+        self.assertEqual(self.search_shard("ne"), {"new": [1, 1]})
+        self.assertEqual(self.search_shard("pa"), {"page": [0, 1, 1, 1, 1, 1]})
+        self.assertEqual((self.dest / SITEMAP_NAME).read_text().count("<url>"), 4)
+
+    def test_records_follow_pages_built_without_them(self):
+        root = Path(self.tmp.name)
+        outputs = SiteOutputs(self.dest, "https://example.com", root / "records.jsonl")
+
+        def build(outputs=None):
+            return generate_pages_recursive(
+                self.content,
+                self.template,
+                self.dest,
+                "/",
+                manifest_path=root / "manifest.json",
+                outputs=outputs,
+            )
+
+        build(outputs)
+        (self.content / "a" / "index.md").write_text("# Renamed a")
+        self.assertEqual(build(), (1, 0))
+        self.assertEqual(build(outputs), (1, 0))
+        self.assertEqual(self.search_titles()[0], "Renamed a")
+        self.assertEqual(build(outputs), (0, 0))
+
+    def test_records_follow_pages_built_in_a_failed_build(self):
+        root = Path(self.tmp.name)
+        outputs = SiteOutputs(self.dest, "https://example.com", root / "records.jsonl")
+
+        def build():
+            return generate_pages_recursive(
+                self.content,
+                self.template,
+                self.dest,
+                "/",
+                manifest_path=root / "manifest.json",
+                outputs=outputs,
+            )
+
+        build()
+        (self.content / "a" / "index.md").write_text("# Renamed a")
+        (self.content / "b" / "index.md").write_text("no title")
+        with self.assertRaises(PageBuildError):
+            build()
+        (self.content / "b" / "index.md").write_text("# Page b")
+        self.assertEqual(build(), (2, 0))
+        self.assertEqual(self.search_titles()[:2], ["Renamed a", "Page b"])
+
+    def search_titles(self):
+        meta = json.loads((self.dest / SEARCH_DIR_NAME / SEARCH_META_NAME).read_text())
+        return [doc[1] for doc in meta["docs"]]
+
+    def search_shard(self, key):
+        search = self.dest / SEARCH_DIR_NAME
+        meta = json.loads((search / SEARCH_META_NAME).read_text())
+        self.assertEqual([doc[0] for doc in meta["docs"]], ["/a/", "/b/", "/c/", "/"])
+        return json.loads((search / f"{key}.json").read_text())
+
+    def test_serial_and_parallel_aggregate_failures(self):
+        (self.content / "a" / "index.md").write_text("no title")
+        (self.content / "b" / "index.md").write_text("**unclosed")
+
+        for jobs in (1, 2):
+            with self.subTest(jobs=jobs):
+                shutil.rmtree(self.dest, ignore_errors=True)
+                with self.assertRaises(PageBuildError) as ctx:
+                    generate_pages_recursive(
+                        self.content,
+                        self.template,
+                        self.dest,
+                        "/",
+                        jobs=jobs,
+                    )
+
+                failed = [from_path.parent.name for from_path, _ in ctx.exception.failures]
+                self.assertEqual(failed, ["a", "b"])
+                self.assertTrue((self.dest / "c" / "index.html").exists())
+
+
+class TestSyncStaticDirectory(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        root = Path(self.tmp.name)
+        self.src = root / "static"
+        (self.src / "images").mkdir(parents=True)
+        (self.src / "index.css").write_text("body {}")
+        (self.src / "images" / "a.png").write_bytes(b"png")
+        self.dest = root / "docs"
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_first_sync_copies_everything(self):
+        self.assertEqual(sync_static_directory(self.src, self.dest), (2, 0, 0))
+        self.assertEqual((self.dest / "images" / "a.png").read_bytes(), b"png")
+
+    def test_second_sync_copies_nothing(self):
+        sync_static_directory(self.src, self.dest)
+        self.assertEqual(sync_static_directory(self.src, self.dest), (0, 0, 2))
+
+    def test_changed_file_is_copied(self):
+        sync_static_directory(self.src, self.dest)
+        (self.src / "index.css").write_text("body { margin: 0 }")
+        self.assertEqual(sync_static_directory(self.src, self.dest), (1, 0, 1))
+        self.assertEqual((self.dest / "index.css").read_text(), "body { margin: 0 }")
+
+    def test_checksum_detects_same_size_change(self):
+        sync_static_directory(self.src, self.dest)
+        (self.dest / "index.css").write_text("body ()")
+        shutil.copystat(self.src / "index.css", self.dest / "index.css")
+
+        self.assertEqual(sync_static_directory(self.src, self.dest), (0, 0, 2))
+        self.assertEqual(
+            sync_static_directory(self.src, self.dest, checksum=True),
+            (1, 0, 1),
+        )
+
+    def test_orphans_removed_but_html_kept(self):
+        sync_static_directory(self.src, self.dest)
+        (self.dest / "old").mkdir()
+        (self.dest / "old" / "stale.png").write_bytes(b"old")
+        (self.dest / "blog").mkdir()
+        (self.dest / "blog" / "index.html").write_text("<p>page</p>")
+
+        self.assertEqual(sync_static_directory(self.src, self.dest), (0, 1, 2))
+        self.assertFalse((self.dest / "old").exists())
+        self.assertTrue((self.dest / "blog" / "index.html").exists())
+
+    def test_generated_site_outputs_kept(self):
+        sync_static_directory(self.src, self.dest)
+        (self.dest / SITEMAP_NAME).write_text("<urlset/>")
+        (self.dest / SEARCH_DIR_NAME).mkdir()
+        (self.dest / SEARCH_DIR_NAME / "ba.json").write_text("{}")
+
+        self.assertEqual(sync_static_directory(self.src, self.dest), (0, 0, 2))
+        self.assertTrue((self.dest / SITEMAP_NAME).exists())
+        self.assertTrue((self.dest / SEARCH_DIR_NAME / "ba.json").exists())
+
+    def test_hardlink_mode_shares_the_source_file(self):
+        self.assertEqual(sync_static_directory(self.src, self.dest, mode="hardlink"), (2, 0, 0))
+        self.assertTrue((self.dest / "index.css").samefile(self.src / "index.css"))
+        self.assertEqual(sync_static_directory(self.src, self.dest, mode="hardlink"), (0, 0, 2))
+
+    def test_threaded_copy(self):
+        self.assertEqual(sync_static_directory(self.src, self.dest, workers=4), (2, 0, 0))
+        self.assertEqual((self.dest / "images" / "a.png").read_bytes(), b"png")
 
 
 if __name__ == "__main__":
@@ -1,6 +1,9 @@
+import io
+import pickle
 import unittest
 
-from htmlnode import HTMLNode, LeafNode, ParentNode
+from htmlnode import FragmentNode, HTMLNode, LeafNode, LinkUrl, ParentNode, join_chunks
+from url_resolver import UrlResolver
 
 
 class TestHTMLNode(unittest.TestCase):
@@ -123,6 +126,74 @@ class TestHTMLNode(unittest.TestCase):
             '<div id="wrapper"><p class="paragraph"><span class="text">text</span></p></div>',
         )
 
+    def test_iter_html_streams_chunks(self):
+        parent = ParentNode("div", [LeafNode("b", "x"), LeafNode(None, "y")], {"id": "a"})
+        self.assertEqual(
+            list(parent.iter_html()),
+            ['<div id="a">', "<b>x</b>", "y", "</div>"],
+        )
+
+    def test_write_html(self):
+        parent = ParentNode("ul", [ParentNode("li", [LeafNode("i", "item")])])
+        fp = io.StringIO()
+        parent.write_html(fp)
+        self.assertEqual(fp.getvalue(), "<ul><li><i>item</i></li></ul>")
+
+    def test_deeply_nested_to_html(self):
+        node = LeafNode(None, "core")
+        for _ in range(5000):
+            node = ParentNode("span", [node])
+        html = node.to_html()
+        self.assertTrue(html.startswith("<span>" * 5000 + "core"))
+        self.assertTrue(html.endswith("</span>" * 5000))
+
+    def test_leaf_nodes_share_empty_defaults(self):
+        first = LeafNode("b", "x")
+        second = LeafNode("i", "y")
+        self.assertIs(first.children, second.children)
+        self.assertIs(first.props, second.props)
+        self.assertEqual(first.props, {})
+        with self.assertRaises(TypeError):
+            first.props["class"] = "shared"
+
+    def test_nodes_have_no_instance_dict(self):
+        with self.assertRaises(AttributeError):
+            LeafNode("b", "x").extra = 1
+        with self.assertRaises(AttributeError):
+            ParentNode("div", []).extra = 1
+
+    def test_pickle_round_trip(self):
+        tree = ParentNode("p", [LeafNode("a", "x", {"href": "/"}), LeafNode(None, "y")])
+        copy = pickle.loads(pickle.dumps(tree))
+        self.assertEqual(copy.to_html(), tree.to_html())
+        self.assertIs(copy.children[1].props, tree.children[1].props)
+
+    def test_link_urls_are_resolved_when_serialized(self):
+        tree = ParentNode(
+            "p",
+            [LeafNode("a", "x", {"class": "nav", "href": LinkUrl("/blog/")}), LeafNode(None, "y")],
+        )
+        self.assertEqual(
+            list(tree.iter_html()),
+            ["<p>", '<a class="nav" href="', "/blog/", '">x</a>', "y", "</p>"],
+        )
+        self.assertEqual(
+            tree.to_html(UrlResolver("/site/")),
+            '<p><a class="nav" href="/site/blog/">x</a>y</p>',
+        )
+
+    def test_fragment_node_round_trips_segments(self):
+        tree = ParentNode("p", [LeafNode("img", "", {"src": LinkUrl("/a.png"), "alt": "a"})])
+        segments = join_chunks(tree.iter_chunks())
+        self.assertEqual(segments, ['<p><img src="', "/a.png", '" alt="a"></img></p>'])
+
+        fragment = FragmentNode(list(map(str, segments)))
+        self.assertEqual(fragment.to_html(), tree.to_html())
+        self.assertEqual(
+            ParentNode("div", [fragment]).to_html(UrlResolver("/site/")),
+            '<div><p><img src="/site/a.png" alt="a"></img></p></div>',
+        )
+
 
 if __name__ == "__main__":
     unittest.main()
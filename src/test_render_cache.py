@@ -0,0 +1,134 @@
+import os
+import pickle
+import tempfile
+import unittest
+from pathlib import Path
+
+from generate_website import generate_page
+from render_cache import RenderCache
+from url_resolver import UrlResolver
+
+
+class TestRenderCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self.tmp.name)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_get_missing_returns_none(self):
+        cache = RenderCache(self.root / "cache")
+        self.assertIsNone(cache.get(cache.key("# Title")))
+
+    def test_put_then_get(self):
+        cache = RenderCache(self.root / "cache")
+        key = cache.key("# Title")
+        cache.put(key, {"segments": ['<p><a href="', "/", '">é</a></p>']})
+        self.assertEqual(cache.get(key), {"segments": ['<p><a href="', "/", '">é</a></p>']})
+
+    def test_unreadable_entry_is_a_miss(self):
+        cache = RenderCache(self.root / "cache")
+        key = cache.key("# Title")
+        cache.put(key, {"segments": [""]})
+        cache._path(key).write_text("{")
+        self.assertIsNone(cache.get(key))
+
+    def test_key_depends_on_content(self):
+        cache = RenderCache(self.root / "cache")
+        self.assertEqual(cache.key("a"), cache.key("a"))
+        self.assertNotEqual(cache.key("a"), cache.key("b"))
+
+    # Entries are stored as JSON, so a string of n ASCII characters takes
+    # n + 2 bytes.
+
+    def test_evicts_least_recently_used(self):
+        cache = RenderCache(self.root / "cache", max_bytes=16)
+        old, recent = cache.key("old"), cache.key("recent")
+        cache.put(old, "12345")
+        cache.put(recent, "12345")
+        os.utime(cache._path(old), ns=(0, 0))
+        os.utime(cache._path(recent), ns=(10**9, 10**9))
+
+        cache.put(cache.key("new"), "12345")
+        self.assertIsNone(cache.get(old))
+        self.assertEqual(cache.get(recent), "12345")
+
+    def test_evicts_down_to_low_water_mark(self):
+        cache = RenderCache(self.root / "cache", max_bytes=100)
+        keys = [cache.key(str(n)) for n in range(10)]
+        for n, key in enumerate(keys):
+            cache.put(key, "x" * 8)
+            os.utime(cache._path(key), ns=(n * 10**9, n * 10**9))
+
+        cache.put(cache.key("new"), "x" * 8)
+        self.assertEqual(cache._size, 90)
+        self.assertIsNone(cache.get(keys[0]))
+        self.assertIsNone(cache.get(keys[1]))
+        self.assertEqual(cache.get(keys[2]), "x" * 8)
+
+    def test_replacing_an_entry_keeps_the_size(self):
+        cache = RenderCache(self.root / "cache")
+        key = cache.key("a")
+        cache.put(key, "12345")
+        cache.put(key, "123")
+        self.assertEqual(cache._size, 5)
+        self.assertEqual(RenderCache(self.root / "cache")._scan_size(), 5)
+
+    def test_pickle_keeps_settings(self):
+        cache = RenderCache(self.root / "cache", max_bytes=10)
+        copy = pickle.loads(pickle.dumps(cache))
+        self.assertEqual(copy.directory, cache.directory)
+        self.assertEqual(copy.max_bytes, 10)
+
+    def test_generate_page_shares_body_across_resolvers(self):
+        source = self.root / "index.md"
+        source.write_text("# Title\n\n[home](/)")
+        template = self.root / "template.html"
+        template.write_text("{{ Content }}")
+        cache = RenderCache(self.root / "cache")
+
+        generate_page(source, template, self.root / "a.html", "/site/", cache)
+        key = cache.key(source.read_text())
+        self.assertEqual(
+            cache.get(key),
+            {"segments": ['<div><h1>Title</h1><p><a href="', "/", '">home</a></p></div>']},
+        )
+        cache.put(key, {"segments": ['<a href="', "/", '">cached</a>']})
+
+        generate_page(source, template, self.root / "b.html", "/site/", cache)
+        self.assertEqual((self.root / "b.html").read_text(), '<a href="/site/">cached</a>')
+
+        generate_page(
+            source,
+            template,
+            self.root / "c.html",
+            "/",
+            cache,
+            resolver=UrlResolver("/other/"),
+        )
+        self.assertEqual((self.root / "c.html").read_text(), '<a href="/other/">cached</a>')
+
+    def test_generate_page_records_come_from_the_cache_entry(self):
+        source = self.root / "index.md"
+        source.write_text("# Title\n\nEight words make this paragraph long enough for summaries.")
+        template = self.root / "template.html"
+        template.write_text("{{ Content }}")
+        cache = RenderCache(self.root / "cache")
+        key = cache.key(source.read_text())
+
+        # An entry cached without records is parsed again for them.
+        cache.put(key, {"segments": ["<p>cached</p>"]})
+        records = []
+        generate_page(source, template, self.root / "a.html", "/", cache, records=records)
+        self.assertEqual(records[0].terms["eight"], 1)
+        self.assertEqual(cache.get(key)["terms"]["eight"], 1)
+
+        cache.put(key, {"segments": ["<p>cached</p>"], "summary": "Cached", "terms": {"x": 2}})
+        generate_page(source, template, self.root / "b.html", "/", cache, records=records)
+        self.assertEqual((records[1].summary, records[1].terms), ("Cached", {"x": 2}))
+        self.assertEqual((self.root / "b.html").read_text(), "<p>cached</p>")
+
+
+if __name__ == "__main__":
+    unittest.main()
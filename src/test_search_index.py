@@ -0,0 +1,75 @@
+import json
+import tempfile
+import unittest
+from pathlib import Path
+
+from search_index import (
+    LOADER_NAME,
+    SEARCH_META_NAME,
+    ShardedSearchIndexWriter,
+    shard_file_name,
+    tokenize,
+)
+from site_outputs import PageRecord
+
+
+def record(terms):
+    return PageRecord("", "h", "T", "2024-01-01", "S", terms)
+
+
+class TestTokenize(unittest.TestCase):
+    def test_lowercases_and_splits_on_non_word_characters(self):
+        self.assertEqual(
+            tokenize("Elf-lord, Eä's snake_case 42"),
+            ["elf", "lord", "eä", "s", "snake_case", "42"],
+        )
+
+    def test_drops_overlong_tokens(self):
+        self.assertEqual(tokenize("a" * 33 + " ok"), ["ok"])
+
+    def test_shard_file_name(self):
+        self.assertEqual(shard_file_name("ba"), "ba.json")
+        self.assertEqual(shard_file_name("eä"), "_65c3a4.json")
+
+
+class TestShardedSearchIndexWriter(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.directory = Path(self.tmp.name) / "search"
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def read(self, name):
+        return json.loads((self.directory / name).read_text(encoding="utf-8"))
+
+    def test_delta_encoded_postings_in_prefix_shards(self):
+        writer = ShardedSearchIndexWriter(self.directory, "https://example.com/site/")
+        writer.add("/", record({"balrog": 2, "bow": 1}))
+        writer.add("/a/", record({"elf": 1}))
+        writer.add("/b/", record({"balrog": 1, "eä": 3}))
+        writer.add("/c/", record({"bag": 1, "balrog": 5}))
+        writer.close()
+
+        meta = self.read(SEARCH_META_NAME)
+        self.assertEqual(meta["shards"], ["ba", "bo", "el", "eä"])
+        self.assertEqual(meta["docs"][1], ["/site/a/", "T", "S"])
+        self.assertEqual(self.read("ba.json"), {"bag": [3, 1], "balrog": [0, 2, 2, 1, 1, 5]})
+        self.assertEqual(self.read("_65c3a4.json"), {"eä": [2, 3]})
+        self.assertTrue((self.directory / LOADER_NAME).read_text().startswith("//"))
+
+    def test_removes_shards_no_longer_used(self):
+        writer = ShardedSearchIndexWriter(self.directory, "https://example.com")
+        writer.add("/", record({"old": 1}))
+        writer.close()
+        writer = ShardedSearchIndexWriter(self.directory, "https://example.com")
+        writer.add("/", record({"new": 1}))
+        writer.close()
+        self.assertEqual(
+            sorted(path.name for path in self.directory.iterdir()),
+            [SEARCH_META_NAME, "ne.json", LOADER_NAME],
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
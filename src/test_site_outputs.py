@@ -0,0 +1,157 @@
+import json
+import os
+import tempfile
+import unittest
+from pathlib import Path
+
+from block_markdown import markdown_to_html_node
+from fragment_memo import FragmentMemo
+from search_index import SEARCH_DIR_NAME, SEARCH_META_NAME
+from site_outputs import (
+    FEED_NAME,
+    SITEMAP_NAME,
+    PageRecord,
+    PageRecordStore,
+    PageText,
+    SiteOutputs,
+    make_page_record,
+)
+
+
+class TestPageRecord(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.source = Path(self.tmp.name) / "index.md"
+        self.source.write_text("")
+        os.utime(self.source, (86400, 86400))
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_terms_summary_and_mtime_date(self):
+        body = (
+            "# Title\n\n[< Back](/)\n\n"
+            "The **first** real paragraph, with [a link](/x) and enough words.\n\n"
+            "- one\n- two"
+        )
+        for memo in (None, FragmentMemo()):
+            with self.subTest(memo=memo):
+                page_text = PageText()
+                markdown_to_html_node(body, memo, page_text)
+                record = make_page_record(self.source, "docs/index.html", "h", "Title", {}, page_text)
+                self.assertEqual(record.date, "1970-01-02")
+                self.assertEqual(
+                    record.summary,
+                    "The first real paragraph, with a link and enough words.",
+                )
+                self.assertEqual(record.terms["the"], 1)
+                self.assertEqual(record.terms["first"], 1)
+                self.assertEqual((record.terms["one"], record.terms["two"]), (1, 1))
+                self.assertNotIn("x", record.terms)
+                self.assertEqual(sorted(record.terms)[:3], ["a", "and", "back"])
+
+    def test_front_matter_date_and_description(self):
+        metadata = {"date": "2024-05-06", "description": "About"}
+        page_text = PageText("Summary", {"words": 1})
+        record = make_page_record(self.source, "d", "h", "T", metadata, page_text)
+        self.assertEqual((record.date, record.summary), ("2024-05-06", "About"))
+        self.assertEqual(record.terms, {"words": 1})
+
+
+class TestPageRecordStore(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = Path(self.tmp.name) / "records.jsonl"
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def record(self, dest, title):
+        return PageRecord(dest, f"hash of {title}", title, "2024-01-01", "", {"text": 1})
+
+    def test_carries_over_records_not_rendered_again(self):
+        store = PageRecordStore.load(self.path)
+        store.append(self.record("b", "B"))
+        store.append(self.record("a", "A"))
+        self.assertEqual([r.title for r in store.iter_records(["a", "b"])], ["A", "B"])
+        store.save()
+
+        store = PageRecordStore.load(self.path)
+        self.assertIn("a", store)
+        store.append(self.record("b", "B2"))
+        titles = [r.title for r in store.iter_records(["a", "b", "missing"])]
+        self.assertEqual(titles, ["A", "B2"])
+        store.save()
+
+        store = PageRecordStore.load(self.path)
+        self.assertEqual([r.title for r in store.iter_records(["b"])], ["B2"])
+        store.save()
+        self.assertNotIn("a", PageRecordStore.load(self.path))
+
+    def test_close_without_save_keeps_previous_store(self):
+        store = PageRecordStore.load(self.path)
+        store.append(self.record("a", "A"))
+        store.save()
+
+        store = PageRecordStore.load(self.path)
+        store.append(self.record("a", "changed"))
+        store.close()
+        store = PageRecordStore.load(self.path)
+        self.assertEqual([r.title for r in store.iter_records(["a"])], ["A"])
+        store.close()
+        self.assertEqual(sorted(p.name for p in self.path.parent.iterdir()), ["records.jsonl"])
+
+
+class TestSiteOutputs(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.dest = Path(self.tmp.name) / "docs"
+        self.outputs = SiteOutputs(
+            self.dest,
+            "https://example.com/site/",
+            Path(self.tmp.name) / "records.jsonl",
+            feed_items=2,
+        )
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def records(self):
+        return [
+            PageRecord(str(self.dest / "index.html"), "h", "Home & co", "2024-01-01", "Hi", {"home": 1}),
+            PageRecord(str(self.dest / "blog/index.html"), "h", "Blog", "2024-01-09", "", {"list": 1}),
+            PageRecord(str(self.dest / "blog/a/index.html"), "h", "A", "2024-01-02", "a", {"aa": 1}),
+            PageRecord(str(self.dest / "blog/b/index.html"), "h", "B", "2024-01-03", "b", {"bb": 1}),
+            PageRecord(str(self.dest / "blog/c/index.html"), "h", "C", "2024-01-01", "c", {"cc": 1}),
+        ]
+
+    def test_writes_sitemap_feed_and_search_index(self):
+        self.assertEqual(self.outputs.write(self.records()), 5)
+
+        sitemap = (self.dest / SITEMAP_NAME).read_text()
+        self.assertIn(
+            "<url><loc>https://example.com/site/blog/a/</loc><lastmod>2024-01-02</lastmod></url>",
+            sitemap,
+        )
+        self.assertEqual(sitemap.count("<url>"), 5)
+
+        feed = (self.dest / FEED_NAME).read_text()
+        self.assertIn("<title>Home &amp; co</title>", feed)
+        self.assertEqual(feed.count("<item>"), 2)
+        self.assertLess(feed.index("<title>B</title>"), feed.index("<title>A</title>"))
+        self.assertIn("<pubDate>Wed, 03 Jan 2024 00:00:00 GMT</pubDate>", feed)
+
+        meta = json.loads((self.dest / SEARCH_DIR_NAME / SEARCH_META_NAME).read_text())
+        self.assertEqual(meta["docs"][0], ["/site/", "Home & co", "Hi"])
+        self.assertEqual(meta["docs"][-1][0], "/site/blog/c/")
+
+    def test_unchanged_outputs_keep_mtime(self):
+        self.outputs.write(self.records())
+        sitemap = self.dest / SITEMAP_NAME
+        os.utime(sitemap, ns=(0, 0))
+        self.outputs.write(self.records())
+        self.assertEqual(sitemap.stat().st_mtime_ns, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,91 @@
+import tempfile
+import unittest
+from pathlib import Path
+
+from asset_manifest import AssetManifest
+from template_engine import MissingSlotError, Template, load_template
+from url_resolver import UrlResolver
+
+
+class TestTemplate(unittest.TestCase):
+    def test_render_fills_slots(self):
+        template = Template("<title>{{ Title }}</title><main>{{ Content }}</main>")
+        self.assertEqual(
+            template.render({"Title": "Hi", "Content": "<p>x</p>"}),
+            "<title>Hi</title><main><p>x</p></main>",
+        )
+
+    def test_slot_whitespace_is_optional(self):
+        template = Template("{{Title}}|{{  Title  }}")
+        self.assertEqual(template.render({"Title": "a"}), "a|a")
+
+    def test_slot_values_are_not_rescanned(self):
+        template = Template("{{ Content }}{{ Title }}")
+        self.assertEqual(
+            template.render({"Title": "T", "Content": "{{ Title }}"}),
+            "{{ Title }}T",
+        )
+
+    def test_resolver_rewrites_template_urls_only(self):
+        template = Template('<link href="/index.css">{{ Content }}')
+        html = template.render(
+            {"Content": '<code>&lt;a href="/blog"&gt;</code>'},
+            UrlResolver("/site/"),
+        )
+        self.assertEqual(
+            html,
+            '<link href="/site/index.css"><code>&lt;a href="/blog"&gt;</code>',
+        )
+
+    def test_protocol_relative_urls_are_kept(self):
+        template = Template('<script src="//cdn.example.com/x.js"></script>')
+        self.assertEqual(
+            template.render({}, UrlResolver("/site/")),
+            '<script src="//cdn.example.com/x.js"></script>',
+        )
+
+    def test_default_basepath_leaves_urls(self):
+        template = Template('<link href="/index.css">')
+        self.assertEqual(template.render({}), '<link href="/index.css">')
+
+    def test_iter_render_streams_iterable_values(self):
+        template = Template('<a href="/">{{ Content }}</a>')
+        chunks = list(
+            template.iter_render({"Content": iter(["<b>", "x"])}, UrlResolver("/s/")),
+        )
+        self.assertEqual(chunks, ['<a href="/s/">', "<b>", "x", "</a>"])
+
+    def test_assets_point_at_fingerprinted_names(self):
+        assets = AssetManifest(
+            {"index.css": {"path": "index.abc.css"}, "images/a.png": {"path": "images/a.def.png"}},
+        )
+        template = Template('<link href="/index.css"><img src="/images/a.png?v=1">')
+        html = template.render({}, UrlResolver("/site/", assets))
+        self.assertEqual(
+            html,
+            '<link href="/site/index.abc.css"><img src="/site/images/a.def.png?v=1">',
+        )
+        self.assertEqual(
+            template.render({}),
+            '<link href="/index.css"><img src="/images/a.png?v=1">',
+        )
+
+    def test_missing_slot_raises(self):
+        with self.assertRaises(MissingSlotError):
+            Template("{{ Title }}").render({})
+
+    def test_load_template_is_cached_until_changed(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "template.html"
+            path.write_text("<p>{{ Content }}</p>")
+            first = load_template(path)
+            self.assertIs(load_template(path), first)
+
+            path.write_text("<div>{{ Content }}</div>")
+            second = load_template(path)
+            self.assertIsNot(second, first)
+            self.assertEqual(second.render({"Content": "x"}), "<div>x</div>")
+
+
+if __name__ == "__main__":
+    unittest.main()
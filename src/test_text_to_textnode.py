@@ -295,6 +295,35 @@ class TestTextToTextnodeEdgeCases(unittest.TestCase):
             ],
         )
 
+    def test_delimiters_inside_code_are_literal(self):
+        self.assertListEqual(
+            text_to_textnodes("call `snake_case` and `a**b`"),
+            [
+                TextNode("call ", TextType.TEXT),
+                TextNode("snake_case", TextType.CODE),
+                TextNode(" and ", TextType.TEXT),
+                TextNode("a**b", TextType.CODE),
+            ],
+        )
+
+    def test_nested_markup_inside_emphasis_is_literal(self):
+        self.assertListEqual(
+            text_to_textnodes("_see **this** [link](url)_ done"),
+            [
+                TextNode("see **this** [link](url)", TextType.ITALIC),
+                TextNode(" done", TextType.TEXT),
+            ],
+        )
+
+    def test_failed_image_falls_back_to_link(self):
+        self.assertListEqual(
+            text_to_textnodes("![broken] [text](url)"),
+            [
+                TextNode("![broken] ", TextType.TEXT),
+                TextNode("text", TextType.LINK, "url"),
+            ],
+        )
+
 
 if __name__ == "__main__":
     unittest.main()
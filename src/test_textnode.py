@@ -1,6 +1,7 @@
 import unittest
 
 from textnode import TextNode, TextType, text_node_to_html_node
+from url_resolver import UrlResolver
 
 
 class TestTextNode(unittest.TestCase):
@@ -28,6 +29,11 @@ class TestTextNode(unittest.TestCase):
         not_node = "Some text"
         self.assertNotEqual(node, not_node)
 
+    def test_slots_reject_unknown_attributes(self):
+        node = TextNode("Some text", TextType.TEXT)
+        with self.assertRaises(AttributeError):
+            node.extra = 1
+
     def test_url_comparison(self):
         # Test nodes with same text/type but different URLs
         node1 = TextNode("Link text", TextType.LINK, "https://example1.com")
@@ -83,6 +89,14 @@ class TestTextNode(unittest.TestCase):
         self.assertEqual(html_node.tag, "img")
         self.assertEqual(html_node.props, {"src": "image.png", "alt": "Alt text"})
 
+    def test_text_node_to_html_node_resolves_root_urls(self):
+        resolver = UrlResolver("/site/")
+        link = text_node_to_html_node(TextNode("Home", TextType.LINK, "/blog/"))
+        self.assertEqual(link.props, {"href": "/blog/"})
+        self.assertEqual(link.to_html(resolver), '<a href="/site/blog/">Home</a>')
+        image = text_node_to_html_node(TextNode("A", TextType.IMAGE, "a.png"))
+        self.assertEqual(image.to_html(resolver), '<img src="a.png" alt="A"></img>')
+
     def test_text_node_to_html_node_invalid(self):
         # Create an invalid TextNode with undefined text_type
         with self.assertRaises(ValueError):
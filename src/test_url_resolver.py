@@ -0,0 +1,89 @@
+import unittest
+
+from asset_manifest import AssetManifest
+from url_resolver import CdnUrlResolver, RelativeUrlResolver, UrlResolver, split_url
+
+
+class TestUrlResolver(unittest.TestCase):
+    def setUp(self):
+        self.assets = AssetManifest(
+            {"index.css": {"path": "index.abc.css"}, "images/a.png": {"path": "images/a.def.png"}},
+        )
+
+    def test_split_url(self):
+        self.assertEqual(split_url("a/b?x=1#top"), ("a/b", "?x=1#top"))
+        self.assertEqual(split_url("a#b?c"), ("a", "#b?c"))
+        self.assertEqual(split_url("a"), ("a", ""))
+
+    def test_basepath_prefixes_root_urls(self):
+        resolver = UrlResolver("/site/")
+        self.assertEqual(resolver.resolve("/"), "/site/")
+        self.assertEqual(resolver.resolve("/blog/?page=2#top"), "/site/blog/?page=2#top")
+
+    def test_other_urls_are_kept(self):
+        resolver = UrlResolver("/site/")
+        for url in ("https://example.com/", "//cdn.example.com/a.js", "a.png", "#top", ""):
+            self.assertEqual(resolver.resolve(url), url)
+
+    def test_assets_are_fingerprinted(self):
+        resolver = UrlResolver("/site/", self.assets)
+        self.assertEqual(resolver.resolve("/images/a.png?v=1"), "/site/images/a.def.png?v=1")
+        self.assertEqual(resolver.resolve("/blog/"), "/site/blog/")
+
+    def test_key_changes_with_settings(self):
+        keys = {
+            UrlResolver().key,
+            UrlResolver("/site/").key,
+            UrlResolver("/", self.assets).key,
+            CdnUrlResolver("https://cdn.example.com").key,
+            RelativeUrlResolver("docs").key,
+        }
+        self.assertEqual(len(keys), 5)
+
+    def test_assets_key_covers_only_the_given_urls(self):
+        resolver = UrlResolver("/", self.assets)
+        self.assertNotEqual(resolver.base_key, UrlResolver().base_key)
+        self.assertEqual(resolver.assets_key(["/blog/", "a.png"]), "blog/")
+        key = resolver.assets_key(["/images/a.png?v=1", "/index.css"])
+        self.assertEqual(key, "images/a.def.png\0index.abc.css")
+
+        entries = {**self.assets.entries, "index.css": {"path": "index.xyz.css"}}
+        changed = resolver.with_assets(AssetManifest(entries))
+        self.assertEqual(changed.base_key, resolver.base_key)
+        self.assertEqual(changed.assets_key(["/images/a.png"]), "images/a.def.png")
+        self.assertNotEqual(changed.assets_key(["/index.css"]), resolver.assets_key(["/index.css"]))
+        self.assertEqual(UrlResolver().assets_key(["/index.css"]), "")
+
+    def test_with_assets_returns_updated_copy(self):
+        resolver = UrlResolver("/site/")
+        updated = resolver.with_assets(self.assets)
+        self.assertEqual(resolver.resolve("/index.css"), "/site/index.css")
+        self.assertEqual(updated.resolve("/index.css"), "/site/index.abc.css")
+        self.assertNotEqual(updated.key, resolver.key)
+
+    def test_cdn_serves_static_files(self):
+        resolver = CdnUrlResolver("https://cdn.example.com/", "/site/")
+        self.assertEqual(resolver.resolve("/a.png"), "https://cdn.example.com/a.png")
+        self.assertEqual(resolver.resolve("/blog/"), "/site/blog/")
+        self.assertEqual(resolver.resolve("/blog/index.html"), "/site/blog/index.html")
+
+    def test_cdn_uses_asset_manifest(self):
+        resolver = CdnUrlResolver("https://cdn.example.com", "/", self.assets)
+        self.assertEqual(resolver.resolve("/index.css"), "https://cdn.example.com/index.abc.css")
+        self.assertEqual(resolver.resolve("/robots.txt"), "/robots.txt")
+
+    def test_relative_urls_depend_on_page(self):
+        resolver = RelativeUrlResolver("docs", self.assets)
+        root = resolver.for_page("docs/index.html")
+        post = resolver.for_page("docs/blog/post/index.html")
+        self.assertEqual(root.resolve("/index.css"), "index.abc.css")
+        self.assertEqual(root.resolve("/blog/"), "blog/index.html")
+        self.assertEqual(root.resolve("/blog/tom?x=1"), "blog/tom/index.html?x=1")
+        self.assertEqual(post.resolve("/index.css"), "../../index.abc.css")
+        self.assertEqual(post.resolve("/"), "../../index.html")
+        self.assertEqual(post.resolve("/blog/post/#top"), "index.html#top")
+        self.assertNotEqual(root.key, post.key)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,125 @@
+import os
+import tempfile
+import unittest
+from pathlib import Path
+
+from generate_website import generate_pages_recursive
+from watch import SiteWatcher, changed_paths, snapshot
+
+
+def touch_later(path, text):
+    path.write_text(text)
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+
+
+class TestSnapshot(unittest.TestCase):
+    def test_snapshot_and_changed_paths(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            root = Path(tmp)
+            (root / "sub").mkdir()
+            (root / "a.md").write_text("a")
+            (root / "sub" / "b.md").write_text("b")
+            before = snapshot(root)
+            self.assertEqual(set(before), {root / "a.md", root / "sub" / "b.md"})
+
+            touch_later(root / "a.md", "changed")
+            (root / "sub" / "b.md").unlink()
+            (root / "c.md").write_text("c")
+            self.assertEqual(
+                changed_paths(before, snapshot(root)),
+                {root / "a.md", root / "sub" / "b.md", root / "c.md"},
+            )
+
+    def test_snapshot_missing_root(self):
+        self.assertEqual(snapshot("/nonexistent/path/for/test"), {})
+
+
+class TestSiteWatcher(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        root = Path(self.tmp.name)
+        self.content = root / "content"
+        (self.content / "post").mkdir(parents=True)
+        (self.content / "index.md").write_text("# Home")
+        (self.content / "post" / "index.md").write_text("# Post")
+        self.static = root / "static"
+        self.static.mkdir()
+        (self.static / "index.css").write_text("body {}")
+        self.template = root / "template.html"
+        self.template.write_text("<title>{{ Title }}</title>{{ Content }}")
+        self.dest = root / "docs"
+        self.manifest = root / "manifest.json"
+
+        generate_pages_recursive(
+            self.content,
+            self.template,
+            self.dest,
+            "/",
+            manifest_path=self.manifest,
+        )
+        self.watcher = SiteWatcher(
+            self.content,
+            self.static,
+            self.template,
+            self.dest,
+            "/",
+            self.manifest,
+        )
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_no_changes(self):
+        self.assertFalse(any(self.watcher.poll().values()))
+
+    def test_content_change_rebuilds_only_that_page(self):
+        home = self.dest / "index.html"
+        home.write_text("sentinel")
+        touch_later(self.content / "post" / "index.md", "# Edited")
+
+        changes = self.watcher.poll()
+        self.assertEqual(changes["content"], {self.content / "post" / "index.md"})
+        self.watcher.rebuild(changes)
+
+        self.assertIn("Edited", (self.dest / "post" / "index.html").read_text())
+        self.assertEqual(home.read_text(), "sentinel")
+
+    def test_template_change_rebuilds_everything(self):
+        touch_later(self.template, "<h1>{{ Title }}</h1>{{ Content }}")
+        self.watcher.rebuild(self.watcher.poll())
+        for page in ("index.html", "post/index.html"):
+            self.assertTrue((self.dest / page).read_text().startswith("<h1>"))
+
+    def test_static_change_is_synced(self):
+        (self.static / "app.js").write_text("// js")
+        self.watcher.rebuild(self.watcher.poll())
+        self.assertEqual((self.dest / "app.js").read_text(), "// js")
+
+    def test_static_sync_uses_the_build_options(self):
+        watcher = SiteWatcher(
+            self.content,
+            self.static,
+            self.template,
+            self.dest,
+            "/",
+            self.manifest,
+            static_workers=2,
+            checksum=True,
+        )
+        (self.static / "app.js").write_text("// js")
+        watcher.rebuild(watcher.poll())
+
+        # Same size and mtime as the source: only a checksum tells them apart.
+        css = self.dest / "index.css"
+        stat = (self.static / "index.css").stat()
+        css.write_text("body []")
+        os.utime(css, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+        touch_later(self.static / "app.js", "// changed")
+        watcher.rebuild(watcher.poll())
+        self.assertEqual(css.read_text(), "body {}")
+        self.assertEqual((self.dest / "app.js").read_text(), "// changed")
+
+
+if __name__ == "__main__":
+    unittest.main()
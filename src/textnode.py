@@ -1,6 +1,6 @@
 from enum import Enum
 
-from htmlnode import LeafNode
+from htmlnode import LeafNode, LinkUrl
 
 
 class TextType(Enum):
@@ -13,6 +13,8 @@ class TextType(Enum):
 
 
 class TextNode:
+    __slots__ = ("text", "text_type", "url")
+
     def __init__(self, text, text_type, url=None):
         self.text: str = text
         self.text_type: TextType = text_type
@@ -33,6 +35,11 @@ class TextNode:
 
 
 def text_node_to_html_node(text_node):
+    """Build the leaf for a text node.
+
+    Link and image URLs are kept as LinkUrls, resolved when the HTML is
+    serialized for a page.
+    """
     match text_node:
         case TextNode(text=text, text_type=TextType.TEXT):
             return LeafNode(None, value=text)
@@ -43,9 +50,9 @@ def text_node_to_html_node(text_node):
         case TextNode(text=text, text_type=TextType.CODE):
             return LeafNode("code", text)
         case TextNode(text=text, text_type=TextType.LINK, url=url):
-            return LeafNode(tag="a", value=text, props={"href": url})
+            return LeafNode(tag="a", value=text, props={"href": LinkUrl(url)})
         case TextNode(text=text, text_type=TextType.IMAGE, url=url):
-            return LeafNode(tag="img", value="", props={"src": url, "alt": text})
+            return LeafNode(tag="img", value="", props={"src": LinkUrl(url), "alt": text})
         case _:
             msg = "invalid node. Perhaps the wrong TextType was given"
             raise ValueError(msg)
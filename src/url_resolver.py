@@ -0,0 +1,135 @@
+import copy
+import posixpath
+from pathlib import Path, PurePosixPath
+
+
+def split_url(url):
+    """Split a URL into its path and any query string or fragment."""
+    cut = len(url)
+    for marker in ("?", "#"):
+        index = url.find(marker)
+        if index != -1:
+            cut = min(cut, index)
+    return url[:cut], url[cut:]
+
+
+class UrlResolver:
+    """Decides where root-relative URLs such as ``/images/a.png`` point.
+
+    Links and images are resolved as their HTML is serialized for a page,
+    and template attributes once per resolver, so text that merely looks
+    like a URL (e.g. inside a code sample) is never touched. Other URLs,
+    including protocol-relative ``//host/...``, are kept as written.
+
+    Subclasses override resolve_path. Resolved template markup is keyed by
+    ``key``, so it must differ whenever resolve could give a different
+    result. Built pages are keyed by ``base_key``, which leaves out the
+    asset manifest but not whether there is one, plus the assets_key of
+    the URLs each page refers to.
+    """
+
+    def __init__(self, basepath="/", assets=None):
+        self.basepath = basepath
+        self.assets = assets
+        self._update_keys()
+
+    def _key_parts(self):
+        return (type(self).__name__, self.basepath)
+
+    def _update_keys(self):
+        # Pages built before assets were fingerprinted record no URLs, so
+        # their assets_key alone would not tell them apart.
+        fingerprinted = "fingerprinted" if self.assets is not None else ""
+        self.base_key = "\0".join((*self._key_parts(), fingerprinted))
+        digest = "" if self.assets is None else self.assets.digest
+        self.key = f"{self.base_key}\0{digest}"
+
+    def assets_key(self, urls):
+        """Return what resolving urls depends on in the asset manifest.
+
+        That is the published name of every root-relative path among urls,
+        including those not fingerprinted yet, in case they are added.
+        """
+        if self.assets is None:
+            return ""
+        names = []
+        for url in sorted(urls):
+            if url.startswith("/") and not url.startswith("//"):
+                names.append(self.assets.resolve(split_url(url[1:])[0]))
+        return "\0".join(names)
+
+    def resolve(self, url):
+        if not url.startswith("/") or url.startswith("//"):
+            return url
+
+        path, suffix = split_url(url[1:])
+        if self.assets is not None:
+            path = self.assets.resolve(path)
+        return self.resolve_path(path) + suffix
+
+    def resolve_path(self, path):
+        """Return the URL for a path relative to the site root, without a leading slash."""
+        return f"{self.basepath}{path}"
+
+    def for_page(self, dest_path):
+        """Return the resolver to use for the page written to dest_path."""
+        return self
+
+    def with_assets(self, assets):
+        resolver = copy.copy(self)
+        resolver.assets = assets
+        resolver._update_keys()
+        return resolver
+
+
+class CdnUrlResolver(UrlResolver):
+    """Serves static files from a CDN host and pages from basepath.
+
+    A path is a static file if it is in the asset manifest or, without
+    one, if its last component has a suffix other than .html.
+    """
+
+    def __init__(self, cdn_url, basepath="/", assets=None):
+        self.cdn_url = cdn_url.rstrip("/")
+        super().__init__(basepath, assets)
+
+    def _key_parts(self):
+        return (*super()._key_parts(), self.cdn_url)
+
+    def _is_static(self, path):
+        if self.assets is not None:
+            return path in self.assets.published_paths
+        suffix = PurePosixPath(path).suffix
+        return bool(suffix) and suffix != ".html"
+
+    def resolve_path(self, path):
+        if self._is_static(path):
+            return f"{self.cdn_url}/{path}"
+        return super().resolve_path(path)
+
+
+class RelativeUrlResolver(UrlResolver):
+    """Links relative to each page, so the site works from any directory or file://."""
+
+    def __init__(self, dest_root, assets=None, page_dir=""):
+        self.dest_root = Path(dest_root)
+        self.page_dir = page_dir
+        super().__init__("/", assets)
+
+    def _key_parts(self):
+        return (*super()._key_parts(), self.page_dir)
+
+    def for_page(self, dest_path):
+        resolver = copy.copy(self)
+        resolver.page_dir = Path(dest_path).parent.relative_to(self.dest_root).as_posix()
+        if resolver.page_dir == ".":
+            resolver.page_dir = ""
+        resolver._update_keys()
+        return resolver
+
+    def resolve_path(self, path):
+        # file:// has no index pages, so links to directories, i.e. paths
+        # whose last component has no suffix, point at their index.html.
+        if not PurePosixPath(path).suffix:
+            path = f"{path.rstrip('/')}/index.html".lstrip("/")
+        return posixpath.relpath(f"/{path}", f"/{self.page_dir}")
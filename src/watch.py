@@ -0,0 +1,176 @@
+import os
+import time
+from logging import getLogger
+from pathlib import Path
+
+from generate_website import (
+    generate_pages_recursive,
+    sync_fingerprinted_static,
+    sync_static_directory,
+)
+
+
+def snapshot(root):
+    """Map every file under root (or root itself, if a file) to (mtime_ns, size)."""
+    root = Path(root)
+    if root.is_file():
+        stat = root.stat()
+        return {root: (stat.st_mtime_ns, stat.st_size)}
+
+    files = {}
+    pending = [root]
+    while pending:
+        directory = pending.pop()
+        try:
+            entries = list(os.scandir(directory))
+        except FileNotFoundError:
+            continue
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                pending.append(entry.path)
+            elif entry.is_file():
+                stat = entry.stat()
+                files[Path(entry.path)] = (stat.st_mtime_ns, stat.st_size)
+    return files
+
+
+def changed_paths(before, after):
+    return {path for path in before.keys() | after.keys() if before.get(path) != after.get(path)}
+
+
+class SiteWatcher:
+    """Poll content, static files and the template, rebuilding what changed.
+
+    Page rebuilds go through the build manifest, so only pages whose
+    source changed are rendered again; a template change invalidates
+    every page. Static changes are synced without touching pages, unless
+    assets are fingerprinted and a published name changed.
+    """
+
+    def __init__(
+        self,
+        content_dir,
+        static_dir,
+        template_path,
+        dest_dir,
+        basepath,
+        manifest_path,
+        jobs=1,
+        cache=None,
+        static_mode="copy",
+        static_workers=1,
+        checksum=False,
+        assets=None,
+        memo=None,
+        skip_unchanged=False,
+        async_io=False,
+        index_path=None,
+        resolver=None,
+        outputs=None,
+        interval=0.5,
+    ):
+        self.content_dir = Path(content_dir)
+        self.static_dir = Path(static_dir)
+        self.template_path = Path(template_path)
+        self.dest_dir = Path(dest_dir)
+        self.basepath = basepath
+        self.manifest_path = manifest_path
+        self.jobs = jobs
+        self.cache = cache
+        self.static_mode = static_mode
+        self.static_workers = static_workers
+        self.checksum = checksum
+        self.assets = assets
+        self.memo = memo
+        self.skip_unchanged = skip_unchanged
+        self.async_io = async_io
+        self.index_path = index_path
+        self.resolver = resolver
+        self.outputs = outputs
+        self.interval = interval
+        self._snapshots = self._take_snapshots()
+
+    def _take_snapshots(self):
+        return {
+            "content": snapshot(self.content_dir),
+            "static": snapshot(self.static_dir),
+            "template": snapshot(self.template_path),
+        }
+
+    def poll(self):
+        """Return the changed paths per watched input since the last poll."""
+        current = self._take_snapshots()
+        changes = {
+            name: changed_paths(self._snapshots[name], current[name]) for name in current
+        }
+        self._snapshots = current
+        return changes
+
+    def rebuild(self, changes):
+        logger = getLogger(__name__)
+
+        assets_changed = False
+        if changes["static"]:
+            logger.info("%d static file(s) changed, syncing", len(changes["static"]))
+            if self.assets is None:
+                sync_static_directory(
+                    self.static_dir,
+                    self.dest_dir,
+                    checksum=self.checksum,
+                    mode=self.static_mode,
+                    workers=self.static_workers,
+                )
+            else:
+                previous_digest = self.assets.digest
+                self.assets, _ = sync_fingerprinted_static(
+                    self.static_dir,
+                    self.dest_dir,
+                    checksum=self.checksum,
+                    mode=self.static_mode,
+                    workers=self.static_workers,
+                )
+                assets_changed = self.assets.digest != previous_digest
+                if self.resolver is not None:
+                    self.resolver = self.resolver.with_assets(self.assets)
+
+        if changes["template"]:
+            logger.info("Template changed, rebuilding every page")
+        elif assets_changed:
+            logger.info("Fingerprinted asset names changed, rebuilding the pages that use them")
+        elif changes["content"]:
+            logger.info("%d content file(s) changed", len(changes["content"]))
+        else:
+            return
+
+        generate_pages_recursive(
+            self.content_dir,
+            self.template_path,
+            self.dest_dir,
+            self.basepath,
+            manifest_path=self.manifest_path,
+            jobs=self.jobs,
+            cache=self.cache,
+            assets=self.assets,
+            memo=self.memo,
+            skip_unchanged=self.skip_unchanged,
+            async_io=self.async_io,
+            index_path=self.index_path,
+            resolver=self.resolver,
+            outputs=self.outputs,
+        )
+
+    def run(self):
+        logger = getLogger(__name__)
+        logger.info("Watching %s, %s and %s", self.content_dir, self.static_dir, self.template_path)
+        try:
+            while True:
+                time.sleep(self.interval)
+                changes = self.poll()
+                if not any(changes.values()):
+                    continue
+                try:
+                    self.rebuild(changes)
+                except Exception:
+                    logger.exception("Rebuild failed, waiting for the next change")
+        except KeyboardInterrupt:
+            logger.info("Stopped watching")